@@ -1,6 +1,68 @@
 # __init__.py in animations/
-from .color_animations import *
-from .motion_animations import *
-from .random_animations import *
-from .sound_animations import *
-from .animation_utils import *
\ No newline at end of file
+#
+# Die Animationsmodule (und mit ihnen pyaudio und die Audio-Analyse) werden nicht mehr beim
+# Import des Pakets geladen, sondern erst beim ersten Zugriff auf einen ihrer Namen, z. B.
+# animations.run_rainbow_animation. Welcher Name in welchem Modul definiert ist, liest
+# find_module() aus dem Quelltext, ohne das Modul zu importieren.
+import importlib
+import os
+
+# Module, deren öffentliche Namen das Paket anbietet (früher per "from .x import *")
+_MODULES = (
+    "color_animations",
+    "motion_animations",
+    "random_animations",
+    "sound_animations",
+    "recording",
+    "network_input",
+    "compositor",
+    "animation_utils",
+)
+
+_index = None
+
+
+def _defined_names(module_name):
+    """Öffentliche Funktionen, Klassen und Konstanten, die `module_name` auf oberster Ebene definiert."""
+    import ast  # erst beim ersten Namenszugriff, nicht schon beim Import des Pakets
+    path = os.path.join(os.path.dirname(__file__), f"{module_name}.py")
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    names = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.append(node.name)
+        elif isinstance(node, ast.Assign):
+            names.extend(target.id for target in node.targets if isinstance(target, ast.Name))
+    return [name for name in names if not name.startswith("_")]
+
+
+def _name_index():
+    global _index
+    if _index is None:
+        index = {}
+        for module_name in _MODULES:
+            for name in _defined_names(module_name):
+                index.setdefault(name, module_name)
+        _index = index
+    return _index
+
+
+def find_module(name):
+    """Liefert den Modulnamen (z. B. "color_animations"), der `name` definiert, oder None."""
+    return _name_index().get(name)
+
+
+def __getattr__(name):
+    if name == "__all__":
+        return sorted(_name_index())
+    module_name = find_module(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_name_index()))
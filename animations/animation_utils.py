@@ -1,12 +1,20 @@
 # animation_utils.py
 
-from rpi_ws281x import Color
+from led_backend import Color, ws
+import ctypes
 import time
+import weakref
 import logging
+import numpy as np
+from .scheduler import FrameScheduler, LATE_SKIP
+from .frame_stats import FrameStats
+from .tracing import tracer, FRAME_BEGIN, FRAME_END
 
 logger = logging.getLogger("GenericAnimation")
 
 class RGBColor:
+    __slots__ = ("r", "g", "b")
+
     def __init__(self, r, g, b):
         self.r = r
         self.g = g
@@ -19,31 +27,311 @@ class RGBColor:
     def from_tuple(color_tuple):
         return RGBColor(color_tuple[0], color_tuple[1], color_tuple[2])
 
-def run_generic_animation(strip, stop_event, update_function, update_speed=50, **kwargs):
+class PackedColor(int):
+    """
+    Farbe als gepackter 32-Bit-WRGB-Wert, wie ihn Color() liefert, mit Zugriff auf die Kanäle.
+
+    Als int-Unterklasse ohne Instanz-Dict kann sie überall verwendet werden, wo eine Farbe
+    erwartet wird (setPixelColor, FrameBuffer, numpy-Arrays).
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, red=0, green=0, blue=0, white=0):
+        return super().__new__(cls, (white << 24) | (red << 16) | (green << 8) | blue)
+
+    @classmethod
+    def from_int(cls, value):
+        return int.__new__(cls, int(value) & 0xFFFFFFFF)
+
+    @property
+    def r(self):
+        return (self >> 16) & 0xff
+
+    @property
+    def g(self):
+        return (self >> 8) & 0xff
+
+    @property
+    def b(self):
+        return self & 0xff
+
+    @property
+    def w(self):
+        return (self >> 24) & 0xff
+
+    def rgbw(self):
+        return (self.r, self.g, self.b, self.w)
+
+    def scaled(self, scale_factor):
+        return scale_color(self, scale_factor)
+
+    def blend(self, other, ratio):
+        return blend_colors(self, other, ratio)
+
+    def __repr__(self):
+        return f"PackedColor(r={self.r}, g={self.g}, b={self.b}, w={self.w})"
+
+class FrameBuffer:
+    """
+    Array-basierter Framepuffer für den LED-Streifen.
+
+    Die Pixel liegen als gepackte 32-Bit-WRGB-Werte (wie von Color() erzeugt) in einem
+    uint32-Array. Animationen schreiben in diesen Puffer, run_generic_animation kopiert
+    ihn einmal pro Frame in den Streifen.
+    """
+
+    def __init__(self, num_pixels):
+        self.pixels = np.zeros(num_pixels, dtype=np.uint32)
+        self._scratch = None
+
+    def __len__(self):
+        return len(self.pixels)
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    @property
+    def channels(self):
+        """
+        Nx4 uint8-Sicht auf dieselben Daten in Speicherreihenfolge (B, G, R, W).
+        Schreibzugriffe auf diese Sicht verändern den Framepuffer direkt.
+        """
+        return self.pixels.view(np.uint8).reshape(-1, 4)
+
+    def fill(self, color):
+        self.pixels.fill(color)
+
+    def fill_rgbw(self, red, green, blue, white=0):
+        self.pixels.fill(Color(red, green, blue, white))
+
+    def clear(self):
+        self.pixels.fill(0)
+
+    def setPixelColor(self, n, color):
+        self.pixels[n] = color
+
+    def setPixelColorRGB(self, n, red, green, blue, white=0):
+        self.pixels[n] = Color(red, green, blue, white)
+
+    def getPixelColor(self, n):
+        return int(self.pixels[n])
+
+    def set_pixels(self, indices, colors):
+        """
+        Sparse-Schreibzugriff: setzt nur die Pixel `indices` (Array oder Slice) auf `colors`
+        (ein gepackter Farbwert oder ein Array mit einem Wert pro Index).
+        """
+        self.pixels[indices] = colors
+
+    def fade(self, decay, start=0, stop=None):
+        """
+        Dimmt die Pixel [start:stop] in allen Kanälen um den Faktor decay (auf [0, 1] begrenzt).
+
+        Gerechnet wird in 16-Bit-Festkomma auf einem wiederverwendeten uint32-Puffer, damit
+        kein Kanal über- oder unterläuft.
+        """
+        channels = self.channels[max(start, 0):stop]
+        if len(channels) == 0:
+            return
+        if self._scratch is None:
+            self._scratch = np.empty((len(self), 4), dtype=np.uint32)
+        scratch = self._scratch[:len(channels)]
+        scratch[:] = channels
+        scratch *= int(round(min(max(decay, 0.0), 1.0) * 65536))
+        scratch >>= 16
+        channels[:] = scratch
+
+    def push(self, strip):
+        """Kopiert den kompletten Puffer in einem Schritt in den LED-Streifen (ohne show())."""
+        _bulk_writer(strip)(self.pixels)
+
+
+class FrameDiff:
+    """
+    Erkennt, ob sich ein FrameBuffer seit dem letzten angezeigten Frame geändert hat.
+
+    Hält eine Kopie des zuletzt übertragenen Frames und vergleicht vektorisiert. changed()
+    liefert None (keine Änderung), ein Index-Array der geänderten Pixel oder beim ersten
+    Frame alle Pixel.
+    """
+
+    def __init__(self, num_pixels):
+        self._shown = np.zeros(num_pixels, dtype=np.uint32)
+        self._mask = np.zeros(num_pixels, dtype=bool)
+        self._valid = False
+
+    def changed(self, pixels):
+        if not self._valid:
+            return np.arange(len(pixels))
+        np.not_equal(pixels, self._shown, out=self._mask)
+        if not self._mask.any():
+            return None
+        return np.flatnonzero(self._mask)
+
+    def commit(self, pixels):
+        """Merkt sich `pixels` als den aktuell angezeigten Frame."""
+        self._shown[:] = pixels
+        self._valid = True
+
+
+def fade_pixels(frame, decay, start=0, stop=None):
+    """
+    Dimmt die Pixel frame[start:stop] eines FrameBuffers in allen Kanälen (R, G, B, W) um den Faktor decay.
+
+    Ergebnis wie int(kanal * decay), bis auf Rundung; decay wird auf [0, 1] begrenzt.
+    """
+    frame.fade(decay, start, stop)
+
+
+def _bulk_writer(strip):
+    """
+    Liefert eine Funktion write(pixels, changed=None), die ein uint32-Array in den Pixelspeicher
+    des Streifens schreibt. Mit `changed` (aufsteigendes Index-Array) werden nur diese Pixel
+    bzw. der Bereich vom ersten bis zum letzten geänderten Pixel übertragen.
+
+    Backends mit set_pixels() (z. B. VirtualStrip) bekommen das Array direkt. Bei rpi_ws281x
+    wird per memmove in den LED-Puffer des Treibers kopiert; der Treiber wendet Farbreihenfolge
+    und Gamma erst beim Rendern an. Ist beides nicht möglich, wird auf setPixelColor pro Pixel
+    zurückgefallen.
+    """
+    set_pixels = getattr(strip, "set_pixels", None)
+    if set_pixels is not None:
+        def write(pixels, changed=None):
+            if changed is None:
+                set_pixels(pixels)
+            else:
+                start, stop = int(changed[0]), int(changed[-1]) + 1
+                set_pixels(pixels[start:stop], start)
+        return write
+
+    channel = getattr(strip, "_channel", None)
+    if channel is not None:
+        try:
+            address = int(ws.ws2811_channel_t_leds_get(channel))
+            count = ws.ws2811_channel_t_count_get(channel)
+        except (AttributeError, TypeError):
+            address = 0
+        if address:
+            def write(pixels, changed=None):
+                start, stop = (0, len(pixels)) if changed is None else (int(changed[0]), int(changed[-1]) + 1)
+                stop = min(stop, count)
+                if stop > start:
+                    ctypes.memmove(address + start * 4, pixels.ctypes.data + start * 4, (stop - start) * 4)
+            return write
+
+    set_pixel = strip.setPixelColor
+
+    def write(pixels, changed=None):
+        if changed is None:
+            for i, color in enumerate(pixels.tolist()):
+                set_pixel(i, color)
+        else:
+            for i, color in zip(changed.tolist(), pixels[changed].tolist()):
+                set_pixel(i, color)
+    return write
+
+
+# FrameStats pro Streifen bzw. Ebene. Bei Überblendungen und im Compositor laufen mehrere
+# Animationen gleichzeitig, jede auf ihrer eigenen LayerStrip.
+_frame_stats = weakref.WeakKeyDictionary()
+
+
+def get_frame_stats(strip):
+    """Liefert die FrameStats der zuletzt auf `strip` gestarteten Animation (oder None)."""
+    try:
+        return _frame_stats.get(strip)
+    except TypeError:
+        return None
+
+
+def run_generic_animation(strip, stop_event, update_function, update_speed=50, use_framebuffer=False, fps=None, late_policy=LATE_SKIP, stats=None, params=None, period_param=None, **kwargs):
     """
     Führt eine generische Animation aus, die eine update_function verwendet.
     
     :param strip: Der LED-Streifen (PixelStrip oder Adafruit_NeoPixel)
     :param stop_event: threading.Event-Objekt, das das Ende der Animation signalisiert
     :param update_function: Funktion, die pro Frame ausgeführt wird und die LED-Werte festlegt
-    :param update_speed: Zeitverzögerung zwischen den Aktualisierungen in Millisekunden
+    :param update_speed: Framedauer in Millisekunden (Abstand der Frame-Deadlines)
+    :param use_framebuffer: Wenn True, bekommt die update_function statt des Streifens einen
+        FrameBuffer, der nach jedem Update in einem Schritt in den Streifen kopiert wird. Dabei werden
+        nur geänderte Pixel übertragen; ist der Frame unverändert, entfallen Übertragung und show()
+    :param fps: Ziel-Bildrate; wenn gesetzt, hat sie Vorrang vor update_speed
+    :param late_policy: Umgang mit verpassten Deadlines, "skip" oder "catch_up" (siehe FrameScheduler)
+    :param stats: Optionales FrameStats-Objekt für die Zeitmessung pro Frame; ohne Angabe wird
+        eines angelegt, abrufbar über get_frame_stats(strip)
+    :param params: Optionale LiveParameters; die update_function bekommt dann pro Frame den
+        aktuellen ParameterSnapshot als zweites Argument, Änderungen wirken ab dem nächsten Frame
+    :param period_param: Name des Parameters in `params`, der die Framedauer in Millisekunden angibt,
+        oder eine Funktion snapshot -> Millisekunden (None = unverändert)
     :param **kwargs: Zusätzliche Argumente, die an die update_function übergeben werden
     """
     logger = logging.getLogger("GenericAnimation")
+    frame = FrameBuffer(strip.numPixels()) if use_framebuffer else None
+    push = _bulk_writer(strip) if use_framebuffer else None
+    diff = FrameDiff(strip.numPixels()) if use_framebuffer else None
+    period = 1.0 / fps if fps else update_speed / 1000.0
+    scheduler = FrameScheduler(period, late_policy=late_policy)
+    if stats is None:
+        stats = FrameStats(update_function.__qualname__.split(".")[0])
+    try:
+        _frame_stats[strip] = stats
+    except TypeError:
+        pass  # Streifen ohne schwache Referenzen, Statistik nur über `stats` erreichbar
+    clock = time.perf_counter
+    args = ()
+    version = None
     
     try:
+        scheduler.start()
         while not stop_event.is_set():
+            frame_start = clock()
+            tracer.record(FRAME_BEGIN)
+            if params is not None:
+                snapshot = params.snapshot
+                if snapshot.version != version:
+                    version = snapshot.version
+                    args = (snapshot,)
+                    if callable(period_param):
+                        period_ms = period_param(snapshot)
+                    else:
+                        period_ms = snapshot.get(period_param) if period_param is not None else None
+                    if period_ms:
+                        scheduler.period = period_ms / 1000.0
             # Update-Funktion aufrufen, um die LEDs zu aktualisieren
-            update_function(strip, **kwargs)
+            changed = True
+            if frame is not None:
+                update_function(frame, *args, **kwargs)
+                update_end = clock()
+                # Nur geänderte Pixel übertragen, unveränderte Frames gar nicht
+                changed = diff.changed(frame.pixels)
+                if changed is not None:
+                    push(frame.pixels, changed)
+                    diff.commit(frame.pixels)
+            else:
+                update_function(strip, *args, **kwargs)
+                update_end = clock()
+            pack_end = clock()
             
             # Zeige die Änderungen auf dem LED-Streifen
-            strip.show()
+            if changed is not None:
+                strip.show()
+            else:
+                stats.unchanged_frames += 1
+            show_end = clock()
+            tracer.record(FRAME_END)
             
-            # Warte zwischen den Updates
-            time.sleep(update_speed / 1000.0)
+            # Warte bis zur nächsten Frame-Deadline
+            running = scheduler.wait(stop_event)
+            stats.update_deadlines(scheduler)
+            stats.record(update_end - frame_start, pack_end - update_end, show_end - pack_end, clock() - show_end)
+            if not running:
+                break
     except Exception as e:
         logger.error(f"Error in generic animation: {e}", exc_info=True)
     finally:
+        if stats.frames:
+            logger.info(stats.summary())
         # Streifen löschen, wenn die Animation beendet ist
         clear_strip(strip)
 
@@ -53,18 +341,21 @@ def clear_strip(strip):
     set_all_pixels(strip, Color(0, 0, 0))
 
 def set_all_pixels(strip, color):
-    """Setzt alle LEDs im Streifen auf dieselbe Farbe."""
-    l = strip.numPixels()
-    for i in range(l):
-        strip.setPixelColor(i, color)
+    """
+    Setzt alle LEDs im Streifen auf dieselbe Farbe.
+    Ein FrameBuffer wird nur gefüllt; ein echter Streifen wird in einem Schritt beschrieben und angezeigt.
+    """
+    if isinstance(strip, FrameBuffer):
+        strip.fill(color)
+        return
+    frame = FrameBuffer(strip.numPixels())
+    frame.fill(color)
+    frame.push(strip)
     strip.show()
 
 def set_all_pixels_rgbw(strip, red, green, blue, white):
     """Setzt alle LEDs auf den gleichen RGBW-Wert."""
-    l = strip.numPixels()
-    for i in range(l):
-        strip.setPixelColorRGB(i, red, green, blue, white)
-    strip.show()
+    set_all_pixels(strip, Color(red, green, blue, white))
 
 def fade_color(color, brightness):
     """
@@ -75,7 +366,7 @@ def fade_color(color, brightness):
     g = (color >> 8) & 0xff
     b = color & 0xff
     w = (color >> 24) & 0xff
-    return Color(
+    return PackedColor(
         r * brightness // 255,
         g * brightness // 255,
         b * brightness // 255,
@@ -105,7 +396,7 @@ def scale_color(color, scale_factor):
     g = (color >> 8) & 0xff
     b = color & 0xff
     w = (color >> 24) & 0xff
-    return Color(
+    return PackedColor(
         int(r * scale_factor),
         int(g * scale_factor),
         int(b * scale_factor),
@@ -132,6 +423,30 @@ def random_rgb_color():
         0
     )
 
+def random_colors(rng, count, white=True):
+    """
+    Erzeugt `count` zufällige Farben auf einmal als uint32-Array, jeder Kanal gleichverteilt
+    0-255 (wie random_color bzw. mit white=False wie random_rgb_color).
+
+    :param rng: numpy.random.Generator
+    """
+    colors = rng.integers(0, 1 << 32, count, dtype=np.uint32)
+    if not white:
+        colors &= 0x00FFFFFF
+    return colors
+
+
+def random_sparkles(rng, pixels, probability, colors=None):
+    """
+    Setzt jeden Pixel mit Wahrscheinlichkeit `probability` auf eine Farbe, alle anderen auf aus.
+    Ohne `colors` werden zufällige RGBW-Farben gezogen, sonst wird der gepackte Wert verwendet.
+    """
+    lit = rng.random(len(pixels)) < probability
+    pixels.fill(0)
+    pixels[lit] = random_colors(rng, int(lit.sum())) if colors is None else colors
+    return lit
+
+
 def blend_colors(color1, color2, ratio):
     """
     Mischt zwei Farben basierend auf einem Verhältnis (ratio). Ratio sollte zwischen 0 und 1 liegen.
@@ -145,4 +460,84 @@ def blend_colors(color1, color2, ratio):
     b = int(b1 * (1 - ratio) + b2 * ratio)
     w = int(w1 * (1 - ratio) + w2 * ratio)
 
-    return Color(r, g, b, w)
+    return PackedColor(r, g, b, w)
+
+
+def blend_frames(pixels1, pixels2, ratio, out=None):
+    """
+    Mischt zwei ganze Frames (uint32-Arrays) wie blend_colors, kanalweise in 8-Bit-Festkomma.
+    Ratio 0 liefert pixels1, 1 liefert pixels2; statt einer Zahl ist auch ein Array mit einem
+    Verhältnis pro Pixel möglich. Ergebnis in `out` (oder einem neuen Array).
+    """
+    if out is None:
+        out = np.empty_like(pixels1)
+    weight = np.rint(np.clip(ratio, 0.0, 1.0) * 256).astype(np.uint16)
+    if weight.ndim:
+        weight = weight.reshape(-1, 1)
+    mixed = pixels1.view(np.uint8).reshape(-1, 4).astype(np.uint16) * (256 - weight)
+    mixed += pixels2.view(np.uint8).reshape(-1, 4).astype(np.uint16) * weight
+    mixed >>= 8
+    out.view(np.uint8).reshape(-1, 4)[:] = mixed
+    return out
+
+
+# Vektorisierte Gegenstücke zu Color(), fade_color/scale_color und wheel_rgbw. Gepackte Farben
+# liegen als uint32-Arrays vor, entpackte als (..., 4) uint8-Arrays in der Reihenfolge R, G, B, W.
+_UNPACK_SHIFTS = np.array([16, 8, 0, 24], dtype=np.uint32)
+
+
+def pack_colors(rgbw):
+    """
+    Packt ein (..., 3)- oder (..., 4)-Array mit R, G, B[, W] (0-255) in uint32-Farben wie Color().
+    """
+    rgbw = np.asarray(rgbw, dtype=np.uint32)
+    packed = (rgbw[..., 0] << 16) | (rgbw[..., 1] << 8) | rgbw[..., 2]
+    if rgbw.shape[-1] > 3:
+        packed |= rgbw[..., 3] << 24
+    return packed
+
+
+def unpack_colors(pixels):
+    """Zerlegt gepackte Farben in ein (..., 4) uint8-Array mit R, G, B, W."""
+    pixels = np.asarray(pixels, dtype=np.uint32)
+    return ((pixels[..., None] >> _UNPACK_SHIFTS) & 0xff).astype(np.uint8)
+
+
+def scale_colors(pixels, scale_factor, out=None):
+    """
+    Skaliert gepackte Farben wie scale_color in allen Kanälen, in 16-Bit-Festkomma.
+    `scale_factor` ist eine Zahl oder ein Array mit einem Faktor pro Pixel; Faktoren über 1
+    hellen auf und werden bei 255 pro Kanal begrenzt.
+    """
+    pixels = np.asarray(pixels, dtype=np.uint32, order="C")
+    if out is None:
+        out = np.empty_like(pixels)
+    weight = np.rint(np.clip(scale_factor, 0.0, 255.0) * 65536).astype(np.uint64)
+    if weight.ndim:
+        weight = weight.reshape(-1, 1)
+    channels = pixels.reshape(-1).view(np.uint8).reshape(-1, 4) * weight
+    channels >>= 16
+    np.minimum(channels, 255, out=channels)
+    out.reshape(-1).view(np.uint8).reshape(-1, 4)[:] = channels
+    return out
+
+
+def _build_wheel():
+    pos = np.arange(256, dtype=np.uint32)
+    rgbw = np.zeros((256, 4), dtype=np.uint32)
+    first, second, third = pos < 85, (pos >= 85) & (pos < 170), pos >= 170
+    rising = (pos - 85 * second - 170 * third) * 3
+    falling = 255 - rising
+    rgbw[first, 0], rgbw[first, 1] = rising[first], falling[first]
+    rgbw[second, 0], rgbw[second, 2] = falling[second], rising[second]
+    rgbw[third, 1], rgbw[third, 2] = rising[third], falling[third]
+    return pack_colors(rgbw)
+
+
+# Regenbogentabelle: WHEEL[pos] == Color(*wheel_rgbw(pos))
+WHEEL = _build_wheel()
+
+
+def wheel_colors(positions):
+    """Regenbogenfarben wie wheel_rgbw für ein ganzes Positions-Array (Werte modulo 256)."""
+    return WHEEL[np.asarray(positions) & 255]
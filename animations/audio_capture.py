@@ -0,0 +1,175 @@
+# audio_capture.py
+import time
+import logging
+import threading
+import numpy as np
+import pyaudio
+from audio_devices import catalog
+from .tracing import tracer, AUDIO_BLOCK, AUDIO_OVERFLOW
+
+logger = logging.getLogger("SK6812Animations")
+
+
+class SampleRingBuffer:
+    """
+    Ringpuffer für Mono-int16-Samples mit genau einem Schreiber und beliebig vielen Lesern.
+
+    Der Schreiber (PyAudio-Callback) kopiert die Samples in den Puffer und erhöht erst danach
+    den Zähler `written`. Leser kopieren das gewünschte Fenster und prüfen anschließend, ob der
+    Schreiber sie in der Zwischenzeit überholt hat; nur dann wird die Kopie wiederholt.
+    Es gibt keine Locks, Render- und Audio-Thread blockieren sich also nie gegenseitig.
+    `guard` hält einen Sicherheitsabstand zu einem gerade laufenden Schreibvorgang ein.
+    """
+
+    def __init__(self, capacity, guard=4096):
+        self.capacity = capacity
+        self.guard = guard
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self.written = 0
+
+    def write(self, samples):
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            self.written += n - self.capacity
+            n = self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        self.written += n
+
+    def read(self, end, count, out=None):
+        """
+        Kopiert die `count` Samples, die vor dem Samplezähler `end` geschrieben wurden.
+        Noch nicht geschriebene Samples (Start der Aufnahme) werden mit 0 aufgefüllt.
+        """
+        if count > self.capacity - self.guard:
+            raise ValueError(f"Window of {count} samples exceeds ring capacity {self.capacity}")
+        if out is None:
+            out = np.empty(count, dtype=np.int16)
+        while True:
+            missing = min(max(count - end, 0), count)
+            out[:missing] = 0
+            start = (end - count + missing) % self.capacity
+            n = count - missing
+            first = min(n, self.capacity - start)
+            out[missing:missing + first] = self._data[start:start + first]
+            out[missing + first:] = self._data[:n - first]
+            # Wurde das gelesene Fenster während der Kopie überschrieben, noch einmal lesen
+            if self.written - end <= self.capacity - self.guard - count:
+                return out
+            end = self.written
+
+    def read_latest(self, count, out=None):
+        """Kopiert die neuesten `count` Samples."""
+        return self.read(self.written, count, out)
+
+
+class AudioCaptureService:
+    """
+    Langlebige Audioaufnahme im PyAudio-Callback-Modus.
+
+    Der Callback füllt einen SampleRingBuffer, die Animationen holen sich pro Frame das
+    neueste Fenster, ohne auf das Audiogerät zu warten. Der Stream bleibt beim Wechsel
+    zwischen Musik-Animationen geöffnet und wird über die PyAudio-Instanz des
+    Gerätekatalogs geöffnet, ohne PortAudio erneut zu initialisieren.
+    """
+
+    def __init__(self, device_index=None, rate=44100, frames_per_buffer=512, buffer_seconds=2.0):
+        self.device_index = device_index
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.ring = SampleRingBuffer(int(rate * buffer_seconds))
+        self.overflows = 0
+        self.last_block_time = None
+        self._stream = None
+
+    @property
+    def samples_written(self):
+        return self.ring.written
+
+    @property
+    def stream_time(self):
+        """Audio-Uhr in Sekunden: bisher aufgenommene Samples / Samplerate."""
+        return self.ring.written / self.rate
+
+    @property
+    def is_active(self):
+        return self._stream is not None and self._stream.is_active()
+
+    def start(self):
+        if self._stream is not None:
+            return
+        self._stream = catalog.open_stream(format=pyaudio.paInt16,
+                                           channels=1,
+                                           rate=self.rate,
+                                           input=True,
+                                           input_device_index=self.device_index,
+                                           frames_per_buffer=self.frames_per_buffer,
+                                           stream_callback=self._callback)
+        self._stream.start_stream()
+
+        if self._stream.is_active():
+            logger.info("Audio stream successfully initialized.")
+        else:
+            logger.error("Audio stream initialization failed.")
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            catalog.close_stream(self._stream)
+            self._stream = None
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+            tracer.record(AUDIO_OVERFLOW, self.overflows)
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        tracer.record(AUDIO_BLOCK, frame_count)
+        self.last_block_time = time.perf_counter()
+        return (None, pyaudio.paContinue)
+
+    def read_latest(self, count, out=None):
+        return self.ring.read_latest(count, out)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_audio_capture(device_index=None, rate=44100):
+    """
+    Liefert den gemeinsamen AudioCaptureService und startet ihn bei Bedarf.
+    Nur wenn sich Gerät oder Samplerate ändern, wird der Stream neu geöffnet.
+    """
+    global _service
+    with _service_lock:
+        if _service is not None and (_service.device_index != device_index or _service.rate != rate):
+            _service.stop()
+            _service = None
+        if _service is None:
+            _service = AudioCaptureService(device_index, rate)
+            _service.start()
+        return _service
+
+
+def install_audio_capture(service):
+    """
+    Ersetzt den gemeinsamen Dienst, z. B. durch eine synthetische Quelle für Benchmarks.
+    Der Dienst muss zu Gerät und Samplerate passen, mit denen die Animationen ihn anfordern.
+    """
+    global _service
+    with _service_lock:
+        if _service is not None and _service is not service:
+            _service.stop()
+        _service = service
+
+
+def shutdown_audio_capture():
+    """Schließt den gemeinsamen Audio-Stream, z. B. beim Beenden des Programms."""
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.stop()
+            _service = None
@@ -0,0 +1,145 @@
+# beat_tracking.py
+import numpy as np
+
+
+class BeatTracker:
+    """
+    Onset-Erkennung per Spectral Flux mit Tempo-Schätzung und Beat-Vorhersage.
+
+    Pro Analysefenster wird der Spectral Flux (Summe der positiven Änderungen des
+    logarithmierten Betragsspektrums) berechnet und in eine Onset-Hüllkurve geschrieben.
+    Ein Onset liegt vor, wenn der Flux über threshold * Mittelwert der letzten
+    threshold_window Werte liegt. Das Tempo ergibt sich aus der Autokorrelation der
+    Hüllkurve, die Beat-Phase wird an erkannten Onsets nachgeführt.
+
+    Alle Zeiten sind in Sekunden der Audio-Uhr (Samplezähler / Samplerate), siehe
+    AudioCaptureService.stream_time.
+
+    :param bins: Anzahl der FFT-Bins pro Spektrum
+    :param rate: Samplerate in Hz
+    :param hop: Abstand der Analysefenster in Samples (fester STFT-Hop)
+    :param chunk: Fenstergröße in Samples, Onsets werden auf die Fenstermitte datiert
+    """
+
+    def __init__(self, bins, rate, hop, chunk=None, threshold=1.3, threshold_window=50,
+                 history_seconds=6.0, min_bpm=60, max_bpm=180):
+        self.rate = rate
+        self.hop = hop
+        self.frame_rate = rate / hop
+        self.delay = (chunk or 0) / 2 / rate
+        self.threshold = threshold
+        self.threshold_window = threshold_window
+        self.min_lag = max(int(self.frame_rate * 60 / max_bpm), 1)
+        self.max_lag = int(self.frame_rate * 60 / min_bpm)
+
+        self.bpm = 0.0
+        self.confidence = 0.0
+        self.next_beat_time = None
+        self.last_onset_time = None
+
+        self._current = np.zeros(bins)
+        self._previous = np.zeros(bins)
+        self._diff = np.zeros(bins)
+        self._envelope = np.zeros(max(int(history_seconds * self.frame_rate), 2 * self.max_lag + 1))
+        self._frame = None
+        self._frames_since_tempo = 0
+        self._anchor = None
+
+    @property
+    def period(self):
+        return 60.0 / self.bpm if self.bpm > 0 else None
+
+    def process(self, magnitudes, position):
+        """
+        Verarbeitet ein Betragsspektrum.
+
+        :param magnitudes: Betragsspektrum des Fensters
+        :param position: Samplezähler am Ende des Fensters (StreamingSTFT.position)
+        :return: True, wenn in diesem Fenster ein Onset erkannt wurde
+        """
+        np.log1p(magnitudes, out=self._current)
+        np.subtract(self._current, self._previous, out=self._diff)
+        np.maximum(self._diff, 0, out=self._diff)
+        flux = self._diff.sum()
+        self._current, self._previous = self._previous, self._current
+
+        # Hüllkurve im festen Hop-Raster; übersprungene Fenster zählen als 0
+        frame = position // self.hop
+        size = len(self._envelope)
+        if self._frame is not None:
+            gap = min(frame - self._frame, size)
+            for skipped in range(1, gap):
+                self._envelope[(self._frame + skipped) % size] = 0.0
+        self._frame = frame
+        index = frame % size
+        recent = np.take(self._envelope, range(index - self.threshold_window, index), mode="wrap")
+        self._envelope[index] = flux
+
+        now = position / self.rate - self.delay
+        onset = flux > self.threshold * recent.mean() and flux > 0
+        if onset and self.last_onset_time is not None and now - self.last_onset_time < 60.0 / 400:
+            onset = False  # Doppelauslösung innerhalb derselben Transiente
+        if onset:
+            self.last_onset_time = now
+            self._align_phase(now)
+
+        self._frames_since_tempo += 1
+        if self._frames_since_tempo >= self.frame_rate / 2:
+            self._frames_since_tempo = 0
+            self._estimate_tempo()
+        return onset
+
+    def _estimate_tempo(self):
+        size = len(self._envelope)
+        envelope = np.roll(self._envelope, -((self._frame + 1) % size))
+        envelope = envelope - envelope.mean()
+        spectrum = np.fft.rfft(envelope, n=2 * size)
+        autocorrelation = np.fft.irfft(spectrum * np.conj(spectrum))[:size]
+        if autocorrelation[0] <= 0:
+            self.confidence = 0.0
+            return
+
+        lags = autocorrelation[self.min_lag:self.max_lag + 1]
+        best = int(np.argmax(lags))
+        lag = float(self.min_lag + best)
+        # Parabolische Interpolation für Tempo zwischen zwei Lags
+        if 0 < best < len(lags) - 1:
+            left, center, right = lags[best - 1], lags[best], lags[best + 1]
+            denominator = left - 2 * center + right
+            if denominator != 0:
+                lag += 0.5 * (left - right) / denominator
+        self.bpm = 60.0 * self.frame_rate / lag
+        self.confidence = float(np.clip(lags[best] / autocorrelation[0], 0.0, 1.0))
+
+    def _align_phase(self, onset_time):
+        period = self.period
+        if period is None or self._anchor is None:
+            self._anchor = onset_time
+        else:
+            # Abweichung zum nächstgelegenen vorhergesagten Beat nachführen
+            error = (onset_time - self._anchor + period / 2) % period - period / 2
+            if abs(error) < 0.2 * period:
+                self._anchor += 0.3 * error
+            else:
+                self._anchor = onset_time
+        self._predict(onset_time)
+
+    def _predict(self, now):
+        period = self.period
+        if period is None or self._anchor is None:
+            self.next_beat_time = None
+            return
+        beats = np.floor((now - self._anchor) / period) + 1
+        self.next_beat_time = self._anchor + beats * period
+
+    def beat_due(self, now):
+        """
+        Liefert einmal pro vorhergesagtem Beat True, sobald `now` (Audio-Uhr) ihn erreicht hat.
+        """
+        if self.next_beat_time is None:
+            self._predict(now)
+            return False
+        if now < self.next_beat_time:
+            return False
+        self._predict(now)
+        return True
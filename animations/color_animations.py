@@ -1,9 +1,11 @@
-import time
 import logging
 import math
 import random
-from .animation_utils import run_generic_animation, set_all_pixels, set_all_pixels_rgbw, clear_strip, wheel_rgbw
-from rpi_ws281x import Color
+import numpy as np
+from .animation_utils import run_generic_animation, clear_strip, fade_color, pack_colors, wheel_colors
+from .loop_cache import run_cached_loop_animation
+from .live_parameters import NO_PARAMETERS
+from led_backend import Color
 from threading import Event
 
 logger = logging.getLogger("SK6812Animations")
@@ -11,109 +13,90 @@ logger = logging.getLogger("SK6812Animations")
 
 def run_rainbow_animation(strip, stop_event: Event):
     logger.info("Running rainbow animation")
-    run_colors = [
+    run_colors = np.array([
         (255, 0, 0),
         (0, 255, 0),
         (0, 0, 255),
         (255, 0, 0)
-    ]
+    ], dtype=np.float64)
     l = strip.numPixels()
     lc = len(run_colors) - 1
     bl = l / lc
+    positions = np.arange(l, dtype=np.float64)
 
-    def update_function(strip):
-        for startPos in range(l):
-            if stop_event.is_set():
-                return
-            for i in range(l):
-                relPos = (i - startPos) % bl
-                block = int((i - startPos) // bl % lc)
-                factors = (relPos * 1.0 / bl, (bl - relPos) * 1.0 / bl)
-
-                red = run_colors[block + 1][0] * factors[0] + run_colors[block][0] * factors[1]
-                green = run_colors[block + 1][1] * factors[0] + run_colors[block][1] * factors[1]
-                blue = run_colors[block + 1][2] * factors[0] + run_colors[block][2] * factors[1]
-
-                color = Color(int(red), int(green), int(blue))
-                strip.setPixelColor(i, color)
+    def render_frame(startPos, pixels):
+        offset = positions - startPos
+        relPos = offset % bl
+        block = (offset // bl % lc).astype(np.intp)
+        rgb = (run_colors[block + 1] * (relPos / bl)[:, None]
+               + run_colors[block] * ((bl - relPos) / bl)[:, None]).astype(np.uint32)
+        pixels[:] = pack_colors(rgb)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
+    # Eine Periode: jede Startposition ein Frame
+    run_cached_loop_animation(strip, stop_event, ("rainbow",), l, render_frame, update_speed=50)
 
 
 def run_blink_animation(strip, stop_event: Event):
     logger.info("Running blink animation")
+    on = False
 
-    def update_function(strip):
-        set_all_pixels(strip, Color(255, 255, 255))
-        time.sleep(0.5)
-        set_all_pixels(strip, Color(0, 0, 0))
-        time.sleep(0.5)
+    def update_function(frame):
+        nonlocal on
+        on = not on
+        frame.fill(Color(255, 255, 255) if on else Color(0, 0, 0))
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=500)
+    # Ein Frame an, ein Frame aus
+    run_generic_animation(strip, stop_event, update_function, update_speed=500, use_framebuffer=True)
 
 
-def run_color_wipe_animation(strip, stop_event: Event, color=Color(255, 0, 0)):
+def run_color_wipe_animation(strip, stop_event: Event, color=Color(255, 0, 0), speed=50, live_parameters=None):
     logger.info("Running color wipe animation")
     l = strip.numPixels()
+    step = 0
 
-    def update_function(strip):
-        for i in range(l):
-            if stop_event.is_set():
-                return
-            strip.setPixelColor(i, color)
-            strip.show()
-            time.sleep(0.05)
-        for i in range(l):
-            if stop_event.is_set():
-                return
-            strip.setPixelColor(i, Color(0, 0, 0))
-            strip.show()
-            time.sleep(0.05)
+    def update_function(frame, params=NO_PARAMETERS):
+        nonlocal step
+        # Erst einfärben, dann in derselben Richtung wieder löschen; ein Pixel pro Frame
+        if step < l:
+            frame.setPixelColor(step, color)
+        else:
+            frame.setPixelColor(step - l, Color(0, 0, 0))
+        step = (step + 1) % (2 * l)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
 
-def run_pulse_animation(strip, stop_event: Event, color=Color(255, 0, 0), wait_ms=50):
+def run_pulse_animation(strip, stop_event: Event, color=Color(255, 0, 0), wait_ms=50, live_parameters=None):
     logger.info("Running pulse animation")
+    # Helligkeitsstufen: hoch in 5er-Schritten, dann wieder herunter; eine Stufe pro Frame
+    levels = list(range(0, 256, 5)) + list(range(255, -1, -5))
+    step = 0
 
-    def update_function(strip):
-        for brightness in range(0, 256, 5):
-            if stop_event.is_set():
-                return
-            set_all_pixels(strip, Color(color.r * brightness // 255, color.g * brightness // 255, color.b * brightness // 255))
-            strip.show()
-            time.sleep(wait_ms / 1000.0)
-        for brightness in range(255, -1, -5):
-            if stop_event.is_set():
-                return
-            set_all_pixels(strip, Color(color.r * brightness // 255, color.g * brightness // 255, color.b * brightness // 255))
-            strip.show()
-            time.sleep(wait_ms / 1000.0)
+    def update_function(frame, params=NO_PARAMETERS):
+        nonlocal step
+        frame.fill(fade_color(color, levels[step]))
+        step = (step + 1) % len(levels)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=wait_ms)
+    run_generic_animation(strip, stop_event, update_function, update_speed=wait_ms, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
 
-def run_soft_white_pulse_animation(strip, stop_event: Event, red=255, green=0, blue=0, max_white=255, speed=50):
+def run_soft_white_pulse_animation(strip, stop_event: Event, red=255, green=0, blue=0, max_white=255, speed=50, live_parameters=None):
     logger.info("Running soft white pulse animation")
+    levels = list(range(0, max_white + 1, 5)) + list(range(max_white, -1, -5))
+    step = 0
 
-    def update_function(strip):
-        for white in range(0, max_white + 1, 5):
-            if stop_event.is_set():
-                return
-            set_all_pixels_rgbw(strip, red, green, blue, white)
-            strip.show()
-            time.sleep(speed / 1000.0)
-        for white in range(max_white, -1, -5):
-            if stop_event.is_set():
-                return
-            set_all_pixels_rgbw(strip, red, green, blue, white)
-            strip.show()
-            time.sleep(speed / 1000.0)
+    def update_function(frame, params=NO_PARAMETERS):
+        nonlocal step
+        frame.fill_rgbw(red, green, blue, levels[step])
+        step = (step + 1) % len(levels)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
 
-def run_warm_white_fade_animation(strip, stop_event: Event, speed=100):
+def run_warm_white_fade_animation(strip, stop_event: Event, speed=100, live_parameters=None):
     logger.info("Running warm white fade animation")
     colors = [
         (255, 0, 0),  # Rot
@@ -121,43 +104,39 @@ def run_warm_white_fade_animation(strip, stop_event: Event, speed=100):
         (0, 0, 255),  # Blau
         (255, 255, 0)  # Gelb
     ]
+    steps = []
+    for color in colors:
+        for white in list(range(0, 256, 5)) + list(range(255, -1, -5)):
+            steps.append(Color(color[0], color[1], color[2], white))
 
-    def update_function(strip):
-        for color in colors:
-            for white in range(0, 256, 5):
-                if stop_event.is_set():
-                    return
-                set_all_pixels_rgbw(strip, color[0], color[1], color[2], white)
-                strip.show()
-                time.sleep(speed / 1000.0)
-            for white in range(255, -1, -5):
-                if stop_event.is_set():
-                    return
-                set_all_pixels_rgbw(strip, color[0], color[1], color[2], white)
-                strip.show()
-                time.sleep(speed / 1000.0)
+    def render_frame(index, pixels):
+        pixels.fill(steps[index])
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
+    run_cached_loop_animation(strip, stop_event, ("warm_white_fade",), len(steps), render_frame, update_speed=speed,
+                              live_parameters=live_parameters)
 
 
 def run_rainbow_with_white_flash_animation(strip, stop_event: Event, flash_duration=0.2, rainbow_speed=50):
     logger.info("Running rainbow with white flash animation")
-
-    def update_function(strip):
-        for j in range(256):
-            if stop_event.is_set():
-                return
-            for i in range(strip.numPixels()):
-                color = wheel_rgbw((i + j) & 255)
-                strip.setPixelColorRGB(i, color[0], color[1], color[2], 0)
-            strip.show()
-            time.sleep(rainbow_speed / 1000.0)
-            if j % 10 == 0:
-                set_all_pixels_rgbw(strip, 0, 0, 0, 255)
-                strip.show()
-                time.sleep(flash_duration)
-                set_all_pixels_rgbw(strip, 0, 0, 0, 0)
-                strip.show()
-                time.sleep(flash_duration)
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=rainbow_speed)
+    l = strip.numPixels()
+    positions = np.arange(l)
+    white_frame, off_frame = 256, 257
+
+    def render_frame(index, pixels):
+        if index == white_frame:
+            pixels.fill(Color(0, 0, 0, 255))
+        elif index == off_frame:
+            pixels.fill(0)
+        else:
+            pixels[:] = wheel_colors(positions + index)
+
+    # Blitz und Pause dauern jeweils flash_duration, also mehrere Takte à rainbow_speed
+    flash_ticks = max(1, round(flash_duration * 1000 / rainbow_speed))
+    sequence = []
+    for j in range(256):
+        sequence.append(j)
+        if j % 10 == 0:
+            sequence += [white_frame] * flash_ticks + [off_frame] * flash_ticks
+
+    run_cached_loop_animation(strip, stop_event, ("rainbow_with_white_flash", flash_duration, rainbow_speed), 258,
+                              render_frame, update_speed=rainbow_speed, sequence=np.array(sequence, dtype=np.uint16))
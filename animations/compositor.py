@@ -0,0 +1,147 @@
+# compositor.py
+import logging
+import threading
+import numpy as np
+from .animation_utils import run_generic_animation
+from .transitions import LayerStrip
+from .motion_animations import run_fireplace_animation
+from .random_animations import run_random_glitter_animation
+
+logger = logging.getLogger("SK6812Animations")
+
+BLEND_ALPHA = "alpha"
+BLEND_ADD = "add"
+BLEND_MAX = "max"
+BLEND_MULTIPLY = "multiply"
+BLEND_MODES = (BLEND_ALPHA, BLEND_ADD, BLEND_MAX, BLEND_MULTIPLY)
+
+
+class CompositorLayer:
+    """
+    Eine Ebene des Compositors: die LayerStrip, in die eine Animation rendert, plus Mischmodus.
+
+    :param mode: "alpha" (überdecken), "add" (aufaddieren, bei 255 begrenzt), "max" (hellerer
+        Kanal gewinnt) oder "multiply" (abdunkeln)
+    :param opacity: Deckkraft 0.0 bis 1.0
+    :param segments: Optional Liste von (start, stop)-Bereichen, auf die die Ebene wirkt
+    """
+
+    def __init__(self, strip, mode=BLEND_ALPHA, opacity=1.0, segments=None):
+        if mode not in BLEND_MODES:
+            raise ValueError(f"Unknown blend mode: {mode} (available: {', '.join(BLEND_MODES)})")
+        self.strip = strip
+        self.mode = mode
+        self.opacity = opacity
+        self.mask = None
+        if segments:
+            self.mask = np.zeros((strip.numPixels(), 1), dtype=bool)
+            for start, stop in segments:
+                self.mask[start:stop] = True
+
+    @property
+    def channels(self):
+        """Kanäle des zuletzt mit show() veröffentlichten Frames der Ebene (nur unter dem Lock lesen)."""
+        return self.strip.shown_pixels.view(np.uint8).reshape(-1, 4)
+
+
+class Compositor:
+    """
+    Mischt die Frames mehrerer Ebenen vektorisiert zu einem Bild.
+
+    Gerechnet wird kanalweise in uint16 mit 8-Bit-Festkomma-Deckkraft; pro Ebene fallen nur
+    wenige Array-Operationen über den ganzen Streifen an, unabhängig von der Pixelzahl.
+    Ebenen werden in der Reihenfolge von add_layer() von unten nach oben gemischt.
+    """
+
+    def __init__(self, strip, lock=None):
+        self.strip = strip
+        self.lock = lock or threading.Lock()
+        self.layers = []
+        num_pixels = strip.numPixels()
+        self._work = np.zeros((num_pixels, 4), dtype=np.uint16)
+        self._blended = np.zeros((num_pixels, 4), dtype=np.uint16)
+        self._source = np.zeros((num_pixels, 4), dtype=np.uint16)
+
+    def add_layer(self, mode=BLEND_ALPHA, opacity=1.0, segments=None):
+        """Legt eine neue Ebene an und liefert sie; ihre `strip` wird der Animation übergeben."""
+        layer = CompositorLayer(LayerStrip(self.strip, self.lock, passthrough=False), mode, opacity, segments)
+        self.layers.append(layer)
+        return layer
+
+    def compose(self, channels):
+        """Mischt alle Ebenen und schreibt das Ergebnis in die Nx4 uint8-Sicht `channels`."""
+        work, blended, source = self._work, self._blended, self._source
+        work.fill(0)
+        for layer in self.layers:
+            weight = int(round(min(max(layer.opacity, 0.0), 1.0) * 256))
+            # Nur den mit show() veröffentlichten Frame lesen, während die Ebene weiterzeichnet
+            with self.lock:
+                np.copyto(source, layer.channels)
+            if layer.mode == BLEND_ALPHA:
+                np.multiply(work, 256 - weight, out=blended)
+                source *= weight
+                blended += source
+                blended >>= 8
+            elif layer.mode == BLEND_MULTIPLY:
+                # Produkt, mit der Deckkraft zwischen Original und Produkt gemischt
+                np.multiply(work, source, out=blended)
+                blended >>= 8
+                blended *= weight
+                np.multiply(work, 256 - weight, out=source)
+                blended += source
+                blended >>= 8
+            else:
+                if weight < 256:
+                    source *= weight
+                    source >>= 8
+                if layer.mode == BLEND_ADD:
+                    np.add(work, source, out=blended)
+                    np.minimum(blended, 255, out=blended)
+                else:
+                    np.maximum(work, source, out=blended)
+            if layer.mask is None:
+                work, blended = blended, work
+            else:
+                np.copyto(work, blended, where=layer.mask)
+        channels[:] = work
+        # Nach dem Tausch für den nächsten Aufruf wieder eigene Puffer verwenden
+        self._work, self._blended = work, blended
+
+
+def run_composition(strip, stop_event, layers, fps=50):
+    """
+    Lässt mehrere Animationen gleichzeitig laufen und zeigt ihre gemischten Frames an.
+
+    :param layers: Liste von dicts mit "animation" (Funktion), optional "mode", "opacity",
+        "segments" und "kwargs" für die Animation, von unten nach oben
+    :param fps: Bildrate des Compositors
+    """
+    logger.info(f"Running composition of {len(layers)} layers")
+    compositor = Compositor(strip)
+    layer_stop = threading.Event()
+    threads = []
+    for spec in layers:
+        layer = compositor.add_layer(spec.get("mode", BLEND_ALPHA), spec.get("opacity", 1.0), spec.get("segments"))
+        thread = threading.Thread(target=spec["animation"], args=(layer.strip, layer_stop),
+                                  kwargs=spec.get("kwargs", {}), name=f"layer-{len(threads)}", daemon=True)
+        threads.append(thread)
+        thread.start()
+
+    def update_function(frame):
+        compositor.compose(frame.channels)
+
+    try:
+        run_generic_animation(strip, stop_event, update_function, use_framebuffer=True, fps=fps)
+    finally:
+        layer_stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def run_fireplace_glitter_composition(strip, stop_event, glitter_probability=0.02, live_parameters=None):
+    """Kaminfeuer als Grundebene, darüber addiertes Glitzern."""
+    run_composition(strip, stop_event, [
+        {"animation": run_fireplace_animation},
+        {"animation": run_random_glitter_animation, "mode": BLEND_ADD, "opacity": 0.8,
+         "kwargs": {"glitter_probability": glitter_probability, "live_parameters": live_parameters}},
+    ])
@@ -0,0 +1,101 @@
+# frame_stats.py
+import time
+import logging
+from bisect import bisect_right
+import numpy as np
+
+PHASES = ("update", "pack", "show", "idle")
+
+# Histogramm-Grenzen in Sekunden, logarithmisch von 10 µs bis 1 s
+HISTOGRAM_EDGES = np.geomspace(10e-6, 1.0, 26).tolist()
+
+
+class FrameStats:
+    """
+    Zeitmessung pro Frame, aufgeteilt in die Phasen von run_generic_animation:
+
+    - update: update_function (bei Animationen, die selbst show()/sleep() aufrufen, inklusive)
+    - pack:   Kopieren des Framepuffers in den Streifen
+    - show:   strip.show(), also die Übertragung an die LEDs
+    - idle:   Warten auf die nächste Frame-Deadline
+
+    Die letzten `window` Frames liegen in Ringpuffern für Perzentile, die Histogramme zählen
+    alle Frames seit dem Start. Statt einer Logzeile pro Frame wird alle `log_interval`
+    Sekunden eine Zusammenfassung geloggt (0 schaltet das ab).
+    """
+
+    def __init__(self, name="animation", window=512, log_interval=10.0, clock=time.perf_counter):
+        self.name = name
+        self.window = window
+        self.log_interval = log_interval
+        self.clock = clock
+        self.frames = 0
+        self.missed_frames = 0
+        self.skipped_frames = 0
+        # Frames ohne Änderung, bei denen Übertragung und show() entfallen sind
+        self.unchanged_frames = 0
+        self.started = clock()
+        self._samples = {phase: np.zeros(window) for phase in PHASES}
+        self._histograms = {phase: [0] * (len(HISTOGRAM_EDGES) + 1) for phase in PHASES}
+        self._last_log = self.started
+        self._logger = logging.getLogger("GenericAnimation")
+
+    def record(self, update, pack, show, idle):
+        """Trägt die Phasendauern (Sekunden) eines Frames ein."""
+        index = self.frames % self.window
+        for phase, duration in zip(PHASES, (update, pack, show, idle)):
+            self._samples[phase][index] = duration
+            self._histograms[phase][bisect_right(HISTOGRAM_EDGES, duration)] += 1
+        self.frames += 1
+
+        if self.log_interval:
+            now = self.clock()
+            if now - self._last_log >= self.log_interval:
+                self._last_log = now
+                self._logger.info(self.summary())
+
+    def update_deadlines(self, scheduler):
+        self.missed_frames = scheduler.missed_deadlines
+        self.skipped_frames = scheduler.skipped_frames
+
+    def samples(self, phase):
+        """Die Dauern der letzten Frames (höchstens `window`) einer Phase in Sekunden."""
+        return self._samples[phase][:min(self.frames, self.window)]
+
+    def histogram(self, phase):
+        """(Obergrenzen in Sekunden, Anzahl Frames) — der letzte Eintrag zählt alles über 1 s."""
+        return HISTOGRAM_EDGES + [float("inf")], list(self._histograms[phase])
+
+    def percentiles(self, phase, q=(50, 95, 99)):
+        """Perzentile einer Phase über das rollende Fenster in Millisekunden."""
+        samples = self.samples(phase)
+        if len(samples) == 0:
+            return {p: 0.0 for p in q}
+        return dict(zip(q, (np.percentile(samples, q) * 1000).tolist()))
+
+    @property
+    def fps(self):
+        samples = [self.samples(phase) for phase in PHASES]
+        total = sum(s.sum() for s in samples)
+        return float(len(samples[0]) / total) if total > 0 else 0.0
+
+    def snapshot(self):
+        """Alle Kennzahlen als dict, z. B. für die Steuer-API."""
+        return {
+            "name": self.name,
+            "frames": self.frames,
+            "fps": self.fps,
+            "missed_frames": self.missed_frames,
+            "skipped_frames": self.skipped_frames,
+            "unchanged_frames": self.unchanged_frames,
+            "phases_ms": {phase: self.percentiles(phase) for phase in PHASES},
+        }
+
+    def summary(self):
+        parts = []
+        for phase in PHASES:
+            p = self.percentiles(phase)
+            parts.append(f"{phase} p50/p95/p99 {p[50]:.2f}/{p[95]:.2f}/{p[99]:.2f} ms")
+        return (f"{self.name}: {self.frames} frames, {self.fps:.1f} fps, {self.missed_frames} missed deadlines, "
+                f"{self.unchanged_frames} unchanged; "
+                + ", ".join(parts))
@@ -0,0 +1,75 @@
+# live_parameters.py
+import threading
+from collections.abc import Mapping
+
+
+class ParameterSnapshot(Mapping):
+    """
+    Unveränderlicher Stand der Animationsparameter mit Versionsnummer.
+
+    Werte sind per Schlüssel (snapshot["decay"]) oder Attribut (snapshot.decay) lesbar.
+    """
+
+    __slots__ = ("version", "_values")
+
+    def __init__(self, version, values):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "_values", dict(values))
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ParameterSnapshot is read-only")
+
+    def __repr__(self):
+        return f"ParameterSnapshot(version={self.version}, {self._values})"
+
+
+# Leerer Snapshot als Vorgabe für update_functions, die ohne LiveParameters laufen
+NO_PARAMETERS = ParameterSnapshot(0, {})
+
+
+class LiveParameters:
+    """
+    Austauschbarer Parametersatz für laufende Animationen.
+
+    publish() erzeugt einen neuen ParameterSnapshot und ersetzt den alten durch eine einzige
+    Referenzzuweisung. Der Render-Thread liest pro Frame `snapshot` ohne Lock und sieht damit
+    immer einen vollständigen, in sich stimmigen Stand; Änderungen wirken ab dem nächsten Frame.
+    Der Snapshot enthält nur veröffentlichte Werte; Animationen lesen mit
+    params.get(name, argument) und behalten so ihre eigenen Argumente für alles andere.
+    """
+
+    def __init__(self, values=None):
+        self._snapshot = ParameterSnapshot(0, values or {})
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def publish(self, **changes):
+        """Übernimmt `changes` in einen neuen Snapshot und liefert ihn zurück."""
+        with self._lock:
+            current = self._snapshot
+            values = dict(current)
+            values.update(changes)
+            self._snapshot = ParameterSnapshot(current.version + 1, values)
+            return self._snapshot
@@ -0,0 +1,146 @@
+# loop_cache.py
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from .animation_utils import run_generic_animation
+
+logger = logging.getLogger("SK6812Animations")
+
+
+class CachedLoop:
+    """
+    Eine vorgerenderte Periode einer Animation.
+
+    :param frames: uint32-Array (Anzahl Einzelbilder x Pixel) mit gepackten WRGB-Werten
+    :param sequence: Einzelbild-Index pro Takt; längere Standbilder belegen mehrere Takte
+    """
+
+    def __init__(self, frames, sequence):
+        self.frames = frames
+        self.sequence = sequence
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes + self.sequence.nbytes
+
+
+class LoopCache:
+    """
+    LRU-Cache für vorgerenderte Animationsperioden mit Speicherobergrenze.
+
+    Schlüssel enthalten Animationsname, Streifenlänge und Parameter. Passt ein neuer Eintrag
+    nicht mehr ins Budget, werden die am längsten nicht benutzten Einträge verworfen; Einträge,
+    die allein schon größer als das Budget sind, werden gar nicht erst gerendert.
+    """
+
+    def __init__(self, budget_bytes=64 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            loop = self._entries.get(key)
+            if loop is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return loop
+
+    def fits(self, nbytes):
+        return nbytes <= self.budget_bytes
+
+    def put(self, key, loop):
+        """Legt `loop` ab und verdrängt dafür alte Einträge. False, wenn er das Budget übersteigt."""
+        if not self.fits(loop.nbytes):
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.used_bytes -= old.nbytes
+            while self._entries and self.used_bytes + loop.nbytes > self.budget_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.used_bytes -= evicted.nbytes
+                self.evictions += 1
+            self._entries[key] = loop
+            self.used_bytes += loop.nbytes
+        return True
+
+    def resize(self, budget_bytes):
+        """Ändert das Budget und verdrängt bei Bedarf sofort."""
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            while self._entries and self.used_bytes > self.budget_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.used_bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Gemeinsamer Cache aller periodischen Animationen
+loop_cache = LoopCache()
+
+
+def configure_loop_cache(budget_mb):
+    """Setzt das Speicherbudget des gemeinsamen Loop-Caches in MB (0 schaltet ihn ab)."""
+    loop_cache.resize(int(budget_mb * 1024 * 1024))
+
+
+def run_cached_loop_animation(strip, stop_event, key, frame_count, render_frame, update_speed=50, sequence=None, cache=None, live_parameters=None):
+    """
+    Spielt eine deterministische, periodische Animation aus einer vorgerenderten Periode ab.
+
+    :param key: Cache-Schlüssel, muss alle Parameter enthalten, die das Bild beeinflussen
+    :param frame_count: Anzahl der Einzelbilder einer Periode
+    :param render_frame: Funktion render_frame(index, pixels), die Einzelbild `index` in das
+        uint32-Array `pixels` schreibt
+    :param update_speed: Dauer eines Taktes in Millisekunden
+    :param sequence: Einzelbild-Index pro Takt (Standard: jedes Einzelbild einen Takt)
+    :param cache: LoopCache, Standard ist der gemeinsame loop_cache
+    :param live_parameters: Optionale LiveParameters; ein geänderter "speed" wird zur neuen Taktdauer
+
+    Passt die Periode nicht ins Cache-Budget, werden die Einzelbilder live gerendert.
+    """
+    cache = loop_cache if cache is None else cache
+    num_pixels = strip.numPixels()
+    key = key + (num_pixels,)
+    if sequence is None:
+        sequence = np.arange(frame_count, dtype=np.uint16)
+
+    loop = cache.get(key)
+    if loop is None and cache.fits(frame_count * num_pixels * 4 + sequence.nbytes):
+        frames = np.empty((frame_count, num_pixels), dtype=np.uint32)
+        for index in range(frame_count):
+            render_frame(index, frames[index])
+        loop = CachedLoop(frames, sequence)
+        cache.put(key, loop)
+        logger.debug(f"Rendered loop {key[0]} with {frame_count} frames ({loop.nbytes / 1e6:.1f} MB)")
+    elif loop is None:
+        logger.debug(f"Loop {key[0]} exceeds the cache budget, rendering live")
+
+    tick = 0
+
+    def update_function(frame, params=None):
+        nonlocal tick
+        index = sequence[tick]
+        if loop is not None:
+            frame.pixels[:] = loop.frames[index]
+        else:
+            render_frame(index, frame.pixels)
+        tick = (tick + 1) % len(sequence)
+
+    run_generic_animation(strip, stop_event, update_function, update_speed=update_speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
@@ -2,8 +2,11 @@ import time
 import logging
 import math
 import random
-from .animation_utils import run_generic_animation, set_all_pixels, set_all_pixels_rgbw, clear_strip
-from rpi_ws281x import Color
+import numpy as np
+from .animation_utils import run_generic_animation, set_all_pixels, set_all_pixels_rgbw, clear_strip, fade_pixels, random_colors
+from .loop_cache import run_cached_loop_animation
+from .live_parameters import NO_PARAMETERS
+from led_backend import Color
 from threading import Event
 
 logger = logging.getLogger("SK6812Animations")
@@ -16,167 +19,119 @@ def run_fade_animation(strip, stop_event: Event):
         (0, 255, 0),  # Grün
         (0, 0, 255)   # Blau
     ]
+    steps = []
+    for color in colors:
+        # Von dunkel zu hell und zurück
+        for brightness in list(range(0, 256, 5)) + list(range(255, -1, -5)):
+            steps.append(Color(color[0] * brightness // 255, color[1] * brightness // 255, color[2] * brightness // 255))
 
-    def update_function(strip):
-        for color in colors:
-            for brightness in range(0, 256, 5):  # Von dunkel zu hell
-                if stop_event.is_set():
-                    return
-                set_all_pixels(strip, Color(color[0] * brightness // 255, color[1] * brightness // 255, color[2] * brightness // 255))
-                strip.show()
-                time.sleep(0.05)
-            for brightness in range(255, -1, -5):  # Von hell zu dunkel
-                if stop_event.is_set():
-                    return
-                set_all_pixels(strip, Color(color[0] * brightness // 255, color[1] * brightness // 255, color[2] * brightness // 255))
-                strip.show()
-                time.sleep(0.05)
+    def render_frame(index, pixels):
+        pixels.fill(steps[index])
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
+    run_cached_loop_animation(strip, stop_event, ("fade",), len(steps), render_frame, update_speed=50)
 
 
 def run_theater_chase_animation(strip, stop_event: Event, color=Color(127, 127, 127), wait_ms=50):
     logger.info("Running theater chase animation")
-    l = strip.numPixels()
 
-    def update_function(strip):
-        for q in range(3):
-            if stop_event.is_set():
-                return
-            for i in range(0, l, 3):
-                strip.setPixelColor(i + q, color)
-            strip.show()
-            time.sleep(wait_ms / 1000.0)
-            for i in range(0, l, 3):
-                strip.setPixelColor(i + q, 0)
+    def render_frame(q, pixels):
+        pixels.fill(0)
+        pixels[q::3] = color
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=wait_ms)
+    run_cached_loop_animation(strip, stop_event, ("theater_chase", color), 3, render_frame, update_speed=wait_ms)
 
 
-def run_twinkle_animation(strip, stop_event: Event):
+def run_twinkle_animation(strip, stop_event: Event, seed=None):
     logger.info("Running twinkle animation")
-    l = strip.numPixels()
+    rng = np.random.default_rng(seed)
+    lit_phase = False
 
-    def update_function(strip):
-        for i in range(l):
-            if stop_event.is_set():
-                return
+    def update_function(frame):
+        nonlocal lit_phase
+        lit_phase = not lit_phase
+        if lit_phase:
             # Zufällige Farbe für jeden Pixel
-            color = Color(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-            strip.setPixelColor(i, color)
-        strip.show()
-        time.sleep(0.05)
-        for i in range(l):
-            if stop_event.is_set():
-                return
-            if random.random() > 0.5:
-                strip.setPixelColor(i, Color(0, 0, 0))
-        strip.show()
-        time.sleep(0.05)
+            frame.pixels[:] = random_colors(rng, frame.numPixels(), white=False)
+        else:
+            # Etwa die Hälfte wieder ausschalten
+            frame.pixels[rng.random(frame.numPixels()) > 0.5] = 0
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
+    run_generic_animation(strip, stop_event, update_function, update_speed=50, use_framebuffer=True)
 
 
 def run_wave_animation(strip, stop_event: Event, wave_speed=0.1, color=Color(0, 0, 255)):
     logger.info("Running wave animation")
     l = strip.numPixels()
 
-    def update_function(strip):
-        for i in range(l):
-            if stop_event.is_set():
-                return
-            # Erzeugt eine Sinuswelle für die Farbintensität
-            intensity = int((math.sin(i * wave_speed) + 1) * 127)
-            strip.setPixelColor(i, Color(intensity, 0, 255 - intensity))
+    # Erzeugt eine Sinuswelle für die Farbintensität (einmalig, die Welle ist statisch)
+    intensity = ((np.sin(np.arange(l) * wave_speed) + 1) * 127).astype(np.uint32)
+    wave = (intensity << 16) | (255 - intensity)
+
+    def update_function(frame):
+        frame.pixels[:] = wave
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
+    run_generic_animation(strip, stop_event, update_function, update_speed=50, use_framebuffer=True)
 
 
-def run_meteor_animation(strip, stop_event: Event, meteor_size=10, decay=0.8):
+def run_meteor_animation(strip, stop_event: Event, meteor_size=10, decay=0.8, speed=50, live_parameters=None):
     logger.info("Running meteor animation")
     l = strip.numPixels()
+    start_pos = 0
+
+    def update_function(frame, params=NO_PARAMETERS):
+        nonlocal start_pos
+        size = params.get("meteor_size", meteor_size)
+        # Verblasse den Meteor aus dem vorherigen Frame
+        fade_pixels(frame, params.get("decay", decay))
+        # Erzeuge den Meteor
+        frame.pixels[start_pos:start_pos + size] = Color(255, 255, 255)
+        start_pos = (start_pos + 1) % l
+
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
-    def update_function(strip):
-        for start_pos in range(l):
-            if stop_event.is_set():
-                return
-            # Erzeuge den Meteor
-            for i in range(meteor_size):
-                if start_pos + i < l:
-                    strip.setPixelColor(start_pos + i, Color(255, 255, 255))
-            strip.show()
-            time.sleep(50 / 1000.0)
-            # Verblasse den Meteor
-            for i in range(l):
-                color = strip.getPixelColor(i)
-                r = int(((color >> 16) & 0xff) * decay)
-                g = int(((color >> 8) & 0xff) * decay)
-                b = int((color & 0xff) * decay)
-                strip.setPixelColor(i, Color(r, g, b))
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
-
-
-def run_larson_scanner_animation(strip, stop_event: Event, color=Color(255, 0, 0), tail_length=5, decay=0.6):
+
+def run_larson_scanner_animation(strip, stop_event: Event, color=Color(255, 0, 0), tail_length=5, decay=0.6, speed=50, live_parameters=None):
     logger.info("Running Larson Scanner animation")
     l = strip.numPixels()
-
-    def update_function(strip):
-        # Gehe vorwärts durch die LEDs
-        for i in range(l):
-            if stop_event.is_set():
-                return
-            strip.setPixelColor(i, color)
+    step = 0
+
+    def update_function(frame, params=NO_PARAMETERS):
+        nonlocal step
+        tail = params.get("tail_length", tail_length)
+        fade = params.get("decay", decay)
+        if step < l:
+            # Gehe vorwärts durch die LEDs
+            i = step
+            frame.setPixelColor(i, color)
             # Lasse die vorherigen LEDs verblassen, um einen "Schweif" zu erzeugen
-            for j in range(1, tail_length + 1):
-                if i - j >= 0:
-                    prev_color = strip.getPixelColor(i - j)
-                    r = int(((prev_color >> 16) & 0xff) * decay)
-                    g = int(((prev_color >> 8) & 0xff) * decay)
-                    b = int((prev_color & 0xff) * decay)
-                    strip.setPixelColor(i - j, Color(r, g, b))
-            strip.show()
-            time.sleep(0.05)
-        # Gehe rückwärts durch die LEDs
-        for i in range(l - 1, -1, -1):
-            if stop_event.is_set():
-                return
-            strip.setPixelColor(i, color)
-            for j in range(1, tail_length + 1):
-                if i + j < l:
-                    prev_color = strip.getPixelColor(i + j)
-                    r = int(((prev_color >> 16) & 0xff) * decay)
-                    g = int(((prev_color >> 8) & 0xff) * decay)
-                    b = int((prev_color & 0xff) * decay)
-                    strip.setPixelColor(i + j, Color(r, g, b))
-            strip.show()
-            time.sleep(0.05)
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
-
-
-def run_comet_animation(strip, stop_event: Event, color=Color(0, 0, 255), tail_length=10, decay=0.9):
+            fade_pixels(frame, fade, i - tail, i)
+        else:
+            # Gehe rückwärts durch die LEDs
+            i = 2 * l - 1 - step
+            frame.setPixelColor(i, color)
+            fade_pixels(frame, fade, i + 1, i + 1 + tail)
+        step = (step + 1) % (2 * l)
+
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
+
+
+def run_comet_animation(strip, stop_event: Event, color=Color(0, 0, 255), tail_length=10, decay=0.9, speed=50, live_parameters=None):
     logger.info("Running comet animation")
     l = strip.numPixels()
+    start_pos = 0
+
+    def update_function(frame, params=NO_PARAMETERS):
+        nonlocal start_pos
+        # Setze die Kometen-Lichtspitze
+        frame.setPixelColor(start_pos, color)
+        # Erzeuge den Kometen-Schweif, der langsam verblasst
+        fade_pixels(frame, params.get("decay", decay), start_pos - params.get("tail_length", tail_length), start_pos)
+        start_pos = (start_pos + 1) % l
 
-    def update_function(strip):
-        for start_pos in range(l):
-            if stop_event.is_set():
-                return
-            # Setze die Kometen-Lichtspitze
-            strip.setPixelColor(start_pos, color)
-            # Erzeuge den Kometen-Schweif, der langsam verblasst
-            for i in range(1, tail_length + 1):
-                if start_pos - i >= 0:
-                    tail_color = strip.getPixelColor(start_pos - i)
-                    r = int(((tail_color >> 16) & 0xff) * decay)
-                    g = int(((tail_color >> 8) & 0xff) * decay)
-                    b = int((tail_color & 0xff) * decay)
-                    strip.setPixelColor(start_pos - i, Color(r, g, b))
-            strip.show()
-            time.sleep(0.05)
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
 def run_bouncing_balls_animation(strip, stop_event: Event, num_balls=3, ball_colors=[Color(255, 0, 0), Color(0, 255, 0), Color(0, 0, 255)]):
     logger.info("Running bouncing balls animation")
@@ -185,70 +140,60 @@ def run_bouncing_balls_animation(strip, stop_event: Event, num_balls=3, ball_col
     positions = [0] * num_balls
     velocities = [random.uniform(0.2, 0.8) for _ in range(num_balls)]
 
-    def update_function(strip):
+    def update_function(frame):
         for i in range(num_balls):
             positions[i] += velocities[i]
             if positions[i] >= l - 1 or positions[i] <= 0:
                 velocities[i] *= -1
-        clear_strip(strip)
+        frame.clear()
         for i in range(num_balls):
-            strip.setPixelColor(int(positions[i]), ball_colors[i])
+            frame.setPixelColor(int(positions[i]), ball_colors[i])
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
+    run_generic_animation(strip, stop_event, update_function, update_speed=50, use_framebuffer=True)
 
 
 def run_white_comet_animation(strip, stop_event: Event, comet_size=5, comet_color=Color(0, 0, 255, 255), tail_decay=0.8):
     logger.info("Running white comet animation")
     l = strip.numPixels()
+    start_pos = 0
 
-    def update_function(strip):
-        for start_pos in range(l):
-            if stop_event.is_set():
-                return
-            strip.setPixelColorRGB(start_pos, 0, 0, 255, 255)
-            for i in range(1, comet_size + 1):
-                if start_pos - i >= 0:
-                    tail_color = strip.getPixelColor(start_pos - i)
-                    r = int(((tail_color >> 16) & 0xff) * tail_decay)
-                    g = int(((tail_color >> 8) & 0xff) * tail_decay)
-                    b = int((tail_color & 0xff) * tail_decay)
-                    w = int(((tail_color >> 24) & 0xff) * tail_decay)
-                    strip.setPixelColorRGB(start_pos - i, r, g, b, w)
-            strip.show()
-            time.sleep(50 / 1000.0)
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
-
-def run_fireplace_animation(strip, stop_event: Event):
-    logger.info("Running fireplace animation")
+    def update_function(frame):
+        nonlocal start_pos
+        frame.setPixelColorRGB(start_pos, 0, 0, 255, 255)
+        fade_pixels(frame, tail_decay, start_pos - comet_size, start_pos)
+        start_pos = (start_pos + 1) % l
 
-    def update_function(strip):
-        for i in range(strip.numPixels()):
-            if stop_event.is_set():
-                return
-            red = random.randint(200, 255)
-            green = random.randint(50, 150)
-            blue = random.randint(0, 50)
-            white = random.randint(0, 50)
-            strip.setPixelColorRGB(i, red, green, blue, white)
+    run_generic_animation(strip, stop_event, update_function, update_speed=50, use_framebuffer=True)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
+def run_fireplace_animation(strip, stop_event: Event, seed=None):
+    logger.info("Running fireplace animation")
+    rng = np.random.default_rng(seed)
+    # Wertebereiche je Kanal in der Reihenfolge von FrameBuffer.channels (B, G, R, W)
+    low = np.array([0, 50, 200, 0])
+    high = np.array([50, 150, 255, 50]) + 1
 
-def run_aurora_borealis_animation(strip, stop_event: Event, speed=100):
-    logger.info("Running aurora borealis animation")
-    colors = [
-        (0, 64, 255, 0),  # Blau
-        (0, 128, 0, 64),  # Grün
-        (128, 0, 255, 0),  # Violett
-        (0, 64, 128, 128)  # Mischung
-    ]
+    def update_function(frame):
+        frame.channels[:] = rng.integers(low, high, (frame.numPixels(), 4))
 
-    def update_function(strip):
-        for i in range(strip.numPixels()):
-            color = random.choice(colors)
-            strip.setPixelColorRGB(i, color[0], color[1], color[2], color[3])
-        strip.show()
-        time.sleep(speed / 1000.0)
+    run_generic_animation(strip, stop_event, update_function, update_speed=50, use_framebuffer=True)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
+def run_aurora_borealis_animation(strip, stop_event: Event, speed=100, live_parameters=None, seed=None):
+    logger.info("Running aurora borealis animation")
+    rng = np.random.default_rng(seed)
+    colors = np.array([
+        Color(0, 64, 255, 0),  # Blau
+        Color(0, 128, 0, 64),  # Grün
+        Color(128, 0, 255, 0),  # Violett
+        Color(0, 64, 128, 128)  # Mischung
+    ], dtype=np.uint32)
+
+    def update_function(frame, params=NO_PARAMETERS):
+        np.take(colors, rng.integers(0, len(colors), frame.numPixels()), out=frame.pixels)
+
+    def period(params):
+        # Bisher hielt jedes Bild speed ms plus speed ms Pause, die Bilddauer bleibt gleich
+        return 2 * params["speed"] if "speed" in params else None
+
+    run_generic_animation(strip, stop_event, update_function, update_speed=period({"speed": speed}), use_framebuffer=True,
+                          params=live_parameters, period_param=period)
 
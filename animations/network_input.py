@@ -0,0 +1,296 @@
+# network_input.py
+import time
+import socket
+import struct
+import logging
+import numpy as np
+from .animation_utils import run_generic_animation
+
+logger = logging.getLogger("SK6812Animations")
+
+E131_PORT = 5568
+ARTNET_PORT = 6454
+
+# E1.31 (ANSI E1.31-2018): Root-, Framing- und DMP-Layer mit festen Offsets
+E131_ACN_ID = b"ASC-E1.17\x00\x00\x00"
+E131_ROOT_VECTOR_DATA = 0x00000004
+E131_FRAMING_VECTOR_DATA = 0x00000002
+E131_DMP_VECTOR = 0x02
+E131_OPTION_TERMINATED = 0x40
+E131_OPTION_PREVIEW = 0x80
+E131_HEADER_SIZE = 126
+
+# Art-Net 4: ArtDmx
+ARTNET_ID = b"Art-Net\x00"
+ARTNET_OP_DMX = 0x5000
+ARTNET_HEADER_SIZE = 18
+
+DMX_UNIVERSE_SIZE = 512
+# Reihenfolge der DMX-Kanäle pro Pixel (R, G, B, W) als Spalten der FrameBuffer.channels-Sicht (B, G, R, W)
+CHANNEL_COLUMNS = [2, 1, 0, 3]
+
+
+class DmxReceiver:
+    """
+    Empfängt E1.31 (sACN) und Art-Net per UDP und schreibt die DMX-Daten direkt in den Framepuffer.
+
+    Jedes Universum belegt `universe_pixels` aufeinanderfolgende Pixel, beginnend mit
+    `start_universe` (E1.31) bzw. `artnet_start_universe` am Streifenanfang. Die Protokolle
+    zählen unterschiedlich: E1.31 beginnt bei Universum 1 (0 ist reserviert), Art-Net bei 0
+    (Net 0, Subnet 0, Universe 0). Ein Pixel besteht aus `channels_per_pixel` Kanälen
+    (R, G, B und bei 4 zusätzlich W). Pakete werden in einen festen Puffer empfangen und über
+    memoryview bzw. np.frombuffer ausgewertet, ohne sie zu kopieren.
+
+    Veraltete Pakete (Sequenznummer innerhalb der letzten 20, wie in E1.31 beschrieben) werden
+    verworfen. Synchronisationspakete werden nicht ausgewertet; jedes Universum wird sofort
+    übernommen und mit dem nächsten Frame angezeigt.
+
+    :param num_pixels: Anzahl LEDs
+    :param protocols: "e131", "artnet" oder beide
+    :param multicast: E1.31-Multicastgruppen der benötigten Universen abonnieren
+    """
+
+    def __init__(self, num_pixels, protocols=("e131", "artnet"), start_universe=1, channels_per_pixel=4,
+                 universe_pixels=None, bind_address="", multicast=True, artnet_start_universe=0):
+        if isinstance(protocols, str):
+            protocols = (protocols,)
+        if channels_per_pixel not in (3, 4):
+            raise ValueError("channels_per_pixel must be 3 (RGB) or 4 (RGBW)")
+        self.num_pixels = num_pixels
+        self.start_universe = start_universe
+        self.artnet_start_universe = artnet_start_universe
+        self.channels_per_pixel = channels_per_pixel
+        self.universe_pixels = universe_pixels or DMX_UNIVERSE_SIZE // channels_per_pixel
+        self.universe_count = -(-num_pixels // self.universe_pixels)
+        self.columns = CHANNEL_COLUMNS[:channels_per_pixel]
+
+        self.packets = 0
+        self.out_of_order = 0
+        self.ignored = 0
+        self.last_packet_time = None
+
+        self._buffer = bytearray(1500)
+        self._view = memoryview(self._buffer)
+        self._sequences = {}
+        self._sockets = []
+        for protocol in protocols:
+            if protocol == "e131":
+                sock = self._open_socket(bind_address, E131_PORT)
+                if multicast:
+                    self._join_multicast(sock)
+                self._sockets.append((sock, self._handle_e131))
+            elif protocol == "artnet":
+                self._sockets.append((self._open_socket(bind_address, ARTNET_PORT), self._handle_artnet))
+            else:
+                self.close()
+                raise ValueError(f"Unknown network protocol: {protocol}")
+
+    @staticmethod
+    def _open_socket(bind_address, port):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((bind_address, port))
+        sock.setblocking(False)
+        return sock
+
+    def _join_multicast(self, sock):
+        for universe in range(self.start_universe, self.start_universe + self.universe_count):
+            group = socket.inet_aton(f"239.255.{universe >> 8}.{universe & 0xFF}")
+            try:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, group + socket.inet_aton("0.0.0.0"))
+            except OSError as e:
+                logger.warning(f"Could not join sACN multicast group for universe {universe}: {e}")
+                return
+
+    @property
+    def ports(self):
+        return [sock.getsockname()[1] for sock, _ in self._sockets]
+
+    def poll(self, channels):
+        """
+        Verarbeitet alle anstehenden Pakete, ohne zu blockieren.
+
+        :param channels: Nx4 uint8-Sicht des Framepuffers (FrameBuffer.channels)
+        :return: Anzahl der geschriebenen Universen
+        """
+        written = 0
+        for sock, handle in self._sockets:
+            while True:
+                try:
+                    size = sock.recv_into(self._buffer)
+                except (BlockingIOError, InterruptedError):
+                    break
+                if handle(self._view[:size], channels):
+                    written += 1
+        if written:
+            self.last_packet_time = time.monotonic()
+        return written
+
+    def _handle_e131(self, packet, channels):
+        if (len(packet) < E131_HEADER_SIZE or packet[4:16] != E131_ACN_ID
+                or struct.unpack_from(">I", packet, 18)[0] != E131_ROOT_VECTOR_DATA
+                or struct.unpack_from(">I", packet, 40)[0] != E131_FRAMING_VECTOR_DATA
+                or packet[117] != E131_DMP_VECTOR or packet[125] != 0):
+            self.ignored += 1
+            return False
+        sequence, options, universe = struct.unpack_from(">BBH", packet, 111)
+        if options & E131_OPTION_PREVIEW or not self._accept(("e131", universe), sequence):
+            return False
+        if options & E131_OPTION_TERMINATED:
+            return self._clear_universe(universe, channels)
+        count = struct.unpack_from(">H", packet, 123)[0] - 1
+        return self._write_universe(self._pixel_range(universe, self.start_universe), packet, E131_HEADER_SIZE, min(count, len(packet) - E131_HEADER_SIZE), channels)
+
+    def _handle_artnet(self, packet, channels):
+        if (len(packet) < ARTNET_HEADER_SIZE or packet[:8] != ARTNET_ID
+                or struct.unpack_from("<H", packet, 8)[0] != ARTNET_OP_DMX):
+            self.ignored += 1
+            return False
+        sequence = packet[12]
+        universe = struct.unpack_from("<H", packet, 14)[0] & 0x7FFF
+        # Sequenznummer 0 heißt bei Art-Net: keine Reihenfolgeprüfung
+        if sequence and not self._accept(("artnet", universe), sequence):
+            return False
+        count = struct.unpack_from(">H", packet, 16)[0]
+        return self._write_universe(self._pixel_range(universe, self.artnet_start_universe), packet, ARTNET_HEADER_SIZE, min(count, len(packet) - ARTNET_HEADER_SIZE), channels)
+
+    def _accept(self, key, sequence):
+        last = self._sequences.get(key)
+        if last is not None:
+            difference = (sequence - last) & 0xFF
+            if difference >= 128:
+                difference -= 256
+            if -20 < difference <= 0:
+                self.out_of_order += 1
+                return False
+        self._sequences[key] = sequence
+        return True
+
+    def _pixel_range(self, universe, start_universe):
+        index = universe - start_universe
+        if not 0 <= index < self.universe_count:
+            return None
+        start = index * self.universe_pixels
+        return start, min(start + self.universe_pixels, self.num_pixels)
+
+    def _write_universe(self, span, packet, offset, length, channels):
+        if span is None:
+            self.ignored += 1
+            return False
+        start, stop = span
+        count = min(length // self.channels_per_pixel, stop - start)
+        data = np.frombuffer(packet, dtype=np.uint8, count=count * self.channels_per_pixel, offset=offset)
+        channels[start:start + count, self.columns] = data.reshape(count, self.channels_per_pixel)
+        self.packets += 1
+        return True
+
+    def _clear_universe(self, universe, channels):
+        span = self._pixel_range(universe, self.start_universe)
+        if span is None:
+            return False
+        channels[span[0]:span[1]] = 0
+        self._sequences.pop(("e131", universe), None)
+        return True
+
+    def close(self):
+        for sock, _ in self._sockets:
+            sock.close()
+        self._sockets = []
+
+
+def run_network_input(strip, stop_event, protocols=("e131", "artnet"), start_universe=1, channels_per_pixel=4,
+                      universe_pixels=None, multicast=True, max_fps=100, loss_timeout=2.5, artnet_start_universe=0,
+                      **kwargs):
+    """
+    Macht den Pi zum Pixel-Node für ein Lichtpult: empfängt E1.31/Art-Net und zeigt die Daten an.
+
+    Pro Frame (höchstens max_fps) werden alle eingegangenen Pakete in den Framepuffer
+    übernommen; unveränderte Frames werden nicht übertragen. Kommt `loss_timeout` Sekunden
+    lang kein Paket, wird der Streifen dunkel geschaltet (0 hält den letzten Stand).
+    `start_universe` gilt für E1.31, `artnet_start_universe` für Art-Net (siehe DmxReceiver).
+    """
+    receiver = DmxReceiver(strip.numPixels(), protocols, start_universe, channels_per_pixel, universe_pixels,
+                           multicast=multicast, artnet_start_universe=artnet_start_universe)
+    last = receiver.universe_count - 1
+    logger.info(f"Listening for DMX on UDP ports {receiver.ports}, universes {start_universe}-{start_universe + last} "
+                f"(E1.31) / {artnet_start_universe}-{artnet_start_universe + last} (Art-Net)")
+
+    def update_function(frame):
+        if receiver.poll(frame.channels):
+            return
+        last = receiver.last_packet_time
+        if loss_timeout and last is not None and time.monotonic() - last > loss_timeout:
+            logger.info("DMX source lost, blanking strip")
+            frame.clear()
+            receiver.last_packet_time = None
+
+    try:
+        run_generic_animation(strip, stop_event, update_function, use_framebuffer=True, fps=max_fps)
+    finally:
+        logger.info(f"DMX receiver: {receiver.packets} packets, {receiver.out_of_order} out of order, "
+                    f"{receiver.ignored} ignored")
+        receiver.close()
+
+
+def build_e131_packet(universe, data, sequence=0, source_name="SK6812", priority=100, options=0):
+    """Baut ein E1.31-Datenpaket, z. B. für Tests über Loopback."""
+    data = bytes(data)
+    length = len(data) + 1
+    packet = bytearray(E131_HEADER_SIZE + len(data))
+    struct.pack_into(">HH12s", packet, 0, 0x0010, 0, E131_ACN_ID)
+    struct.pack_into(">HI16s", packet, 16, 0x7000 | (len(packet) - 16), E131_ROOT_VECTOR_DATA, b"\x00" * 16)
+    struct.pack_into(">HI64sBHBBH", packet, 38, 0x7000 | (len(packet) - 38), E131_FRAMING_VECTOR_DATA,
+                     source_name.encode()[:63], priority, 0, sequence & 0xFF, options, universe)
+    struct.pack_into(">HBBHHHB", packet, 115, 0x7000 | (len(packet) - 115), E131_DMP_VECTOR, 0xA1, 0, 1, length, 0)
+    packet[E131_HEADER_SIZE:] = data
+    return packet
+
+
+def build_artnet_packet(universe, data, sequence=0):
+    """Baut ein ArtDmx-Paket, z. B. für Tests über Loopback."""
+    data = bytes(data)
+    if len(data) % 2:
+        data += b"\x00"
+    return ARTNET_ID + struct.pack("<HBBBBH", ARTNET_OP_DMX, 0, 14, sequence & 0xFF, 0, universe & 0x7FFF) \
+        + struct.pack(">H", len(data)) + data
+
+
+def main():
+    """Sendet ein Lauflicht per Loopback an einen laufenden Empfänger."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sendet ein Test-Lauflicht per E1.31 oder Art-Net.")
+    parser.add_argument("--protocol", choices=("e131", "artnet"), default="e131")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--pixels", type=int, default=144)
+    parser.add_argument("--channels", type=int, choices=(3, 4), default=4)
+    parser.add_argument("--start-universe", type=int, default=None, help="Standard: 1 bei E1.31, 0 bei Art-Net")
+    parser.add_argument("--fps", type=float, default=44.0)
+    args = parser.parse_args()
+
+    universe_pixels = DMX_UNIVERSE_SIZE // args.channels
+    if args.start_universe is None:
+        args.start_universe = 1 if args.protocol == "e131" else 0
+    port = E131_PORT if args.protocol == "e131" else ARTNET_PORT
+    build = build_e131_packet if args.protocol == "e131" else build_artnet_packet
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    frame = np.zeros((args.pixels, args.channels), dtype=np.uint8)
+    sequence = 0
+    try:
+        while True:
+            position = sequence % args.pixels
+            frame[:] = 0
+            frame[position] = 255
+            sequence += 1
+            for index, start in enumerate(range(0, args.pixels, universe_pixels)):
+                data = frame[start:start + universe_pixels].tobytes()
+                sock.sendto(build(args.start_universe + index, data, sequence), (args.host, port))
+            time.sleep(1.0 / args.fps)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,251 +1,270 @@
-import time
 import logging
 import math
-import random
-from .animation_utils import run_generic_animation, set_all_pixels, set_all_pixels_rgbw, clear_strip
-from rpi_ws281x import Color
+import numpy as np
+from .animation_utils import run_generic_animation, set_all_pixels, fade_pixels, fade_color, random_colors, random_sparkles
+from .live_parameters import NO_PARAMETERS
+from led_backend import Color
 from threading import Event
 
 logger = logging.getLogger("SK6812Animations")
 
+# Alle Animationen ziehen ihre Zufallswerte aus einem eigenen numpy.random.Generator.
+# Mit `seed` sind Läufe reproduzierbar (Tests, Benchmarks), ohne ihn zufällig wie bisher.
 
-def run_firework_animation(strip, stop_event: Event):
+
+def run_firework_animation(strip, stop_event: Event, seed=None):
     logger.info("Running firework animation")
+    rng = np.random.default_rng(seed)
     l = strip.numPixels()
-
-    def update_function(strip):
-        firework_pos = random.randint(0, l - 1)
-        color = Color(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-        for i in range(firework_pos - 3, firework_pos + 4):
-            if 0 <= i < l:
-                strip.setPixelColor(i, color)
-        strip.show()
-        for brightness in range(255, 0, -5):
-            for i in range(firework_pos - 3, firework_pos + 4):
-                if 0 <= i < l:
-                    strip.setPixelColor(i, Color(
-                        (color >> 16) * brightness // 255,
-                        ((color >> 8) & 0xff) * brightness // 255,
-                        (color & 0xff) * brightness // 255
-                    ))
-            strip.show()
-            time.sleep(0.05)
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=random.uniform(500, 2000))
-
-
-def run_cool_white_twinkle_animation(strip, stop_event: Event, twinkle_speed=100):
+    # Ein Frame alle 50 ms: Aufleuchten, Verglühen in Schritten von 5, danach 0,5-2 s Pause
+    pause_frames = 0
+    burst = None  # (Bereich, Farbe, Helligkeit) des aktuellen Feuerwerks
+
+    def update_function(frame):
+        nonlocal pause_frames, burst
+        if burst is None:
+            if pause_frames > 0:
+                pause_frames -= 1
+                return
+            firework_pos = int(rng.integers(0, l))
+            burst = (slice(max(firework_pos - 3, 0), firework_pos + 4),
+                     int(random_colors(rng, 1, white=False)[0]), 255)
+        pixels, color, brightness = burst
+        frame.pixels[pixels] = fade_color(color, brightness)
+        if brightness > 5:
+            burst = (pixels, color, brightness - 5)
+        else:
+            burst = None
+            pause_frames = round(rng.uniform(500, 2000) / 50)
+
+    run_generic_animation(strip, stop_event, update_function, update_speed=50, use_framebuffer=True)
+
+
+def run_cool_white_twinkle_animation(strip, stop_event: Event, twinkle_speed=100, seed=None):
     logger.info("Running cool white twinkle animation")
+    rng = np.random.default_rng(seed)
 
-    def update_function(strip):
-        for i in range(strip.numPixels()):
-            if random.random() > 0.5:
-                color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-                strip.setPixelColorRGB(i, color[0], color[1], color[2], color[3])
-            else:
-                strip.setPixelColorRGB(i, 0, 0, 0, 0)
-        strip.show()
+    def update_function(frame):
+        random_sparkles(rng, frame.pixels, 0.5)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=twinkle_speed)
+    run_generic_animation(strip, stop_event, update_function, update_speed=twinkle_speed, use_framebuffer=True)
 
 
-def run_lightning_storm_animation(strip, stop_event: Event, flash_duration=0.1):
+def run_lightning_storm_animation(strip, stop_event: Event, flash_duration=0.1, seed=None):
     logger.info("Running lightning storm animation")
+    rng = np.random.default_rng(seed)
+    flash_frames = max(1, round(flash_duration * 1000 / 50))
+    flash_left = 0
 
-    def update_function(strip):
-        for i in range(strip.numPixels()):
-            strip.setPixelColorRGB(i, 0, 0, 50, 0)
-        if random.random() < 0.05:
-            for i in range(strip.numPixels()):
-                strip.setPixelColorRGB(i, 255, 255, 255, 255)
-            strip.show()
-            time.sleep(flash_duration)
-        strip.show()
+    def update_function(frame):
+        nonlocal flash_left
+        if flash_left == 0 and rng.random() < 0.05:
+            flash_left = flash_frames
+        if flash_left:
+            # Blitz für flash_duration, danach wieder Nachthimmel
+            frame.fill_rgbw(255, 255, 255, 255)
+            flash_left -= 1
+        else:
+            frame.fill_rgbw(0, 0, 50, 0)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=50)
+    run_generic_animation(strip, stop_event, update_function, update_speed=50, use_framebuffer=True)
 
 
 def run_strobe_effect(strip, stop_event: Event, strobe_duration=0.1, off_duration=0.1):
     logger.info("Running strobe effect")
+    # Takt von 10 ms; an- und ausgeschaltet wird nach der jeweiligen Anzahl Takte
+    on_ticks = max(1, round(strobe_duration * 100))
+    off_ticks = max(1, round(off_duration * 100))
+    tick = 0
 
-    def update_function(strip):
-        set_all_pixels_rgbw(strip, 255, 255, 255, 255)
-        strip.show()
-        time.sleep(strobe_duration)
-        clear_strip(strip)
-        strip.show()
-        time.sleep(off_duration)
+    def update_function(frame):
+        nonlocal tick
+        if tick == 0:
+            frame.fill_rgbw(255, 255, 255, 255)
+        elif tick == on_ticks:
+            frame.clear()
+        tick = (tick + 1) % (on_ticks + off_ticks)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=strobe_duration + off_duration)
+    run_generic_animation(strip, stop_event, update_function, update_speed=10, use_framebuffer=True)
 
 
-def run_holiday_twinkle_animation(strip, stop_event: Event, speed=150):
+def run_holiday_twinkle_animation(strip, stop_event: Event, speed=150, live_parameters=None, seed=None):
     logger.info("Running holiday twinkle animation")
-    colors = [(255, 0, 0, 0), (0, 255, 0, 0), (0, 0, 0, 255)]
+    rng = np.random.default_rng(seed)
+    colors = np.array([Color(255, 0, 0, 0), Color(0, 255, 0, 0), Color(0, 0, 0, 255)], dtype=np.uint32)
 
-    def update_function(strip):
-        for i in range(strip.numPixels()):
-            color = random.choice(colors)
-            strip.setPixelColorRGB(i, color[0], color[1], color[2], color[3])
-        strip.show()
+    def update_function(frame, params=NO_PARAMETERS):
+        np.take(colors, rng.integers(0, len(colors), frame.numPixels()), out=frame.pixels)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
 
-def run_random_sparkles_animation(strip, stop_event: Event, speed=50):
+def run_random_sparkles_animation(strip, stop_event: Event, speed=50, live_parameters=None, seed=None):
     logger.info("Running random sparkles animation")
+    rng = np.random.default_rng(seed)
 
-    def update_function(strip):
-        for i in range(strip.numPixels()):
-            if random.random() < 0.05:
-                red = random.randint(0, 255)
-                green = random.randint(0, 255)
-                blue = random.randint(0, 255)
-                white = random.randint(0, 255)
-                strip.setPixelColorRGB(i, red, green, blue, white)
-            else:
-                strip.setPixelColorRGB(i, 0, 0, 0, 0)
-        strip.show()
+    def update_function(frame, params=NO_PARAMETERS):
+        random_sparkles(rng, frame.pixels, 0.05)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
 
-def run_random_meteor_shower_animation(strip, stop_event: Event, meteor_size=10, decay=0.8, speed=50):
+def run_random_meteor_shower_animation(strip, stop_event: Event, meteor_size=10, decay=0.8, speed=50, live_parameters=None, seed=None):
     logger.info("Running random meteor shower animation")
+    rng = np.random.default_rng(seed)
+
+    def update_function(frame, params=NO_PARAMETERS):
+        size = params.get("meteor_size", meteor_size)
+        # Erst die Meteore der vorherigen Frames verblassen, dann den neuen in voller Helligkeit zeichnen
+        fade_pixels(frame, params.get("decay", decay))
+        start_pos = int(rng.integers(0, max(frame.numPixels() - size, 0) + 1))
+        frame.pixels[start_pos:start_pos + size] = random_colors(rng, 1)[0]
+
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
-    def update_function(strip):
-        start_pos = random.randint(0, strip.numPixels() - meteor_size)
-        color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-        for i in range(meteor_size):
-            if start_pos + i < strip.numPixels():
-                strip.setPixelColorRGB(start_pos + i, color[0], color[1], color[2], color[3])
-        strip.show()
-        for i in range(strip.numPixels()):
-            prev_color = strip.getPixelColor(i)
-            r = int(((prev_color >> 16) & 0xff) * decay)
-            g = int(((prev_color >> 8) & 0xff) * decay)
-            b = int((prev_color & 0xff) * decay)
-            w = int(((prev_color >> 24) & 0xff) * decay)
-            strip.setPixelColorRGB(i, r, g, b, w)
-        strip.show()
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
-
-
-def run_random_white_strobes_animation(strip, stop_event: Event, flash_duration=0.1, speed=50):
+
+def run_random_white_strobes_animation(strip, stop_event: Event, flash_duration=0.1, speed=50, live_parameters=None, seed=None):
     logger.info("Running random white strobes animation")
+    rng = np.random.default_rng(seed)
+
+    def update_function(frame, params=NO_PARAMETERS):
+        random_sparkles(rng, frame.pixels, 0.05, Color(255, 255, 255, 255))
 
-    def update_function(strip):
-        for i in range(strip.numPixels()):
-            if random.random() < 0.05:
-                strip.setPixelColorRGB(i, 255, 255, 255, 255)
-            else:
-                strip.setPixelColorRGB(i, 0, 0, 0, 0)
-        strip.show()
-        time.sleep(flash_duration)
+    def period(params):
+        # Jedes Muster bleibt flash_duration plus speed stehen
+        return params["speed"] + flash_duration * 1000 if "speed" in params else None
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
+    run_generic_animation(strip, stop_event, update_function, update_speed=period({"speed": speed}), use_framebuffer=True,
+                          params=live_parameters, period_param=period)
 
 
-def run_random_color_shifts_animation(strip, stop_event: Event, speed=100):
+def run_random_color_shifts_animation(strip, stop_event: Event, speed=100, live_parameters=None, seed=None):
     logger.info("Running random color shifts animation")
+    rng = np.random.default_rng(seed)
 
-    def update_function(strip):
-        for i in range(strip.numPixels()):
-            red = random.randint(0, 255)
-            green = random.randint(0, 255)
-            blue = random.randint(0, 255)
-            white = random.randint(0, 255)
-            strip.setPixelColorRGB(i, red, green, blue, white)
-        strip.show()
+    def update_function(frame, params=NO_PARAMETERS):
+        frame.pixels[:] = random_colors(rng, frame.numPixels())
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
 
-def run_random_walk_animation(strip, stop_event: Event, speed=100):
+def run_random_walk_animation(strip, stop_event: Event, speed=100, live_parameters=None, seed=None):
     logger.info("Running random walk animation")
-    position = random.randint(0, strip.numPixels() - 1)
+    rng = np.random.default_rng(seed)
+    position = int(rng.integers(0, strip.numPixels()))
 
-    def update_function(strip):
+    def update_function(frame, params=NO_PARAMETERS):
         nonlocal position
-        position += random.choice([-1, 1])
-        if position < 0:
-            position = strip.numPixels() - 1
-        elif position >= strip.numPixels():
-            position = 0
-        red = random.randint(0, 255)
-        green = random.randint(0, 255)
-        blue = random.randint(0, 255)
-        white = random.randint(0, 255)
-        strip.setPixelColorRGB(position, red, green, blue, white)
-        strip.show()
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
-
-def run_random_glitter_animation(strip, stop_event: Event, glitter_probability=0.1, speed=50):
-    logger.info("Running random glitter animation")
+        position = (position + (1 if rng.random() < 0.5 else -1)) % frame.numPixels()
+        # Nur ein Pixel ändert sich, es wird auch nur dieses übertragen
+        frame.set_pixels(position, random_colors(rng, 1)[0])
 
-    def update_function(strip):
-        for i in range(strip.numPixels()):
-            if random.random() < glitter_probability:
-                red = random.randint(0, 255)
-                green = random.randint(0, 255)
-                blue = random.randint(0, 255)
-                white = random.randint(0, 255)
-                strip.setPixelColorRGB(i, red, green, blue, white)
-            else:
-                strip.setPixelColorRGB(i, 0, 0, 0, 0)
-        strip.show()
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
-
-def run_comet_rain_animation(strip, stop_event: Event, comet_size=3, speed=100):
-    logger.info("Running comet rain animation")
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
-    def update_function(strip):
-        clear_strip(strip)
-        num_comets = random.randint(3, 6)  # Anzahl der gleichzeitig fallenden Kometen
-        for _ in range(num_comets):
-            start_pos = random.randint(0, strip.numPixels() - comet_size)
-            color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-            for i in range(comet_size):
-                if start_pos + i < strip.numPixels():
-                    strip.setPixelColorRGB(start_pos + i, color[0], color[1], color[2], color[3])
-        strip.show()
+def run_random_glitter_animation(strip, stop_event: Event, glitter_probability=0.1, speed=50, live_parameters=None, seed=None):
+    logger.info("Running random glitter animation")
+    rng = np.random.default_rng(seed)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
+    def update_function(frame, params=NO_PARAMETERS):
+        random_sparkles(rng, frame.pixels, params.get("glitter_probability", glitter_probability))
 
-def run_pixel_explosion_animation(strip, stop_event: Event, explosion_probability=0.05, speed=100):
-    logger.info("Running pixel explosion animation")
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
-    def update_function(strip):
-        if random.random() < explosion_probability:
-            center = random.randint(0, strip.numPixels() - 1)
-            color = (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-            for radius in range(1, strip.numPixels() // 2):
-                if stop_event.is_set():
-                    break
-                for offset in [-radius, radius]:
-                    if 0 <= center + offset < strip.numPixels():
-                        strip.setPixelColorRGB(center + offset, color[0], color[1], color[2], color[3])
-                strip.show()
-                time.sleep(0.02)  # Kurze Pause zwischen den "Wellen"
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
-
-def run_lava_explosion_animation(strip, stop_event: Event, speed=100):
+def run_comet_rain_animation(strip, stop_event: Event, comet_size=3, speed=100, live_parameters=None, seed=None):
+    logger.info("Running comet rain animation")
+    rng = np.random.default_rng(seed)
+    offsets = np.arange(comet_size)
+
+    def update_function(frame, params=NO_PARAMETERS):
+        l = frame.numPixels()
+        num_comets = int(rng.integers(3, 7))  # Anzahl der gleichzeitig fallenden Kometen
+        starts = rng.integers(0, max(l - comet_size, 0) + 1, num_comets)
+        positions = (starts[:, None] + offsets).ravel()
+        colors = np.repeat(random_colors(rng, num_comets), comet_size)
+        inside = positions < l
+        frame.clear()
+        frame.pixels[positions[inside]] = colors[inside]
+
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
+
+class _Explosion:
+    """
+    Zustand einer Explosion, die sich Frame für Frame von `center` aus nach beiden Seiten ausbreitet.
+    Vor und nach jeder Explosion wird `pause_frames` Frames gewartet.
+    """
+
+    def __init__(self):
+        self.center = None
+        self.color = 0
+        self.radius = 0
+        self.pause_frames = 0
+
+    @property
+    def active(self):
+        return self.center is not None
+
+    def start(self, center, color):
+        self.center, self.color, self.radius = center, color, 1
+
+    def step(self, frame, pause_frames):
+        """Zeichnet die nächste Welle; liefert False, wenn die Explosion zu Ende ist."""
+        l = frame.numPixels()
+        if self.radius >= l // 2:
+            self.center = None
+            self.pause_frames = pause_frames
+            return False
+        for position in (self.center - self.radius, self.center + self.radius):
+            if 0 <= position < l:
+                frame.pixels[position] = self.color
+        self.radius += 1
+        return True
+
+
+def run_pixel_explosion_animation(strip, stop_event: Event, explosion_probability=0.05, speed=100, live_parameters=None, seed=None):
+    logger.info("Running pixel explosion animation")
+    rng = np.random.default_rng(seed)
+    # Wellen im Abstand von 20 ms, gewürfelt wird alle `speed` ms
+    wave_ms = 20
+    explosion = _Explosion()
+
+    def update_function(frame, params=NO_PARAMETERS):
+        if explosion.active and explosion.step(frame, max(1, round(params.get("speed", speed) / wave_ms))):
+            return
+        if explosion.pause_frames > 0:
+            explosion.pause_frames -= 1
+            return
+        if rng.random() < explosion_probability:
+            explosion.start(int(rng.integers(0, frame.numPixels())), random_colors(rng, 1)[0])
+            explosion.step(frame, 0)
+        else:
+            explosion.pause_frames = max(1, round(params.get("speed", speed) / wave_ms)) - 1
+
+    run_generic_animation(strip, stop_event, update_function, update_speed=wave_ms, use_framebuffer=True,
+                          params=live_parameters)
+
+def run_lava_explosion_animation(strip, stop_event: Event, speed=100, live_parameters=None, seed=None):
     logger.info("Running lava explosion animation")
-
-    def update_function(strip):
-        center = random.randint(0, strip.numPixels() - 1)
-        color = (255, random.randint(50, 150), 0, random.randint(0, 100))  # Lavafarben
-        for radius in range(1, strip.numPixels() // 2):
-            if stop_event.is_set():
-                break
-            for offset in [-radius, radius]:
-                if 0 <= center + offset < strip.numPixels():
-                    strip.setPixelColorRGB(center + offset, color[0], color[1], color[2], color[3])
-            strip.show()
-            time.sleep(0.05)  # Kurze Pause zwischen den "Wellen"
-
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
\ No newline at end of file
+    rng = np.random.default_rng(seed)
+    # Wellen im Abstand von 50 ms, nach jeder Explosion `speed` ms Pause
+    wave_ms = 50
+    explosion = _Explosion()
+
+    def update_function(frame, params=NO_PARAMETERS):
+        if explosion.active and explosion.step(frame, max(1, round(params.get("speed", speed) / wave_ms))):
+            return
+        if explosion.pause_frames > 0:
+            explosion.pause_frames -= 1
+            return
+        color = Color(255, int(rng.integers(50, 151)), 0, int(rng.integers(0, 101)))  # Lavafarben
+        explosion.start(int(rng.integers(0, frame.numPixels())), color)
+        explosion.step(frame, 0)
+
+    run_generic_animation(strip, stop_event, update_function, update_speed=wave_ms, use_framebuffer=True,
+                          params=live_parameters)
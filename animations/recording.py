@@ -0,0 +1,369 @@
+# recording.py
+import mmap
+import struct
+import logging
+import threading
+import time
+from array import array
+import numpy as np
+from .animation_utils import run_generic_animation, _bulk_writer
+
+logger = logging.getLogger("SK6812Animations")
+
+# Dateiformat (Little Endian):
+#   Header:  Magic "SKLS", Version, Headergröße, LED-Anzahl, Streifentyp, FPS, Frameanzahl, Offset des Index
+#   Frames:  je ein Record aus Typ (1 Byte, 3 Byte Padding) und Anzahl (uint32), dann uint32-Arrays
+#            KEYFRAME: RLE, <anzahl> Lauflängen und <anzahl> Farben
+#            DELTA:    <anzahl> geänderte Bereiche als Startindex und Länge, dann alle neuen Pixelwerte
+#   Index:   uint64-Dateioffset jedes Frames
+# Alle Records sind Vielfache von 4 Byte, die Arrays lassen sich daher direkt aus der Datei abbilden.
+MAGIC = b"SKLS"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIfIQ")
+RECORD = struct.Struct("<BxxxI")
+KEYFRAME = 0
+DELTA = 1
+
+
+class LightShowRecorder:
+    """
+    Schreibt Frames (uint32-Arrays mit gepackten WRGB-Werten) in eine Lightshow-Datei.
+
+    Jeder Frame wird als Differenz zum vorherigen gespeichert, alle `keyframe_interval` Frames
+    (Standard: alle 2 Sekunden) und immer dann, wenn es kleiner ist, als lauflängenkodierter
+    Vollframe. Keyframes sind die Einstiegspunkte für seek().
+
+    :param path: Zieldatei
+    :param num_pixels: Anzahl LEDs
+    :param fps: Bildrate der Aufzeichnung
+    :param strip_type: Streifentyp (ws.*), nur zur Information für die Wiedergabe
+    """
+
+    def __init__(self, path, num_pixels, fps=50.0, strip_type=0, keyframe_interval=None):
+        self.path = path
+        self.num_pixels = num_pixels
+        self.fps = fps
+        self.strip_type = strip_type or 0
+        self.keyframe_interval = keyframe_interval or max(int(fps * 2), 1)
+        self.frame_count = 0
+        self._file = open(path, "wb")
+        self._file.write(self._header(0))
+        self._offsets = array("Q")
+        self._previous = np.zeros(num_pixels, dtype=np.uint32)
+        self._start_time = None
+        self._lock = threading.Lock()
+
+    def _header(self, index_offset):
+        return HEADER.pack(MAGIC, VERSION, HEADER.size, self.num_pixels, self.strip_type, self.fps,
+                           self.frame_count, index_offset)
+
+    def write_frame(self, pixels):
+        """Hängt `pixels` als nächsten Frame an."""
+        pixels = np.asarray(pixels, dtype=np.uint32)
+        self._offsets.append(self._file.tell())
+
+        runs = np.flatnonzero(pixels[1:] != pixels[:-1]) + 1
+        run_starts = np.concatenate(([0], runs))
+        key_size = 8 * len(run_starts)
+
+        changed = np.flatnonzero(pixels != self._previous)
+        breaks = np.flatnonzero(np.diff(changed) != 1) + 1
+        delta_size = 8 * (len(breaks) + 1) + 4 * len(changed)
+        if self.frame_count % self.keyframe_interval and delta_size < key_size:
+            if len(changed):
+                span_starts = changed[np.concatenate(([0], breaks))]
+                span_ends = changed[np.concatenate((breaks - 1, [-1]))] + 1
+            else:
+                span_starts = span_ends = changed
+            self._file.write(RECORD.pack(DELTA, len(span_starts)))
+            self._file.write(span_starts.astype(np.uint32).tobytes())
+            self._file.write((span_ends - span_starts).astype(np.uint32).tobytes())
+            self._file.write(pixels[changed].tobytes())
+        else:
+            counts = np.diff(np.concatenate((run_starts, [len(pixels)])))
+            self._file.write(RECORD.pack(KEYFRAME, len(run_starts)))
+            self._file.write(counts.astype(np.uint32).tobytes())
+            self._file.write(pixels[run_starts].tobytes())
+
+        self._previous[:] = pixels
+        self.frame_count += 1
+
+    def capture(self, pixels, timestamp=None):
+        """
+        Zeichnet `pixels` zum Zeitpunkt `timestamp` (Sekunden, Standard: jetzt) im festen Raster
+        von `fps` auf. Lücken, z. B. weil unveränderte Frames nicht angezeigt wurden, werden mit
+        dem vorherigen Frame aufgefüllt; mehrere Frames im selben Rasterplatz zählen als einer.
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            timestamp = time.perf_counter() if timestamp is None else timestamp
+            if self._start_time is None:
+                self._start_time = timestamp
+            slot = int(round((timestamp - self._start_time) * self.fps))
+            while self.frame_count < slot:
+                self.write_frame(self._previous)
+            if self.frame_count == slot:
+                self.write_frame(pixels)
+
+    def close(self):
+        """Schreibt den Frame-Index und vervollständigt den Header."""
+        with self._lock:
+            if self._file.closed:
+                return
+            index_offset = self._file.tell()
+            self._file.write(self._offsets.tobytes())
+            self._file.seek(0)
+            self._file.write(self._header(index_offset))
+            self._file.close()
+            logger.info(f"Recorded {self.frame_count} frames ({self.frame_count / self.fps:.1f} s) to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordingStrip:
+    """
+    Hülle um einen LED-Streifen, die bei jedem show() den aktuellen Stand aufzeichnet.
+
+    Alle Schreibzugriffe werden in einem eigenen Pixelspiegel nachgeführt und an den Streifen
+    weitergereicht, dadurch funktioniert die Aufzeichnung mit Framebuffer- und klassischen
+    Animationen gleichermaßen. Solange `paused` gesetzt ist, wird nichts aufgezeichnet.
+    """
+
+    def __init__(self, strip, recorder):
+        self.strip = strip
+        self.recorder = recorder
+        self.paused = False
+        self.pixels = np.zeros(strip.numPixels(), dtype=np.uint32)
+        self._write = _bulk_writer(strip)
+
+    def __getattr__(self, name):
+        return getattr(self.strip, name)
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def setPixelColor(self, n, color):
+        self.pixels[n] = color
+        self.strip.setPixelColor(n, color)
+
+    def setPixelColorRGB(self, n, red, green, blue, white=0):
+        self.pixels[n] = (white << 24) | (red << 16) | (green << 8) | blue
+        self.strip.setPixelColorRGB(n, red, green, blue, white)
+
+    def getPixelColor(self, n):
+        return int(self.pixels[n])
+
+    def set_pixels(self, pixels, start=0):
+        n = min(len(pixels), len(self.pixels) - start)
+        self.pixels[start:start + n] = pixels[:n]
+        self._write(self.pixels, np.arange(start, start + n))
+
+    def show(self):
+        self.strip.show()
+        if not self.paused:
+            self.recorder.capture(self.pixels)
+
+
+class LightShow:
+    """
+    Liest eine Lightshow-Datei über mmap; Frames werden direkt aus der abgebildeten Datei
+    in `pixels` dekodiert, ohne sie vorher zu kopieren.
+
+    read() liefert den nächsten Frame, seek() springt über den vorangehenden Keyframe zu einem
+    beliebigen Frame. Wurde eine Aufzeichnung nicht sauber beendet, wird der Index beim Öffnen
+    aus den Frame-Records rekonstruiert.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_size, self.num_pixels, self.strip_type, self.fps, frame_count, index_offset = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a light show file (version {VERSION})")
+        if index_offset:
+            self._index = np.frombuffer(self._map, dtype=np.uint64, count=frame_count, offset=index_offset).copy()
+        else:
+            self._index = self._scan(header_size)
+            logger.warning(f"{path} was not closed properly, recovered {len(self._index)} frames")
+        self.pixels = np.zeros(self.num_pixels, dtype=np.uint32)
+        self.position = 0
+        self._decoded = -1
+
+    def _scan(self, offset):
+        offsets = []
+        end = len(self._map)
+        while offset + RECORD.size <= end:
+            kind, count = RECORD.unpack_from(self._map, offset)
+            if kind == KEYFRAME:
+                size = RECORD.size + 8 * count
+            else:
+                lengths = np.frombuffer(self._map, dtype=np.uint32, count=count, offset=offset + RECORD.size + 4 * count)
+                size = RECORD.size + 8 * count + 4 * int(lengths.sum())
+            if offset + size > end:
+                break
+            offsets.append(offset)
+            offset += size
+        return np.array(offsets, dtype=np.uint64)
+
+    @property
+    def frame_count(self):
+        return len(self._index)
+
+    @property
+    def duration(self):
+        return self.frame_count / self.fps if self.fps else 0.0
+
+    def _is_keyframe(self, frame):
+        return self._map[int(self._index[frame])] == KEYFRAME
+
+    def _apply(self, frame):
+        offset = int(self._index[frame])
+        kind, count = RECORD.unpack_from(self._map, offset)
+        offset += RECORD.size
+        first = np.frombuffer(self._map, dtype=np.uint32, count=count, offset=offset)
+        second = np.frombuffer(self._map, dtype=np.uint32, count=count, offset=offset + 4 * count)
+        if kind == KEYFRAME:
+            self.pixels[:] = np.repeat(second, first)
+        elif count:
+            # Bereiche (Start, Länge) in Pixelindizes aufspannen
+            lengths = second.astype(np.int64)
+            total = int(lengths.sum())
+            values = np.frombuffer(self._map, dtype=np.uint32, count=total, offset=offset + 8 * count)
+            span_offsets = np.cumsum(lengths) - lengths
+            indices = np.arange(total) + np.repeat(first - span_offsets, lengths)
+            self.pixels[indices] = values
+        self._decoded = frame
+
+    def seek(self, frame):
+        """Der nächste read() liefert Frame `frame`."""
+        self.position = min(max(int(frame), 0), self.frame_count)
+
+    def seek_time(self, seconds):
+        self.seek(seconds * self.fps)
+
+    def read(self):
+        """Dekodiert den nächsten Frame und liefert `pixels`, am Ende None."""
+        frame = self.position
+        if frame >= self.frame_count:
+            return None
+        if frame != self._decoded + 1 and not self._is_keyframe(frame):
+            key = frame
+            while key > 0 and not self._is_keyframe(key):
+                key -= 1
+            for previous in range(key, frame):
+                self._apply(previous)
+        self._apply(frame)
+        self.position = frame + 1
+        return self.pixels
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_light_show_playback(strip, stop_event, path="recording.skls", loop=True, start_seconds=0.0, playback_rate=1.0):
+    """
+    Spielt eine aufgezeichnete Lightshow mit ihrer Bildrate (mal `playback_rate`) ab.
+
+    Pro Frame werden nur die gespeicherten Änderungen in den Framepuffer übernommen. Mit loop=False
+    endet die Animation nach dem letzten Frame.
+    """
+    logger.info(f"Playing light show {path}")
+    with LightShow(path) as show:
+        if show.frame_count == 0:
+            logger.warning(f"{path} contains no frames")
+            return
+        if show.num_pixels != strip.numPixels():
+            logger.warning(f"{path} was recorded for {show.num_pixels} LEDs, strip has {strip.numPixels()}")
+        n = min(show.num_pixels, strip.numPixels())
+        show.seek_time(start_seconds)
+
+        def update_function(frame):
+            pixels = show.read()
+            if pixels is None:
+                if not loop:
+                    stop_event.set()
+                    return
+                show.seek(0)
+                pixels = show.read()
+            frame.pixels[:n] = pixels[:n]
+
+        run_generic_animation(strip, stop_event, update_function, use_framebuffer=True, fps=show.fps * playback_rate)
+
+
+# Menünummern ab hier sind Musik-Animationen und brauchen ein Audio-Eingabegerät
+MUSIC_KEY_START = 50
+# Wiedergabe und Netzwerkeingang zeigen nur Frames von außen, die Aufzeichnung wäre eine Kopie
+NOT_RECORDABLE = ("run_light_show_playback", "run_network_input")
+
+
+def record_animation(animation_function, path, num_pixels, seconds, fps=50.0, strip_type=0, **kwargs):
+    """
+    Lässt eine Animation `seconds` Sekunden lang auf einem VirtualStrip laufen und zeichnet sie
+    auf, z. B. um aufwendige Effekte vorab auf einem schnelleren Rechner zu rendern.
+    """
+    from led_backend import VirtualStrip
+
+    stop_event = threading.Event()
+    with LightShowRecorder(path, num_pixels, fps, strip_type) as recorder:
+        strip = RecordingStrip(VirtualStrip(num_pixels, strip_type=strip_type), recorder)
+
+        def finish():
+            # Das abschließende Löschen des Streifens nicht mit aufzeichnen
+            strip.paused = True
+            stop_event.set()
+
+        timer = threading.Timer(seconds, finish)
+        timer.start()
+        try:
+            animation_function(strip, stop_event, **kwargs)
+        finally:
+            timer.cancel()
+    return recorder.frame_count
+
+
+def main():
+    import argparse
+    from registry import animations
+    from settings import AnimationSettings
+
+    parser = argparse.ArgumentParser(description="Rendert eine Animation ohne LED-Hardware in eine Lightshow-Datei.")
+    parser.add_argument("animation", help="Nummer der Animation aus dem Menü")
+    parser.add_argument("path", help="Zieldatei, z. B. show.skls")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--pixels", type=int, default=144)
+    parser.add_argument("--fps", type=float, default=50.0)
+    args = parser.parse_args()
+
+    if args.animation not in animations:
+        parser.error(f"unknown animation: {args.animation}")
+    entry = animations.entry(args.animation)
+    if entry.function_name in NOT_RECORDABLE:
+        parser.error(f"animation {args.animation} ({entry.display_name}) cannot be recorded")
+
+    # Vorgaben der Animationseinstellungen wie im Menü; die Registry filtert, was die Animation annimmt
+    kwargs = entry.bind_kwargs(AnimationSettings().to_kwargs())
+    if int(args.animation) >= MUSIC_KEY_START:
+        kwargs["selected_audio_device"] = None  # Standard-Eingabegerät
+
+    logging.basicConfig(level=logging.INFO)
+    frames = record_animation(entry.load(), args.path, args.pixels, args.seconds, fps=args.fps, **kwargs)
+    print(f"{frames} frames written to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# scheduler.py
+import time
+
+LATE_SKIP = "skip"
+LATE_CATCH_UP = "catch_up"
+
+
+class FrameScheduler:
+    """
+    Taktet Frames auf absolute Deadlines statt "rendern, dann schlafen".
+
+    Die Deadlines liegen fest im Raster start + n * period, die Render- und show()-Zeit
+    wird also von der Wartezeit abgezogen und die Bildrate driftet nicht mit der Last.
+    Kommt ein Frame zu spät, entscheidet late_policy:
+
+    - "skip": verpasste Slots werden übersprungen, es geht mit der nächsten Deadline
+      in der Zukunft weiter (konstante Bildrate, einzelne Frames fallen aus)
+    - "catch_up": verpasste Slots werden ohne Wartezeit nachgeholt, höchstens
+      max_catch_up Frames, danach wird das Raster neu aufgesetzt
+    """
+
+    def __init__(self, period, late_policy=LATE_SKIP, max_catch_up=5, clock=time.perf_counter):
+        if late_policy not in (LATE_SKIP, LATE_CATCH_UP):
+            raise ValueError(f"Unknown late policy: {late_policy}")
+        self.period = max(period, 0.0)
+        self.late_policy = late_policy
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.frames = 0
+        self.missed_deadlines = 0
+        self.skipped_frames = 0
+        self._deadline = None
+
+    @classmethod
+    def from_fps(cls, fps, **kwargs):
+        return cls(1.0 / fps, **kwargs)
+
+    @property
+    def fps(self):
+        return 1.0 / self.period if self.period > 0 else float("inf")
+
+    def start(self):
+        """Setzt das Raster neu auf, die erste Deadline liegt eine Periode in der Zukunft."""
+        self._deadline = self.clock() + self.period
+
+    def wait(self, stop_event=None):
+        """
+        Wartet bis zur nächsten Deadline.
+
+        :param stop_event: Optionales threading.Event, das das Warten vorzeitig beendet
+        :return: False, wenn stop_event während des Wartens gesetzt wurde, sonst True
+        """
+        if self._deadline is None:
+            self.start()
+
+        self.frames += 1
+        delay = self._deadline - self.clock()
+        if delay > 0:
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    return False
+            else:
+                time.sleep(delay)
+            self._deadline += self.period
+            return True
+
+        # Deadline verpasst
+        self.missed_deadlines += 1
+        if self.period == 0:
+            self._deadline = self.clock()
+            return True
+        overdue = int(-delay // self.period)
+        if self.late_policy == LATE_SKIP:
+            self.skipped_frames += overdue
+            self._deadline += (overdue + 1) * self.period
+        elif overdue >= self.max_catch_up:
+            # Zu weit hinten, nachholen lohnt sich nicht mehr
+            self.skipped_frames += overdue
+            self._deadline = self.clock() + self.period
+        else:
+            self._deadline += self.period
+        return stop_event is None or not stop_event.is_set()
@@ -2,199 +2,141 @@
 import time
 import logging
 import numpy as np
-import pyaudio
 from collections import deque
-from .animation_utils import run_generic_animation
-from rpi_ws281x import Color
+from .animation_utils import run_generic_animation, fade_color, pack_colors
+from .audio_capture import get_audio_capture
+from .spectral import SpectralPlan, StreamingSTFT
+from .beat_tracking import BeatTracker
+from .tracing import tracer, BEAT
+from .live_parameters import NO_PARAMETERS
+from led_backend import Color
 from threading import Event
 
-def run_music_synchronized_wave(strip, stop_event: Event, selected_audio_device, speed=10, chunk=2048, rate=44100, max_window_size=10, scaling="exponential", **kwargs):
+
+def _device_index(selected_audio_device):
+    """PyAudio-Index des gewählten Geräts; None (Standard-Eingabegerät), wenn keins gewählt ist."""
+    return selected_audio_device['index'] if selected_audio_device else None
+
+
+def run_music_synchronized_wave(strip, stop_event: Event, selected_audio_device, speed=10, chunk=2048, rate=44100, max_window_size=10, scaling="exponential", stft_hop=None, live_parameters=None, **kwargs):
     logger = logging.getLogger("SK6812Animations")
     logger.info("Running music synchronized wave animation")
 
-    # Setup PyAudio for capturing microphone input
-    p = pyaudio.PyAudio()
-    input_device_index = selected_audio_device['index'] if selected_audio_device else None
+    # Gemeinsamen Audio-Capture-Dienst verwenden (bleibt zwischen Musik-Animationen geöffnet)
+    input_device_index = _device_index(selected_audio_device)
     # logger.debug(f"Audio device:[{selected_audio_device['index']}]: {selected_audio_device['name']}")
 
-    stream = p.open(format=pyaudio.paInt16,
-                    channels=1,
-                    rate=rate,
-                    input=True,
-                    input_device_index=input_device_index,
-                    frames_per_buffer=chunk)
-    
-    if stream.is_active():
-        logger.info("Audio stream successfully initialized.")
-    else:
-        logger.error("Audio stream initialization failed.")
+    capture = get_audio_capture(input_device_index, rate)
 
     # Ringpuffer für das "Windowed Maximum"
     max_values_window = deque(maxlen=max_window_size)
 
-    def update_function(strip):
+    # Analyseplan und Puffer einmalig anlegen
+    l = strip.numPixels()
+    plan = SpectralPlan(chunk, rate, l, scaling)
+    # stft_hop: Abstand der überlappenden Analysefenster in Samples (None = neuestes Fenster je Frame)
+    stft = StreamingSTFT(capture.ring, plan, hop=stft_hop)
+
+    # Farbkanal je LED: tiefe Frequenzen rot, mittlere grün, hohe blau (Bitposition im WRGB-Wert)
+    channel_shifts = np.zeros(l, dtype=np.uint32)
+    channel_shifts[:l // 3] = 16
+    channel_shifts[l // 3:2 * l // 3] = 8
+
+    def update_function(frame, params=NO_PARAMETERS):
         try:
-            # Read data from microphone
-            data = np.frombuffer(stream.read(chunk, exception_on_overflow=False), dtype=np.int16)
-            fft_data = np.abs(np.fft.rfft(data))
-
-            # Skalierung der Frequenzbins
-            if scaling == "logarithmic":
-                # Logarithmische Skalierung der Frequenzbins
-                log_indices = np.logspace(0, np.log10(len(fft_data)), num=strip.numPixels(), base=10, dtype=int)
-                log_indices = np.clip(log_indices, 0, len(fft_data) - 1)  # Ensure indices are within bounds
-                fft_data = fft_data[log_indices]
-            elif scaling == "exponential":
-                # Exponentielle Skalierung der Frequenzbins
-                exp_indices = np.unique(np.round(np.geomspace(1, len(fft_data), num=strip.numPixels())).astype(int))
-                exp_indices = np.clip(exp_indices, 0, len(fft_data) - 1)  # Ensure indices are within bounds
-                fft_data = fft_data[exp_indices]
-            else:
-                # Lineare Skalierung (Standard)
-                fft_data = fft_data[:strip.numPixels()]
+            # Nächstes Audiofenster analysieren, ohne auf das Gerät zu warten
+            if not stft.update():
+                return
 
-            # Falls die Anzahl der FFT-Werte nicht mit der Anzahl der LEDs übereinstimmt, passe sie an
-            if len(fft_data) < strip.numPixels():
-                fft_data = np.pad(fft_data, (0, strip.numPixels() - len(fft_data)), 'constant')
-            elif len(fft_data) > strip.numPixels():
-                fft_data = fft_data[:strip.numPixels()]
+            # Skalierung der Frequenzbins über die vorberechnete LED-Zuordnung
+            fft_data = plan.led_bands()
 
             # Berechnung des aktuellen Maximums und Aktualisierung des Ringpuffers
-            current_max_fft = np.max(fft_data) if np.max(fft_data) > 0 else 1
-            max_values_window.append(current_max_fft)
+            current_max_fft = fft_data.max()
+            max_values_window.append(current_max_fft if current_max_fft > 0 else 1)
 
             # Verwende das größte Maximum aus dem Fenster für die Normalisierung
             window_max_fft = max(max_values_window)
 
             # Normalize FFT data to fit LED strip
-            normalized_data = (fft_data / window_max_fft) * 255
+            intensities = plan.normalize(window_max_fft)
 
             # Set colors based on frequency range
-            for i in range(strip.numPixels()):
-                intensity = int(normalized_data[i])
-                if i < strip.numPixels() // 3:
-                    # Low frequencies - Red
-                    strip.setPixelColorRGB(i, intensity, 0, 0, 0)
-                elif i < 2 * strip.numPixels() // 3:
-                    # Mid frequencies - Green
-                    strip.setPixelColorRGB(i, 0, intensity, 0, 0)
-                else:
-                    # High frequencies - Blue
-                    strip.setPixelColorRGB(i, 0, 0, intensity, 0)
-            strip.show()
-
-        except IOError as e:
-            logger.warning(f"Audio input overflowed: {e}")
+            np.left_shift(intensities, channel_shifts, out=frame.pixels)
+
         except Exception as e:
             logger.error(f"Error in update_function: {e}", exc_info=True)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
-
-    # Cleanup PyAudio
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
-def run_frequency_bands_gradient(strip, stop_event: Event, selected_audio_device, speed=10, chunk=2048, rate=44100, max_window_size=10, scaling="logarithmic", **kwargs):
+def run_frequency_bands_gradient(strip, stop_event: Event, selected_audio_device, speed=10, chunk=2048, rate=44100, max_window_size=10, scaling="logarithmic", filterbank=None, stft_hop=None, live_parameters=None, **kwargs):
     logger = logging.getLogger("SK6812Animations")
     logger.info("Running frequency bands and color gradient animation")
 
-    # Setup PyAudio for capturing microphone input
-    p = pyaudio.PyAudio()
-    input_device_index = selected_audio_device['index'] if selected_audio_device else 0
+    # Gemeinsamen Audio-Capture-Dienst verwenden (bleibt zwischen Musik-Animationen geöffnet)
+    input_device_index = _device_index(selected_audio_device)
     
-    stream = p.open(format=pyaudio.paInt16,
-                    channels=1,
-                    rate=rate,
-                    input=True,
-                    input_device_index=input_device_index,
-                    frames_per_buffer=chunk)
-    
-    if stream.is_active():
-        logger.info("Audio stream successfully initialized.")
-    else:
-        logger.error("Audio stream initialization failed.")
+    capture = get_audio_capture(input_device_index, rate)
 
     # Ring buffer for the "Windowed Maximum"
     max_values_window = deque(maxlen=max_window_size)
 
-    def update_function(strip):
+    # Precompute the analysis plan and buffers once
+    # filterbank="mel"/"octave"/"linear" uses band energies instead of single bins per LED
+    l = strip.numPixels()
+    plan = SpectralPlan(chunk, rate, l, scaling, filterbank=filterbank)
+    # stft_hop: Abstand der überlappenden Analysefenster in Samples (None = neuestes Fenster je Frame)
+    stft = StreamingSTFT(capture.ring, plan, hop=stft_hop)
+
+    # Gradient hue from 0 to 255 selects the color channel (bit position in the WRGB value)
+    hue = (np.arange(l) / l * 255).astype(int)
+    channel_shifts = np.where(hue < 85, 16, np.where(hue < 170, 8, 0)).astype(np.uint32)
+
+    def update_function(frame, params=NO_PARAMETERS):
         try:
-            # Read data from microphone
-            data = np.frombuffer(stream.read(chunk, exception_on_overflow=False), dtype=np.int16)
-            fft_data = np.abs(np.fft.rfft(data))
-
-            # Frequency bin scaling
-            if scaling == "logarithmic":
-                log_indices = np.logspace(0, np.log10(len(fft_data)), num=strip.numPixels(), base=10, dtype=int)
-                log_indices = np.clip(log_indices, 0, len(fft_data) - 1)
-                fft_data = fft_data[log_indices]
-            elif scaling == "exponential":
-                exp_indices = np.unique(np.round(np.geomspace(1, len(fft_data), num=strip.numPixels())).astype(int))
-                exp_indices = np.clip(exp_indices, 0, len(fft_data) - 1)
-                fft_data = fft_data[exp_indices]
-            else:
-                fft_data = fft_data[:strip.numPixels()]
+            # Nächstes Audiofenster analysieren, ohne auf das Gerät zu warten
+            if not stft.update():
+                return
 
-            if len(fft_data) < strip.numPixels():
-                fft_data = np.pad(fft_data, (0, strip.numPixels() - len(fft_data)), 'constant')
-            elif len(fft_data) > strip.numPixels():
-                fft_data = fft_data[:strip.numPixels()]
+            # Frequency bin scaling via the cached LED index map or filterbank
+            fft_data = plan.led_bands()
 
             # Update the windowed maximum buffer
-            current_max_fft = np.max(fft_data) if np.max(fft_data) > 0 else 1
-            max_values_window.append(current_max_fft)
+            current_max_fft = fft_data.max()
+            max_values_window.append(current_max_fft if current_max_fft > 0 else 1)
             window_max_fft = max(max_values_window)
 
             # Normalize FFT data to fit LED strip
-            normalized_data = (fft_data / window_max_fft) * 255
+            intensities = plan.normalize(window_max_fft)
 
             # Apply gradient color based on frequency bins
-            for i in range(strip.numPixels()):
-                intensity = int(normalized_data[i])
-                hue = int((i / strip.numPixels()) * 255)  # Create a gradient hue from 0 to 255
-                red = intensity if hue < 85 else 0
-                green = intensity if 85 <= hue < 170 else 0
-                blue = intensity if hue >= 170 else 0
-                color = Color(red, green, blue)
-                strip.setPixelColor(i, color)
-            strip.show()
-
-        except IOError as e:
-            logger.warning(f"Audio input overflowed: {e}")
+            np.left_shift(intensities, channel_shifts, out=frame.pixels)
+
         except Exception as e:
             logger.error(f"Error in update_function: {e}", exc_info=True)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
-    # Cleanup PyAudio
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
-
-def run_beat_pulse_animation(strip, stop_event: Event, selected_audio_device, speed=10, chunk=2048, rate=44100, max_window_size=50, threshold=1.3, **kwargs):
+def run_beat_pulse_animation(strip, stop_event: Event, selected_audio_device, speed=10, chunk=2048, rate=44100, max_window_size=50, threshold=1.3, stft_hop=512, min_confidence=0.3, pulse_decay=0.85, live_parameters=None, **kwargs):
     logger = logging.getLogger("SK6812Animations")
     logger.info("Running beat pulse animation")
 
-    # Setup PyAudio for capturing microphone input
-    p = pyaudio.PyAudio()
-    input_device_index = selected_audio_device['index'] if selected_audio_device else 0
-    
-    stream = p.open(format=pyaudio.paInt16,
-                    channels=1,
-                    rate=rate,
-                    input=True,
-                    input_device_index=input_device_index,
-                    frames_per_buffer=chunk)
+    # Gemeinsamen Audio-Capture-Dienst verwenden (bleibt zwischen Musik-Animationen geöffnet)
+    input_device_index = _device_index(selected_audio_device)
     
-    if stream.is_active():
-        logger.info("Audio stream successfully initialized.")
-    else:
-        logger.error("Audio stream initialization failed.")
-
-    # Variables to track beat detection
-    max_values_window = deque(maxlen=max_window_size)  # Use a sliding window to track recent max values
-    beat_detected = False
+    capture = get_audio_capture(input_device_index, rate)
+
+    plan = SpectralPlan(chunk, rate, strip.numPixels())
+    # Die Tempo-Schätzung braucht ein festes Analyseraster
+    stft_hop = stft_hop or 512
+    stft = StreamingSTFT(capture.ring, plan, hop=stft_hop, every_hop=True)
+
+    # Onset-Erkennung per Spectral Flux, Tempo und Beat-Vorhersage
+    # threshold: Onset, wenn der Flux threshold * Mittel der letzten max_window_size Fenster übersteigt
+    tracker = BeatTracker(plan.bins, rate, stft_hop, chunk=chunk, threshold=threshold, threshold_window=max_window_size)
+    pulse = 0.0
     color_index = 0
     colors = [
         Color(255, 0, 0),  # Red
@@ -206,82 +148,76 @@ def run_beat_pulse_animation(strip, stop_event: Event, selected_audio_device, sp
         Color(255, 255, 255)  # White
     ]
 
-    def update_function(strip):
-        nonlocal beat_detected, color_index
+    def update_function(frame, params=NO_PARAMETERS):
+        nonlocal pulse, color_index
         try:
-            # Read data from microphone
-            data = np.frombuffer(stream.read(chunk, exception_on_overflow=False), dtype=np.int16)
-            fft_data = np.abs(np.fft.rfft(data))
-            current_max_fft = np.max(fft_data) if np.max(fft_data) > 0 else 1
-
-            # Update the sliding window with the current max value
-            max_values_window.append(current_max_fft)
-            window_average = np.mean(max_values_window)
-
-            # Detect a beat if the current max is significantly higher than the window average
-            if current_max_fft > threshold * window_average and not beat_detected:
-                beat_detected = True
+            # Alle neuen Analysefenster an den Beat-Tracker geben
+            onset = False
+            while stft.update():
+                onset = tracker.process(plan.magnitudes, stft.position) or onset
+
+            # Bei stabilem Tempo auf dem vorhergesagten Beat pulsieren, sonst direkt auf dem Onset
+            if tracker.confidence >= min_confidence:
+                beat = tracker.beat_due(capture.stream_time)
+            else:
+                beat = onset
+            if beat:
+                pulse = 1.0
                 color_index = (color_index + 1) % len(colors)  # Cycle through colors
-                logger.debug(f"Beat detected! Switching to color index {color_index}")
-            elif current_max_fft < window_average:
-                beat_detected = False
+                # Kein Logging pro Beat im Render-Pfad, nur ein Trace-Ereignis mit dem aktuellen Tempo
+                tracer.record(BEAT, tracker.bpm)
+            else:
+                pulse *= pulse_decay
 
             # Set all LEDs to the current color with a pulsing effect
-            intensity = int((current_max_fft / window_average) * 255)
-            intensity = min(max(intensity, 0), 255)  # Clamp intensity between 0 and 255
-            color = colors[color_index]
-            adjusted_color = Color(
-                (color >> 16 & 0xff) * intensity // 255,
-                (color >> 8 & 0xff) * intensity // 255,
-                (color & 0xff) * intensity // 255,
-                (color >> 24 & 0xff) * intensity // 255
-            )
-            for i in range(strip.numPixels()):
-                strip.setPixelColor(i, adjusted_color)
-            strip.show()
-
-        except IOError as e:
-            logger.warning(f"Audio input overflowed: {e}")
+            intensity = int(pulse * 255)
+            frame.fill(fade_color(colors[color_index], intensity))
+
         except Exception as e:
             logger.error(f"Error in update_function: {e}", exc_info=True)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
 
-    # Cleanup PyAudio
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
-
-def run_wave_ripple_effect(strip, stop_event: Event, selected_audio_device, speed=5, chunk=2048, rate=44100, max_window_size=100, color_boost=1.2, frequency_bin_factor=5, **kwargs):
+def run_wave_ripple_effect(strip, stop_event: Event, selected_audio_device, speed=5, chunk=2048, rate=44100, max_window_size=100, color_boost=1.2, frequency_bin_factor=5, stft_hop=None, live_parameters=None, **kwargs):
     logger = logging.getLogger("SK6812Animations")
     logger.info("Running wave ripple effect animation")
 
-    # Setup PyAudio for capturing microphone input
-    p = pyaudio.PyAudio()
-    input_device_index = selected_audio_device['index'] if selected_audio_device else 0
-
-    stream = p.open(format=pyaudio.paInt16,
-                    channels=1,
-                    rate=rate,
-                    input=True,
-                    input_device_index=input_device_index,
-                    frames_per_buffer=chunk)
+    # Gemeinsamen Audio-Capture-Dienst verwenden (bleibt zwischen Musik-Animationen geöffnet)
+    input_device_index = _device_index(selected_audio_device)
 
-    if stream.is_active():
-        logger.info("Audio stream successfully initialized.")
-    else:
-        logger.error("Audio stream initialization failed.")
+    capture = get_audio_capture(input_device_index, rate)
 
     # Ring buffer for the "Windowed Maximum"
     max_values_window = deque(maxlen=max_window_size)
-    ripple_queue = deque(maxlen=50)  # Reduced length to make the ripple effect more noticeable
 
-    def update_function(strip):
+    # Ripple state as parallel arrays, oldest ripple first
+    max_ripples = 50  # Reduced length to make the ripple effect more noticeable
+    l = strip.numPixels()
+    ripple_positions = np.zeros(max_ripples, dtype=np.int64)
+    ripple_colors = np.zeros((max_ripples, 4), dtype=np.int64)  # R, G, B, W
+    ripple_volumes = np.zeros(max_ripples)
+    ripple_count = 0
+
+    # Preallocated render buffers (pixels x ripples)
+    pixel_indices = np.arange(l)[:, None]
+    pixel_rows = np.arange(l)
+    distances = np.empty((l, max_ripples), dtype=np.int64)
+    intensities = np.empty((l, max_ripples), dtype=np.int64)
+
+    plan = SpectralPlan(chunk, rate, strip.numPixels())
+    # stft_hop: Abstand der überlappenden Analysefenster in Samples (None = neuestes Fenster je Frame)
+    stft = StreamingSTFT(capture.ring, plan, hop=stft_hop)
+
+    def update_function(frame, params=NO_PARAMETERS):
+        nonlocal ripple_count
         try:
-            # Read data from microphone
-            data = np.frombuffer(stream.read(chunk, exception_on_overflow=False), dtype=np.int16)
-            fft_data = np.abs(np.fft.rfft(data))
-            current_max_fft = np.max(fft_data) if np.max(fft_data) > 0 else 1
+            # Nächstes Audiofenster analysieren, ohne auf das Gerät zu warten
+            if not stft.update():
+                return
+            fft_data = plan.magnitudes
+            current_max_fft = fft_data.max()
+            current_max_fft = current_max_fft if current_max_fft > 0 else 1
             max_values_window.append(current_max_fft)
             window_max_fft = max(max_values_window)
             normalized_volume = current_max_fft / window_max_fft
@@ -314,44 +250,42 @@ def run_wave_ripple_effect(strip, stop_event: Event, selected_audio_device, spee
                      min(255, blue + white_component),
                      white_component)
 
-            # Add new ripple to the queue
-            ripple_queue.append((0, color, normalized_volume))
-
-            # Update ripples
-            for index, (position, color, volume) in enumerate(ripple_queue):
-                ripple_queue[index] = (position + int(3 * volume), color, volume)  # High volume ripples move faster
-
-            # Render ripples on the LED strip
-            for i in range(strip.numPixels()):
-                intensity = 0
-                final_color = (0, 0, 0, 0)
-
-                for position, ripple_color, volume in ripple_queue:
-                    distance = abs(i - position)
-                    if distance < strip.numPixels() // 2:  # Reduced distance to make ripple endings more visible
-                        ripple_intensity = max(255 - (distance * 4), 0)  # Reduce intensity with distance, slower decay
-                        if ripple_intensity > intensity:
-                            intensity = ripple_intensity
-                            final_color = ripple_color
-
-                # Set the color with intensity modulation
-                strip.setPixelColor(i, Color(
-                    int(final_color[0] * intensity / 255),
-                    int(final_color[1] * intensity / 255),
-                    int(final_color[2] * intensity / 255),
-                    int(final_color[3] * intensity / 255),
-                ))
-
-            strip.show()
-
-        except IOError as e:
-            logger.warning(f"Audio input overflowed: {e}")
+            # Add new ripple (the oldest one drops out when all slots are used)
+            if ripple_count == max_ripples:
+                ripple_positions[:-1] = ripple_positions[1:]
+                ripple_colors[:-1] = ripple_colors[1:]
+                ripple_volumes[:-1] = ripple_volumes[1:]
+            else:
+                ripple_count += 1
+            newest = ripple_count - 1
+            ripple_positions[newest] = 0
+            ripple_colors[newest] = np.clip(color, 0, 255)
+            ripple_volumes[newest] = normalized_volume
+
+            # Update ripples, high volume ripples move faster
+            positions = ripple_positions[:ripple_count]
+            positions += (3 * ripple_volumes[:ripple_count]).astype(np.int64)
+
+            # Distance of every pixel to every ripple, intensity falls off with distance
+            distance = distances[:, :ripple_count]
+            np.subtract(pixel_indices, positions, out=distance)
+            np.abs(distance, out=distance)
+            intensity = intensities[:, :ripple_count]
+            np.multiply(distance, -4, out=intensity)
+            intensity += 255
+            np.maximum(intensity, 0, out=intensity)
+            intensity[distance >= l // 2] = 0  # Reduced distance to make ripple endings more visible
+
+            # Strongest ripple per pixel wins (oldest first on ties, like the previous loop)
+            strongest = intensity.argmax(axis=1)
+            level = intensity[pixel_rows, strongest]
+            rgbw = ripple_colors[strongest] * level[:, None] // 255
+
+            # Set the color with intensity modulation
+            frame.pixels[:] = pack_colors(rgbw)
+
         except Exception as e:
             logger.error(f"Error in update_function: {e}", exc_info=True)
 
-    run_generic_animation(strip, stop_event, update_function, update_speed=speed)
-
-    # Cleanup PyAudio
-    stream.stop_stream()
-    stream.close()
-    p.terminate()
\ No newline at end of file
+    run_generic_animation(strip, stop_event, update_function, update_speed=speed, use_framebuffer=True,
+                          params=live_parameters, period_param="speed")
\ No newline at end of file
@@ -0,0 +1,218 @@
+# spectral.py
+import inspect
+from functools import lru_cache
+import numpy as np
+
+# numpy >= 2.0 kann das rfft-Ergebnis in einen vorhandenen Puffer schreiben
+_RFFT_HAS_OUT = "out" in inspect.signature(np.fft.rfft).parameters
+
+
+@lru_cache(maxsize=16)
+def hann_window(chunk):
+    window = np.hanning(chunk)
+    window.setflags(write=False)
+    return window
+
+
+@lru_cache(maxsize=32)
+def led_index_map(bins, num_pixels, scaling):
+    """
+    Ordnet jeder LED einen FFT-Bin zu. LEDs ohne eigenen Bin bekommen den Index `bins`,
+    der im Magnitudenpuffer des Plans immer 0 ist (entspricht dem früheren Auffüllen mit Nullen).
+    """
+    if scaling == "logarithmic":
+        # Logarithmische Skalierung der Frequenzbins
+        indices = np.logspace(0, np.log10(bins), num=num_pixels, base=10, dtype=int)
+        indices = np.clip(indices, 0, bins - 1)
+    elif scaling == "exponential":
+        # Exponentielle Skalierung der Frequenzbins (doppelte Bins werden entfernt)
+        indices = np.unique(np.round(np.geomspace(1, bins, num=num_pixels)).astype(int))
+        indices = np.clip(indices, 0, bins - 1)
+    else:
+        # Lineare Skalierung (Standard)
+        indices = np.arange(min(bins, num_pixels))
+
+    index_map = np.full(num_pixels, bins, dtype=np.intp)
+    count = min(len(indices), num_pixels)
+    index_map[:count] = indices[:count]
+    index_map.setflags(write=False)
+    return index_map
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+
+@lru_cache(maxsize=8)
+def filterbank_matrix(kind, chunk, rate, num_bands, fmin=20.0, fmax=None):
+    """
+    Dreiecksfilterbank als dichte Matrix (num_bands x bins) für eine Bandenergie pro LED.
+
+    :param kind: "mel" (Mel-Skala), "octave" (logarithmisch, gleiche Bruchteile einer Oktave je Band;
+        bei ~30 Bändern über den Hörbereich entspricht das Terzbändern) oder "linear"
+    :param chunk: FFT-Fenstergröße
+    :param rate: Samplerate in Hz
+    :param num_bands: Anzahl der Bänder, normalerweise strip.numPixels()
+    :param fmin: untere Grenzfrequenz in Hz
+    :param fmax: obere Grenzfrequenz in Hz, Standard ist die Nyquist-Frequenz
+
+    Jede Zeile ist auf die Summe 1 normiert, ein Band liefert also die mittlere Magnitude
+    seiner Bins. Bänder, die schmaler als ein FFT-Bin sind, greifen auf den nächstgelegenen Bin zu.
+    Die Matrix braucht num_bands * (chunk // 2 + 1) * 8 Byte, bei 144 LEDs und chunk=2048 etwa 1,2 MB.
+    """
+    bins = chunk // 2 + 1
+    fmax = rate / 2 if fmax is None else min(fmax, rate / 2)
+    if kind == "mel":
+        edges = _mel_to_hz(np.linspace(_hz_to_mel(fmin), _hz_to_mel(fmax), num_bands + 2))
+    elif kind == "octave":
+        edges = np.geomspace(fmin, fmax, num_bands + 2)
+    elif kind == "linear":
+        edges = np.linspace(fmin, fmax, num_bands + 2)
+    else:
+        raise ValueError(f"Unknown filterbank: {kind}")
+
+    frequencies = np.arange(bins) * rate / chunk
+    lower = edges[:-2, None]
+    center = edges[1:-1, None]
+    upper = edges[2:, None]
+    rising = (frequencies - lower) / (center - lower)
+    falling = (upper - frequencies) / (upper - center)
+    matrix = np.maximum(0.0, np.minimum(rising, falling))
+
+    # Zu schmale Bänder: nächstgelegenen Bin verwenden
+    empty = matrix.sum(axis=1) == 0
+    nearest = np.clip(np.round(edges[1:-1] * chunk / rate).astype(int), 0, bins - 1)
+    matrix[empty, nearest[empty]] = 1.0
+
+    matrix /= matrix.sum(axis=1, keepdims=True)
+    matrix.setflags(write=False)
+    return matrix
+
+
+class SpectralPlan:
+    """
+    Vorberechneter Analyseplan für die Sound-Animationen.
+
+    Fensterfunktion und LED-Zuordnung werden pro (chunk, num_pixels, scaling) einmal berechnet
+    und zwischengespeichert, die Arbeitspuffer beim Anlegen des Plans. Der Pfad pro Frame
+    (Fenstern, FFT, Betrag, LED-Zuordnung, Normalisierung) legt danach keine Arrays mehr an.
+    Ein Plan gehört zu genau einer laufenden Animation und ist nicht threadsicher.
+
+    Mit `filterbank` ("mel", "octave" oder "linear") wird statt eines einzelnen Bins pro LED
+    die Energie eines Dreiecksbandes verwendet, berechnet mit einer Matrixmultiplikation pro Frame.
+    """
+
+    def __init__(self, chunk, rate, num_pixels, scaling="linear", filterbank=None):
+        self.chunk = chunk
+        self.rate = rate
+        self.num_pixels = num_pixels
+        self.scaling = scaling
+        self.bins = chunk // 2 + 1
+        self.window = hann_window(chunk)
+        self.led_indices = led_index_map(self.bins, num_pixels, scaling)
+        self.filterbank = filterbank_matrix(filterbank, chunk, rate, num_pixels) if filterbank else None
+
+        self._windowed = np.empty(chunk, dtype=np.float64)
+        self._spectrum = np.empty(self.bins, dtype=np.complex128)
+        # Ein zusätzliches, immer leeres Element für LEDs ohne eigenen Bin
+        self._magnitudes = np.zeros(self.bins + 1, dtype=np.float64)
+        self.magnitudes = self._magnitudes[:self.bins]
+        self.led_values = np.zeros(num_pixels, dtype=np.float64)
+        self.normalized = np.zeros(num_pixels, dtype=np.float64)
+        self.intensities = np.zeros(num_pixels, dtype=np.uint32)
+
+    def analyze(self, samples):
+        """Berechnet das Betragsspektrum eines Sample-Fensters der Länge chunk."""
+        np.multiply(samples, self.window, out=self._windowed)
+        if _RFFT_HAS_OUT:
+            np.fft.rfft(self._windowed, out=self._spectrum)
+        else:
+            self._spectrum[:] = np.fft.rfft(self._windowed)
+        np.abs(self._spectrum, out=self.magnitudes)
+        return self.magnitudes
+
+    def led_bands(self):
+        """Verteilt das zuletzt berechnete Spektrum auf die LEDs."""
+        if self.filterbank is not None:
+            np.dot(self.filterbank, self.magnitudes, out=self.led_values)
+        else:
+            np.take(self._magnitudes, self.led_indices, out=self.led_values)
+        return self.led_values
+
+    def normalize(self, peak, scale=255):
+        """Skaliert die LED-Werte auf 0..scale und liefert sie zusätzlich als uint32-Intensitäten."""
+        np.multiply(self.led_values, scale / peak, out=self.normalized)
+        np.clip(self.normalized, 0, scale, out=self.normalized)
+        np.copyto(self.intensities, self.normalized, casting="unsafe")
+        return self.intensities
+
+    def bin_frequency(self, index):
+        return index * self.rate / self.chunk
+
+
+class StreamingSTFT:
+    """
+    Kurzzeit-FFT mit überlappenden Fenstern über dem Audio-Ringpuffer.
+
+    Ein neues Spektrum wird berechnet, sobald seit dem letzten Fenster mindestens `hop` neue
+    Samples eingetroffen sind. Die Fenster liegen im Raster von `hop` Samples; sind mehrere Hops
+    vergangen, wird nur das neueste Fenster analysiert, das Spektrum folgt also der Bildrate.
+
+    - hop=None: bei jedem Frame mit neuen Samples das neueste Fenster analysieren
+    - hop=chunk: nicht überlappende Blöcke wie beim früheren blockierenden stream.read(chunk)
+    - z. B. chunk=2048, hop=256: 2048er-Fenster alle ~6 ms bei 44,1 kHz
+
+    Mit every_hop=True wird stattdessen pro update() genau ein Hop weitergegangen, sodass kein
+    Fenster ausgelassen wird (z. B. für die Onset-Erkennung); update() wird dann in einer Schleife
+    aufgerufen, bis es False liefert.
+    """
+
+    def __init__(self, ring, plan, hop=None, every_hop=False):
+        self.ring = ring
+        self.plan = plan
+        self.hop = hop
+        self.every_hop = every_hop and hop is not None
+        self.frames = 0
+        self._samples = np.empty(plan.chunk, dtype=np.int16)
+        self._position = None
+
+    @property
+    def update_interval(self):
+        """Zeit zwischen zwei Fenstern in Sekunden (None: durch die Bildrate bestimmt)."""
+        return self.hop / self.plan.rate if self.hop else None
+
+    @property
+    def position(self):
+        """Samplezähler am Ende des zuletzt analysierten Fensters."""
+        return self._position
+
+    def update(self):
+        """
+        Analysiert das nächste Fenster, wenn genug neue Samples vorliegen.
+        :return: True, wenn plan.magnitudes ein neues Spektrum enthält
+        """
+        written = self.ring.written
+        if self.hop is None:
+            if written == self._position:
+                return False
+            self._position = written
+        else:
+            if self._position is None:
+                self._position = written - written % self.hop - self.hop
+            steps = (written - self._position) // self.hop
+            if steps <= 0:
+                return False
+            # Auch im every_hop-Modus nicht hinter den Ringpuffer zurückfallen
+            behind = (written - self._position) > self.ring.capacity - self.ring.guard - self.plan.chunk
+            if self.every_hop and not behind:
+                steps = 1
+            self._position += steps * self.hop
+
+        self.ring.read(self._position, self.plan.chunk, out=self._samples)
+        self.plan.analyze(self._samples)
+        self.frames += 1
+        return True
@@ -0,0 +1,124 @@
+# tracing.py
+import json
+import time
+import threading
+from array import array
+from itertools import count
+
+# Ereignistypen
+FRAME_BEGIN = 1
+FRAME_END = 2
+AUDIO_BLOCK = 3
+AUDIO_OVERFLOW = 4
+BEAT = 5
+ANIMATION_SWITCH = 6
+
+EVENT_NAMES = {
+    FRAME_BEGIN: "frame",
+    FRAME_END: "frame",
+    AUDIO_BLOCK: "audio_block",
+    AUDIO_OVERFLOW: "audio_overflow",
+    BEAT: "beat",
+    ANIMATION_SWITCH: "animation_switch",
+}
+
+
+class TraceRecorder:
+    """
+    Speicherinterner Ringpuffer für Zeitstempel-Ereignisse, ausschaltbar und billig.
+
+    Jedes Ereignis belegt einen Slot in vorab angelegten binären Arrays (Zeit in ns,
+    Ereignistyp, Zahlenwert, Thread) und einer Liste für optionale Texte; es wird weder
+    formatiert noch geloggt. Ist der Recorder ausgeschaltet, kostet record() nur die Abfrage
+    von `enabled`. Sind mehr als `capacity` Ereignisse angefallen, werden die ältesten
+    (samt Text) überschrieben.
+    Der Inhalt lässt sich als Chrome-trace_event-JSON ausgeben (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, capacity=65536):
+        self.enabled = False
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self._times = array("q", bytes(8 * capacity))
+        self._events = array("B", bytes(capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._threads = array("q", bytes(8 * capacity))
+        self._labels = [None] * capacity
+        self._counter = count()
+        self._recorded = 0
+
+    def enable(self, capacity=None):
+        if capacity is not None and capacity != self.capacity:
+            self._allocate(capacity)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self._allocate(self.capacity)
+
+    def record(self, event, value=0.0, label=None):
+        """
+        Zeichnet ein Ereignis auf.
+
+        :param event: Ereignistyp (FRAME_BEGIN, BEAT, ...)
+        :param value: Zahlenwert, z. B. Blockgröße oder BPM
+        :param label: Optionaler Text (nur für seltene Ereignisse wie ANIMATION_SWITCH)
+        """
+        if not self.enabled:
+            return
+        sequence = next(self._counter)
+        i = sequence % self.capacity
+        self._times[i] = time.perf_counter_ns()
+        self._events[i] = event
+        self._values[i] = value
+        self._threads[i] = threading.get_ident()
+        self._labels[i] = label
+        self._recorded = sequence + 1
+
+    def __len__(self):
+        return min(self._recorded, self.capacity)
+
+    def events(self):
+        """Alle gespeicherten Ereignisse, älteste zuerst, als (ns, typ, wert, thread, label)."""
+        recorded = self._recorded
+        first = max(recorded - self.capacity, 0)
+        result = []
+        for sequence in range(first, recorded):
+            i = sequence % self.capacity
+            result.append((self._times[i], self._events[i], self._values[i], self._threads[i],
+                           self._labels[i]))
+        return result
+
+    def to_chrome_trace(self):
+        thread_ids = {}
+        trace_events = []
+        for timestamp, event, value, thread, label in self.events():
+            tid = thread_ids.setdefault(thread, len(thread_ids) + 1)
+            entry = {
+                "name": label or EVENT_NAMES.get(event, str(event)),
+                "ts": timestamp / 1000.0,
+                "pid": 1,
+                "tid": tid,
+            }
+            if event == FRAME_BEGIN:
+                entry["ph"] = "B"
+            elif event == FRAME_END:
+                entry["ph"] = "E"
+            else:
+                entry["ph"] = "i"
+                entry["s"] = "t"
+                entry["args"] = {"value": value}
+            trace_events.append(entry)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def dump_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+# Gemeinsamer Recorder für Engine, Audio und Menü
+tracer = TraceRecorder()
@@ -0,0 +1,114 @@
+# transitions.py
+import logging
+import threading
+import numpy as np
+from .animation_utils import _bulk_writer, blend_frames
+from .scheduler import FrameScheduler
+
+logger = logging.getLogger("SK6812Animations")
+
+
+class LayerStrip:
+    """
+    Zwischenebene zwischen einer Animation und dem echten LED-Streifen.
+
+    Die Animation schreibt in einen eigenen Pixelspeicher. Im Durchreich-Modus (`passthrough`)
+    überträgt show() die seit dem letzten show() geänderten Pixel in den Streifen und zeigt sie
+    an; sonst bleibt das Bild in der Ebene und ein Mischer (crossfade, Compositor) entscheidet,
+    was auf den Streifen kommt. So kann die nächste Animation schon laufen, bevor sie sichtbar wird.
+
+    Mischer lesen nur `shown_pixels`: den Stand des letzten show(), unter dem Lock kopiert.
+    Halb gezeichnete Frames (z. B. direkt nach einem clear()) sind so nie zu sehen.
+
+    :param strip: Der echte LED-Streifen
+    :param lock: Gemeinsames Lock aller Ebenen desselben Streifens
+    """
+
+    def __init__(self, strip, lock, passthrough=True):
+        self.strip = strip
+        self.pixels = np.zeros(strip.numPixels(), dtype=np.uint32)
+        self.shown_pixels = np.zeros_like(self.pixels)
+        self.passthrough = passthrough
+        # Wird beim ersten show() gesetzt, d. h. die Animation ist vorbereitet
+        self.shown = threading.Event()
+        self._lock = lock
+        self._write = _bulk_writer(strip)
+        self._dirty_start = 0
+        self._dirty_stop = len(self.pixels)
+
+    def __getattr__(self, name):
+        return getattr(self.strip, name)
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def _mark(self, start, stop):
+        self._dirty_start = min(self._dirty_start, start)
+        self._dirty_stop = max(self._dirty_stop, stop)
+
+    def setPixelColor(self, n, color):
+        self.pixels[n] = color
+        self._mark(n, n + 1)
+
+    def setPixelColorRGB(self, n, red, green, blue, white=0):
+        self.pixels[n] = (white << 24) | (red << 16) | (green << 8) | blue
+        self._mark(n, n + 1)
+
+    def getPixelColor(self, n):
+        return int(self.pixels[n])
+
+    def set_pixels(self, pixels, start=0):
+        n = min(len(pixels), len(self.pixels) - start)
+        self.pixels[start:start + n] = pixels[:n]
+        self._mark(start, start + n)
+
+    def show(self):
+        with self._lock:
+            if not self.passthrough:
+                self.shown_pixels[:] = self.pixels
+            elif self._dirty_stop > self._dirty_start:
+                self._write(self.pixels, np.arange(self._dirty_start, self._dirty_stop))
+                self.strip.show()
+                self._dirty_start, self._dirty_stop = len(self.pixels), 0
+        self.shown.set()
+
+    def enable_passthrough(self):
+        """Schaltet auf Durchreichen um und überträgt sofort den ganzen aktuellen Stand."""
+        with self._lock:
+            self.passthrough = True
+            self._mark(0, len(self.pixels))
+        self.show()
+
+    def disable_passthrough(self):
+        with self._lock:
+            self.passthrough = False
+            # Bis zum nächsten show() gilt der zuletzt durchgereichte Stand
+            self.shown_pixels[:] = self.pixels
+
+
+def crossfade(strip, old_layer, new_layer, duration, fps=60, lock=None):
+    """
+    Blendet in `duration` Sekunden vom Bild von `old_layer` auf das von `new_layer` über.
+
+    Beide Animationen laufen währenddessen weiter, gemischt werden jeweils ihre aktuellen Frames.
+    Danach reicht `new_layer` direkt an den Streifen durch; die alte Animation kann dann beendet
+    werden, ohne dass ihr abschließendes clear_strip() sichtbar wird.
+    """
+    lock = lock or old_layer._lock
+    old_layer.disable_passthrough()
+    new_layer.disable_passthrough()
+    write = _bulk_writer(strip)
+    out = np.empty(strip.numPixels(), dtype=np.uint32)
+    n = min(len(out), len(old_layer.shown_pixels), len(new_layer.shown_pixels))
+    steps = max(int(duration * fps), 1)
+    scheduler = FrameScheduler(1.0 / fps)
+    scheduler.start()
+    for step in range(1, steps + 1):
+        with lock:
+            blend_frames(old_layer.shown_pixels[:n], new_layer.shown_pixels[:n], step / steps, out[:n])
+            write(out)
+            strip.show()
+        if step < steps:
+            scheduler.wait()
+    new_layer.enable_passthrough()
+    logger.debug(f"Crossfade finished after {steps} frames, {scheduler.missed_deadlines} late")
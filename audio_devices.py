@@ -0,0 +1,176 @@
+# audio_devices.py
+import os
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger("SK6812Audio")
+
+# Unter Linux ändert sich diese Datei, sobald eine Soundkarte an- oder abgesteckt wird
+ALSA_CARDS_FILE = "/proc/asound/cards"
+
+
+@contextmanager
+def _quiet_stderr():
+    """
+    Leitet stderr auf Dateideskriptor-Ebene kurz nach /dev/null um. PortAudio bzw. ALSA und JACK
+    schreiben beim Durchsuchen der Geräte viele Meldungen direkt auf fd 2, an logging vorbei.
+    """
+    try:
+        saved = os.dup(2)
+    except OSError:
+        yield
+        return
+    try:
+        with open(os.devnull, "w") as devnull:
+            os.dup2(devnull.fileno(), 2)
+            yield
+    finally:
+        os.dup2(saved, 2)
+        os.close(saved)
+
+
+def _hardware_signature():
+    try:
+        with open(ALSA_CARDS_FILE, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class AudioDeviceCatalog:
+    """
+    Einmal ermittelte Liste der Audio-Eingabegeräte mit gemeinsamer PyAudio-Instanz.
+
+    Das Initialisieren von PortAudio durchsucht alle Host-APIs und dauert auf ALSA/JACK-Systemen
+    einige Sekunden. Der Katalog macht das nur beim ersten Zugriff, auf Anfrage (refresh()) oder
+    wenn sich die Liste der Soundkarten geändert hat. Der AudioCaptureService öffnet seine
+    Streams über dieselbe Instanz, sodass auch der Start einer Musik-Animation nicht erneut sucht.
+
+    Geräte sind die dicts von PyAudio (get_device_info_by_index) mit "index", "name",
+    "maxInputChannels" usw. Da sich die Indizes nach einem neuen Durchsuchen ändern können,
+    werden konfigurierte Geräte über ihren Namen aufgelöst.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._pyaudio = None
+        self._devices = None
+        self._default_index = None
+        self._signature = None
+        self._open_streams = 0
+        self._stale = False
+
+    def _initialize(self):
+        import pyaudio  # erst hier, damit der Programmstart pyaudio nicht laden muss
+        with _quiet_stderr():
+            p = pyaudio.PyAudio()
+        devices = []
+        for i in range(p.get_device_count()):
+            info = p.get_device_info_by_index(i)
+            if info["maxInputChannels"] > 0:
+                devices.append(info)
+        try:
+            default_index = p.get_default_input_device_info()["index"]
+        except (IOError, OSError):
+            default_index = None
+        self._pyaudio = p
+        self._devices = devices
+        self._default_index = default_index
+        self._stale = False
+        logger.info(f"Found {len(devices)} audio input device(s)")
+
+    def _terminate(self):
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+            self._pyaudio = None
+        self._devices = None
+
+    def _ensure(self):
+        signature = _hardware_signature()
+        if self._devices is not None and signature != self._signature:
+            logger.info("Sound cards changed, rescanning audio devices")
+            self._stale = True
+        if self._stale and self._open_streams == 0:
+            self._terminate()
+        if self._devices is None:
+            self._initialize()
+        self._signature = signature
+
+    def devices(self):
+        """Alle Eingabegeräte (aus dem Cache)."""
+        with self._lock:
+            self._ensure()
+            return list(self._devices)
+
+    def refresh(self):
+        """
+        Durchsucht die Geräte neu. Solange ein Stream offen ist, bleibt PortAudio initialisiert
+        und sieht keine neuen Geräte; dann wird nach dem Schließen des letzten Streams gesucht.
+        """
+        with self._lock:
+            self._stale = True
+            if self._open_streams:
+                logger.warning("Audio stream open, device rescan deferred until it is closed")
+            return self.devices()
+
+    def find(self, name):
+        """Gerät mit genau diesem Namen, sonst das erste, dessen Name `name` enthält (ohne Groß-/Kleinschreibung)."""
+        devices = self.devices()
+        for device in devices:
+            if device["name"] == name:
+                return device
+        lowered = name.lower()
+        for device in devices:
+            if lowered in device["name"].lower():
+                return device
+        return None
+
+    def get(self, index):
+        for device in self.devices():
+            if device["index"] == index:
+                return device
+        return None
+
+    def resolve(self, name=None, index=None):
+        """
+        Gerät für die Konfiguration: zuerst per Name, dann per Index, sonst das Standard-
+        Eingabegerät bzw. das erste vorhandene. None, wenn es kein Eingabegerät gibt.
+        """
+        if name:
+            device = self.find(name)
+            if device is not None:
+                return device
+            logger.warning(f"Audio device '{name}' not found, using fallback")
+        if index is not None:
+            device = self.get(index)
+            if device is not None:
+                return device
+        devices = self.devices()
+        if not devices:
+            return None
+        return self.get(self._default_index) or devices[0]
+
+    def open_stream(self, **kwargs):
+        """Öffnet einen Stream über die gemeinsame PyAudio-Instanz (Argumente wie PyAudio.open)."""
+        with self._lock:
+            self._ensure()
+            stream = self._pyaudio.open(**kwargs)
+            self._open_streams += 1
+            return stream
+
+    def close_stream(self, stream):
+        with self._lock:
+            stream.close()
+            self._open_streams -= 1
+
+    def close(self):
+        """Gibt PortAudio frei, z. B. beim Beenden des Programms."""
+        with self._lock:
+            if self._open_streams:
+                logger.warning(f"Closing audio device catalog with {self._open_streams} open stream(s)")
+            self._terminate()
+            self._open_streams = 0
+
+
+catalog = AudioDeviceCatalog()
@@ -0,0 +1,218 @@
+# animation_fps.py
+"""
+Misst für jede Animation aus registry.animations, wie viele Frames pro Sekunde sie ohne
+Taktung schafft, und zwar auf dem virtuellen Streifen bei verschiedenen LED-Anzahlen.
+
+Pro Animation und Streifenlänge laufen `--frames` Frames, gezählt als Durchläufe der
+Render-Schleife (FrameStats), also auch Frames ohne Änderung und ohne show(). Alle Wartezeiten
+(time.sleep, Frame-Scheduler) sind während der Messung abgeschaltet und zählen nicht mit.
+Gemessen werden pro Frame:
+  update: Zeit in der Animation selbst (inklusive Pixel-Schreibzugriffen auf den Streifen)
+  push:   Kopieren des Framepuffers in den Streifen
+  show:   show() des virtuellen Streifens
+Musik-Animationen bekommen eine synthetische Audioquelle mit 10 ms Audio pro Frame (nur mit
+installiertem pyaudio, sonst werden sie übersprungen), die Lightshow-Wiedergabe eine temporäre
+Aufzeichnung. Der Netzwerkeingang wartet auf einen externen Sender und wird nicht gemessen.
+Ruft eine Animation show() öfter als einmal pro Frame auf, rendert sie nicht Frame für Frame;
+ihre Zeile wird dann als "not frame-based" ohne FPS ausgegeben.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.animation_fps --pixels 144 600 2400 10000 --frames 200 --json results.json
+"""
+import argparse
+import inspect
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+import numpy as np
+from led_backend import VirtualStrip
+from animations.animation_utils import get_frame_stats
+from registry import animations
+
+MUSIC_KEY_START = 50
+# Animationen, die ohne externe Quelle (DMX-Sender im Netz) keine Frames erzeugen
+EXTERNAL_INPUT = ("run_network_input",)
+
+
+class BenchmarkStopEvent(threading.Event):
+    """
+    stop_event, dessen wait() nicht blockiert, damit der Frame-Scheduler nicht taktet.
+
+    Die Render-Schleife fragt is_set() mindestens einmal pro Frame ab; `on_poll` wird dabei
+    aufgerufen und dient der Messung als Taktgeber, unabhängig davon, ob show() aufgerufen wird.
+    """
+
+    def __init__(self, on_poll=None):
+        super().__init__()
+        self.on_poll = on_poll
+
+    def is_set(self):
+        if self.on_poll is not None and not super().is_set():
+            self.on_poll()
+        return super().is_set()
+
+    def wait(self, timeout=None):
+        return self.is_set()
+
+
+class _TimedStrip(VirtualStrip):
+    """Virtueller Streifen, der die Zeit für Bulk-Pushes mitschreibt."""
+
+    def __init__(self, num):
+        super().__init__(num)
+        self.push_time = 0.0
+
+    def set_pixels(self, pixels, start=0):
+        begin = time.perf_counter()
+        super().set_pixels(pixels, start)
+        self.push_time += time.perf_counter() - begin
+
+
+def make_recording(path, num_pixels, frames=100, seed=0):
+    """Schreibt eine Aufzeichnung mit zufälligen, sich langsam ändernden Frames für die Wiedergabe."""
+    from animations.recording import LightShowRecorder
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 1 << 32, num_pixels, dtype=np.uint32)
+    with LightShowRecorder(path, num_pixels) as recorder:
+        for _ in range(frames):
+            changed = rng.random(num_pixels) < 0.1
+            pixels[changed] = rng.integers(0, 1 << 32, int(changed.sum()), dtype=np.uint32)
+            recorder.write_frame(pixels)
+
+
+def benchmark_animation(function, num_pixels, frames=200, max_seconds=10.0, audio=None, kwargs=None):
+    strip = _TimedStrip(num_pixels)
+    result = {"frames": 0, "elapsed": 0.0}
+    started = [None]
+    seen_frames = [-1]
+
+    def rendered_frames():
+        stats = get_frame_stats(strip)
+        return stats.frames if stats is not None else 0
+
+    def on_poll():
+        count = rendered_frames()
+        if count != seen_frames[0]:
+            # Pro gerendertem Frame 10 ms neues Audio, auch wenn sich das Bild nicht ändert
+            seen_frames[0] = count
+            if audio is not None:
+                audio.advance()
+        if count >= frames or time.perf_counter() - started[0] > max_seconds:
+            result["frames"] = count
+            result["elapsed"] = time.perf_counter() - started[0]
+            result["show_time"] = strip.show_time
+            result["push_time"] = strip.push_time
+            result["show_count"] = strip.show_count
+            stop_event.set()
+
+    stop_event = BenchmarkStopEvent(on_poll)
+    args = [strip, stop_event]
+    if audio is not None:
+        args.append({"index": None, "name": "synthetic"})
+    # Zufallsanimationen mit festem Seed, damit Läufe vergleichbar bleiben
+    kwargs = dict(kwargs or {})
+    if "seed" in inspect.signature(function).parameters:
+        kwargs["seed"] = 0
+
+    started[0] = time.perf_counter()
+    thread = threading.Thread(target=function, args=args, kwargs=kwargs, daemon=True)
+    thread.start()
+    thread.join(max_seconds)
+    if thread.is_alive():
+        # Animation hat in der Zeit keinen Frame abgeschlossen und stop_event nicht abgefragt
+        stop_event.set()
+        thread.join(max_seconds)
+    if not result["frames"]:
+        result.update(frames=rendered_frames(), elapsed=time.perf_counter() - started[0],
+                      show_time=strip.show_time, push_time=strip.push_time, show_count=strip.show_count)
+
+    n = max(result["frames"], 1)
+    update_time = result["elapsed"] - result["show_time"] - result["push_time"]
+    # Höchstens ein show() pro Frame (plus das Löschen beim Beenden), sonst zählt ein "Frame"
+    # eine ganze Schleife der Animation und die FPS wären irreführend
+    frame_based = result["show_count"] <= result["frames"] + 1
+    return {
+        "pixels": num_pixels,
+        "frames": result["frames"],
+        "fps": result["frames"] / result["elapsed"] if frame_based and result["elapsed"] > 0 else None,
+        "frame_based": frame_based,
+        "update_ms": update_time / n * 1000,
+        "push_ms": result["push_time"] / n * 1000,
+        "show_ms": result["show_time"] / n * 1000,
+        "completed": result["frames"] >= frames,
+    }
+
+
+def run_benchmarks(pixel_counts, frames=200, max_seconds=10.0, only=None):
+    results = []
+    audio_capture = None
+    with mock.patch("time.sleep"), tempfile.TemporaryDirectory() as tmpdir:
+        for key in sorted(animations, key=int):
+            name = animations.entry(key).function_name
+            if only and not any(part in name for part in only):
+                continue
+            if name in EXTERNAL_INPUT:
+                print(f"{name:<42}skipped (needs external input)")
+                continue
+            if int(key) >= MUSIC_KEY_START and audio_capture is None:
+                try:
+                    # Erst hier: importiert pyaudio, das die übrigen Animationen nicht brauchen
+                    from animations import audio_capture
+                    from benchmarks.synthetic_audio import SyntheticAudioCapture
+                except ImportError as e:
+                    print(f"{name:<42}skipped ({e})")
+                    continue
+            function = animations[key]
+            for num_pixels in pixel_counts:
+                audio = None
+                kwargs = None
+                if int(key) >= MUSIC_KEY_START:
+                    audio = SyntheticAudioCapture()
+                    audio_capture.install_audio_capture(audio)
+                if name == "run_light_show_playback":
+                    path = os.path.join(tmpdir, f"benchmark-{num_pixels}.skls")
+                    make_recording(path, num_pixels)
+                    kwargs = {"path": path}
+                entry = benchmark_animation(function, num_pixels, frames, max_seconds, audio, kwargs)
+                entry["animation"] = function.__name__
+                results.append(entry)
+                print_result(entry)
+    if audio_capture is not None:
+        audio_capture.shutdown_audio_capture()
+    return results
+
+
+def print_header():
+    print(f"{'animation':<42}{'pixels':>7}{'frames':>8}{'fps':>10}{'update ms':>11}{'push ms':>9}{'show ms':>9}")
+
+
+def print_result(entry):
+    marker = "" if entry["completed"] else "  (incomplete)"
+    if not entry["frame_based"]:
+        print(f"{entry['animation']:<42}{entry['pixels']:>7}{entry['frames']:>8}  not frame-based, no FPS")
+        return
+    print(f"{entry['animation']:<42}{entry['pixels']:>7}{entry['frames']:>8}{entry['fps']:>10.1f}"
+          f"{entry['update_ms']:>11.3f}{entry['push_ms']:>9.3f}{entry['show_ms']:>9.3f}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pixels", type=int, nargs="+", default=[144, 600, 2400, 10000])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Zeitlimit pro Animation und Streifenlänge")
+    parser.add_argument("--only", nargs="+", help="Nur Animationen, deren Name einen dieser Teile enthält")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args()
+
+    print_header()
+    results = run_benchmarks(args.pixels, args.frames, args.max_seconds, args.only)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
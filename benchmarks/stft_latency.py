@@ -0,0 +1,92 @@
+# stft_latency.py
+"""
+Vergleicht die Audio-zu-Licht-Latenz der Sound-Animationen mit und ohne überlappende STFT-Fenster.
+
+Simuliert wird ein Ton, der zu einem zufälligen Zeitpunkt einsetzt. Die Samples kommen in
+Blöcken wie vom PyAudio-Callback, gerendert wird mit fester Bildrate. Gemessen wird die Zeit
+vom Einsatz des Tons bis zum ersten Frame, dessen Spektrum ihn mit mindestens halber Stärke zeigt.
+hop=chunk entspricht den früheren, nicht überlappenden blockierenden Reads.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.stft_latency --chunk 2048 --hop 256 --fps 100
+"""
+import argparse
+import time
+import numpy as np
+from animations.audio_capture import SampleRingBuffer
+from animations.spectral import SpectralPlan, StreamingSTFT
+
+
+def simulate(chunk, hop, rate=44100, fps=100, block=512, trials=200, tone_hz=1000.0, seed=0):
+    rng = np.random.default_rng(seed)
+    tone_bin = int(round(tone_hz * chunk / rate))
+    duration = 2 * rate
+    t = np.arange(duration)
+    tone = (8000 * np.sin(2 * np.pi * tone_hz * t / rate)).astype(np.int16)
+
+    # Referenzstärke: Fenster, das komplett im Ton liegt
+    reference = SpectralPlan(chunk, rate, 144)
+    reference.analyze(tone[:chunk])
+    threshold = reference.magnitudes[tone_bin] / 2
+
+    latencies = []
+    analysis_times = []
+    frame_samples = rate / fps
+    for _ in range(trials):
+        onset = int(rng.integers(rate // 2, rate))
+        signal = tone.copy()
+        signal[:onset] = rng.integers(-50, 50, onset)
+
+        ring = SampleRingBuffer(duration)
+        plan = SpectralPlan(chunk, rate, 144)
+        stft = StreamingSTFT(ring, plan, hop=hop)
+        next_frame = frame_samples
+        for block_end in range(block, duration + 1, block):
+            ring.write(signal[block_end - block:block_end])
+            detected = None
+            # Alle Render-Frames bis zum nächsten Audio-Block
+            while next_frame < block_end + block:
+                start = time.perf_counter()
+                if stft.update():
+                    analysis_times.append(time.perf_counter() - start)
+                    if stft.position > onset and plan.magnitudes[tone_bin] >= threshold:
+                        detected = next_frame
+                        break
+                next_frame += frame_samples
+            if detected is not None:
+                latencies.append((detected - onset) / rate)
+                break
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "chunk": chunk,
+        "hop": hop,
+        "spectra_per_s": rate / hop if hop else fps,
+        "latency_mean_ms": float(latencies.mean()),
+        "latency_p95_ms": float(np.percentile(latencies, 95)),
+        "analysis_us": float(np.mean(analysis_times) * 1e6),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk", type=int, default=2048)
+    parser.add_argument("--hop", type=int, default=256)
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--fps", type=float, default=100)
+    parser.add_argument("--trials", type=int, default=200)
+    args = parser.parse_args()
+
+    results = [
+        ("blocking (hop=chunk)", simulate(args.chunk, args.chunk, args.rate, args.fps, trials=args.trials)),
+        (f"stft (hop={args.hop})", simulate(args.chunk, args.hop, args.rate, args.fps, trials=args.trials)),
+        ("latest window per frame", simulate(args.chunk, None, args.rate, args.fps, trials=args.trials)),
+    ]
+    print(f"{'mode':<26}{'spectra/s':>10}{'mean ms':>10}{'p95 ms':>10}{'analysis us':>13}")
+    for name, r in results:
+        print(f"{name:<26}{r['spectra_per_s']:>10.1f}{r['latency_mean_ms']:>10.1f}"
+              f"{r['latency_p95_ms']:>10.1f}{r['analysis_us']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# synthetic_audio.py
+"""
+Audioquelle ohne Gerät für Benchmarks und Tests der Musik-Animationen.
+
+Eigenes Modul, weil animations.audio_capture pyaudio importiert: Wer nur die übrigen
+Animationen misst, braucht pyaudio nicht.
+"""
+import numpy as np
+from animations.audio_capture import AudioCaptureService
+
+
+class SyntheticAudioCapture(AudioCaptureService):
+    """Audioquelle ohne Gerät: liefert pro Frame `samples_per_frame` Samples Rauschen mit Beats."""
+
+    def __init__(self, rate=44100, samples_per_frame=441, seed=0):
+        super().__init__(device_index=None, rate=rate)
+        self.samples_per_frame = samples_per_frame
+        self._rng = np.random.default_rng(seed)
+        self._beat_interval = int(rate * 0.5)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def advance(self):
+        start = self.ring.written
+        block = self._rng.normal(0, 500, self.samples_per_frame)
+        offset = (-start) % self._beat_interval
+        if offset < self.samples_per_frame:
+            block[offset:] += self._rng.normal(0, 8000, self.samples_per_frame - offset)
+        self.ring.write(np.clip(block, -32768, 32767).astype(np.int16))
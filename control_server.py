@@ -0,0 +1,212 @@
+# control_server.py
+import json
+import asyncio
+import logging
+import threading
+from http import HTTPStatus
+
+logger = logging.getLogger("SK6812Control")
+
+MAX_BODY_SIZE = 64 * 1024
+
+
+class ControlError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ControlServer:
+    """
+    asyncio-Steuer-Server für den AnimationController, per HTTP+JSON und/oder Unix-Socket.
+
+    HTTP:
+        GET  /animations             Liste der Animationen
+        POST /animations/<key>/start Animation starten, optional {"transition_ms": 1000}
+        POST /stop                   Laufende Animation beenden
+        GET  /status                 Aktuelle Animation, Helligkeit und Frame-Statistik
+        GET  /settings               Animationseinstellungen
+        POST /settings               Felder ändern, z. B. {"speed": 20}
+        POST /brightness             {"brightness": 128}
+
+    Unix-Socket: eine JSON-Zeile pro Befehl, z. B. {"command": "start", "animation": "12"},
+    Antwort ebenfalls als JSON-Zeile. Befehle: animations, start, stop, status, settings,
+    update_settings (mit "values"), brightness (mit "brightness").
+
+    Unerwartete Fehler werden geloggt und als 500 bzw. {"ok": false, ...} beantwortet, die
+    Verbindung bleibt dabei nicht ohne Antwort.
+
+    Alle Controller-Aufrufe laufen in einem Executor-Thread, damit weder die Event-Loop noch
+    der Render-Thread blockiert werden.
+    """
+
+    def __init__(self, controller, host="127.0.0.1", port=8080, unix_socket=None):
+        self.controller = controller
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self._servers = []
+        self._loop = None
+        self._stopped = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        if self.port is not None:
+            server = await asyncio.start_server(self._handle_http, self.host, self.port)
+            self._servers.append(server)
+            logger.info(f"Control API listening on http://{self.host}:{server.sockets[0].getsockname()[1]}")
+        if self.unix_socket:
+            server = await asyncio.start_unix_server(self._handle_unix, self.unix_socket)
+            self._servers.append(server)
+            logger.info(f"Control API listening on {self.unix_socket}")
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._stopped.wait()
+        finally:
+            for server in self._servers:
+                server.close()
+                await server.wait_closed()
+            self._servers = []
+
+    def request_stop(self):
+        """Beendet serve_forever(), auch aus einem anderen Thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def run_in_thread(self):
+        """Startet den Server mit eigener Event-Loop in einem Daemon-Thread."""
+        thread = threading.Thread(target=asyncio.run, args=(self.serve_forever(),), name="control-server", daemon=True)
+        thread.start()
+        return thread
+
+    async def _call(self, function, *args):
+        return await self._loop.run_in_executor(None, function, *args)
+
+    async def dispatch(self, command, arguments):
+        controller = self.controller
+        try:
+            if command == "animations":
+                return await self._call(controller.list_animations)
+            if command == "start":
+                key = str(arguments.get("animation"))
+                if key not in controller.animations:
+                    raise ControlError(HTTPStatus.NOT_FOUND, f"Unknown animation: {key}")
+                transition_ms = arguments.get("transition_ms")
+                if transition_ms is not None:
+                    transition_ms = float(transition_ms)
+                if not await self._call(controller.start, key, transition_ms):
+                    raise ControlError(HTTPStatus.CONFLICT, f"Animation {key} could not be started")
+                return await self._call(controller.status)
+            if command == "stop":
+                await self._call(controller.stop)
+                return await self._call(controller.status)
+            if command == "status":
+                return await self._call(controller.status)
+            if command == "settings":
+                return await self._call(controller.get_settings)
+            if command == "update_settings":
+                return await self._call(controller.update_settings, arguments.get("values", {}))
+            if command == "brightness":
+                await self._call(controller.set_brightness, int(arguments.get("brightness")))
+                return await self._call(controller.status)
+        except (ValueError, TypeError) as e:
+            raise ControlError(HTTPStatus.BAD_REQUEST, str(e))
+        raise ControlError(HTTPStatus.NOT_FOUND, f"Unknown command: {command}")
+
+    @staticmethod
+    def _route(method, path, body):
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if method == "GET" and parts == ["animations"]:
+            return "animations", {}
+        if method == "POST" and len(parts) == 3 and parts[0] == "animations" and parts[2] == "start":
+            return "start", dict(body, animation=parts[1])
+        if method == "POST" and parts == ["stop"]:
+            return "stop", {}
+        if method == "GET" and parts in (["status"], ["stats"]):
+            return "status", {}
+        if parts == ["settings"]:
+            if method == "GET":
+                return "settings", {}
+            if method in ("POST", "PATCH"):
+                return "update_settings", {"values": body}
+        if method == "POST" and parts == ["brightness"]:
+            return "brightness", body
+        raise ControlError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+
+    async def _handle_http(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2:
+                return
+            method, path = request_line[0].upper(), request_line[1]
+
+            status = HTTPStatus.OK
+            try:
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    raise ControlError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+                if length > MAX_BODY_SIZE:
+                    raise ControlError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+                body = await reader.readexactly(length) if length else b""
+                try:
+                    arguments = json.loads(body) if body else {}
+                except ValueError:
+                    raise ControlError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON")
+                if not isinstance(arguments, dict):
+                    raise ControlError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+                result = await self.dispatch(*self._route(method, path, arguments))
+                payload = json.dumps(result).encode()
+            except ControlError as e:
+                status, payload = e.status, json.dumps({"error": str(e)}).encode()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception:
+                logger.exception(f"Control request {method} {path} failed")
+                status = HTTPStatus.INTERNAL_SERVER_ERROR
+                payload = json.dumps({"error": "Internal server error"}).encode()
+
+            writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                         f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_unix(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                    response = {"ok": True, "result": await self.dispatch(request.get("command"), request)}
+                    payload = json.dumps(response).encode()
+                except ValueError:
+                    payload = json.dumps({"ok": False, "error": "Request must be a JSON object"}).encode()
+                except ControlError as e:
+                    payload = json.dumps({"ok": False, "error": str(e)}).encode()
+                except Exception:
+                    logger.exception(f"Control command {line[:200]!r} failed")
+                    payload = json.dumps({"ok": False, "error": "Internal server error"}).encode()
+                writer.write(payload + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,200 @@
+# controller.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, fields
+from audio_devices import catalog as audio_devices
+from animations.tracing import tracer, ANIMATION_SWITCH
+
+logger = logging.getLogger("SK6812Controller")
+
+
+class _AnimationRun:
+    """Eine gestartete Animation mit eigener Ebene und eigenem Stop-Event."""
+
+    def __init__(self, key, future, stop_event, layer):
+        self.key = key
+        self.future = future
+        self.stop_event = stop_event
+        self.layer = layer
+
+    def stop(self):
+        self.stop_event.set()
+        try:
+            self.future.result()
+        except Exception:
+            pass  # bereits in _finished geloggt
+
+
+class AnimationController:
+    """
+    Startet und stoppt Animationen im Render-Thread und verwaltet die Animationseinstellungen.
+
+    Menü und Steuer-Server benutzen dieselbe Instanz. Die Methoden sind threadsicher; start()
+    und stop() warten, bis die laufende Animation beendet ist, und sollten aus asyncio-Code
+    daher über einen Executor aufgerufen werden.
+    """
+
+    def __init__(self, strip, settings, animations):
+        self.strip = strip
+        self.settings = settings
+        self.animations = animations
+        self.current = None
+        self._run = None
+        # Zwei Worker: bei Übergängen laufen alte und neue Animation kurz gleichzeitig
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="render")
+        self._lock = threading.RLock()
+        self._output_lock = threading.Lock()
+        self._loop_cache_configured = False
+
+    def list_animations(self):
+        return [{"key": key, "name": self.display_name(key)} for key in sorted(self.animations)]
+
+    def display_name(self, key):
+        return self.animations.entry(key).display_name
+
+    @property
+    def running(self):
+        return self._run is not None and not self._run.future.done()
+
+    def start(self, key, transition_ms=None):
+        """
+        Startet `key` und beendet die laufende Animation. Liefert False, wenn das nicht möglich ist.
+
+        Mit einer Übergangszeit (Standard aus transition.duration_ms) läuft die neue Animation
+        zuerst unsichtbar an, bis ihr erster Frame fertig ist, und wird dann aus dem laufenden Bild
+        eingeblendet; 0 schaltet sofort um.
+        """
+        if key not in self.animations:
+            raise KeyError(f"Unknown animation: {key}")
+        with self._lock:
+            prepared = self._prepare(key)
+            if prepared is None:
+                return False
+            transition = self.settings.transition_config
+            duration = (transition.duration_ms if transition_ms is None else transition_ms) / 1000.0
+            previous = self._run
+            if previous is None or previous.future.done() or duration <= 0:
+                self.stop()
+                self._run = self._launch(key, *prepared, passthrough=True)
+                return True
+
+            run = self._launch(key, *prepared, passthrough=False)
+            if not run.layer.shown.wait(transition.warmup_timeout):
+                logger.warning(f"Animation {key} not ready after {transition.warmup_timeout} s, fading anyway")
+            from animations.transitions import crossfade
+            crossfade(self.strip, previous.layer, run.layer, duration, transition.fps, self._output_lock)
+            self._run = run
+            previous.stop()
+            return True
+
+    def _prepare(self, key):
+        entry = self.animations.entry(key)
+        animation_args = []
+
+        # Musik-synchronisierte Animationen brauchen ein Audio-Eingabegerät
+        if int(key) >= 50:
+            # Aus dem Gerätekatalog, nur beim ersten Mal wird PortAudio initialisiert. Über den
+            # Namen aufgelöst, weil sich Indizes nach einem neuen Durchsuchen ändern können.
+            device = audio_devices.resolve(self.settings.audio_device_name, self.settings.selected_audio_device_index)
+            if device is None:
+                logger.warning("No audio devices available.")
+                return None
+            if self.settings.selected_audio_device is None and self.settings.audio_device_name is None:
+                logger.info(f"Audio device {device['name']} selected. Choose another one from the options menu.")
+            self.settings.selected_audio_device = device
+            animation_args.append(device)
+
+        # Verwende die allgemeinen Animationseinstellungen für alle Animationen
+        animation_kwargs = dict(self.settings.animation_settings.to_kwargs())
+        animation_kwargs["live_parameters"] = self.settings.live_parameters
+        if entry.function_name == "run_light_show_playback":
+            recording_config = self.settings.recording_config
+            animation_kwargs.update(path=recording_config.playback_file, loop=recording_config.loop)
+        elif entry.function_name == "run_network_input":
+            animation_kwargs.update(asdict(self.settings.network_input_config))
+
+        # Die Render-Engine (und mit ihr numpy) wird erst beim ersten Start gebraucht
+        if not self._loop_cache_configured:
+            from animations.loop_cache import configure_loop_cache
+            configure_loop_cache(self.settings.loop_cache_mb)
+            self._loop_cache_configured = True
+
+        # Importiert das Modul der Animation beim ersten Start
+        return entry.load(), animation_args, entry.bind_kwargs(animation_kwargs)
+
+    def _launch(self, key, animation_function, animation_args, animation_kwargs, passthrough):
+        from animations.transitions import LayerStrip
+        layer = LayerStrip(self.strip, self._output_lock, passthrough)
+        stop_event = threading.Event()
+        tracer.record(ANIMATION_SWITCH, int(key), label=animation_function.__name__)
+        future = self._executor.submit(animation_function, layer, stop_event, *animation_args, **animation_kwargs)
+        future.add_done_callback(self._finished)
+        self.current = key
+        return _AnimationRun(key, future, stop_event, layer)
+
+    def _finished(self, future):
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Animation failed: {error}", exc_info=error)
+
+    def stop(self):
+        """Beendet die laufende Animation und wartet darauf."""
+        with self._lock:
+            if self._run is not None:
+                self._run.stop()
+                self._run = None
+            self.current = None
+
+    def set_brightness(self, brightness):
+        if not 0 <= brightness <= 255:
+            raise ValueError("Brightness must be between 0 and 255")
+        self.strip.setBrightness(brightness)
+        self.strip.show()
+        logger.info(f"Brightness set to {brightness}")
+
+    def get_settings(self):
+        return dict(self.settings.animation_settings.to_kwargs())
+
+    def update_settings(self, values):
+        """
+        Setzt Felder von AnimationSettings. Werte werden in den Feldtyp umgewandelt; unbekannte
+        Felder oder ungültige Werte lösen ValueError aus, ohne dass etwas geändert wird.
+        Animationen mit LiveParameters übernehmen die Änderung ab dem nächsten Frame.
+        """
+        if not isinstance(values, dict):
+            raise ValueError("Settings must be given as an object of field names and values")
+        animation_settings = self.settings.animation_settings
+        types = {field.name: field.type for field in fields(animation_settings)}
+        converted = {}
+        for name, value in values.items():
+            if name not in types:
+                raise ValueError(f"Unknown animation setting: {name}")
+            field_type = types[name]
+            if field_type in (int, float, str, bool) and value is not None:
+                try:
+                    value = field_type(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid value for {name}: {value!r}")
+            converted[name] = value
+        self.settings.update_animation_settings(**converted)
+        logger.info(f"Animation settings changed: {converted}")
+        return self.get_settings()
+
+    def status(self):
+        run = self._run
+        stats = None
+        if run is not None:
+            from animations.animation_utils import get_frame_stats
+            stats = get_frame_stats(run.layer)
+        return {
+            "animation": self.current,
+            "name": self.display_name(self.current) if self.current else None,
+            "running": self.running,
+            "brightness": self.strip.getBrightness(),
+            "stats": stats.snapshot() if stats is not None and self.running else None,
+        }
+
+    def shutdown(self):
+        self.stop()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,135 @@
+# led_backend.py
+import time
+import logging
+from collections import deque
+from types import SimpleNamespace
+
+try:
+    from rpi_ws281x import Adafruit_NeoPixel, Color, ws
+except ImportError:
+    # Ohne rpi_ws281x (z. B. auf einem x86-Rechner) steht nur das virtuelle Backend zur Verfügung
+    Adafruit_NeoPixel = None
+
+    def Color(red, green, blue, white=0):
+        """Packt R, G, B, W wie rpi_ws281x.Color in einen 32-Bit-Wert."""
+        return (white << 24) | (red << 16) | (green << 8) | blue
+
+    # Streifentypen aus ws2811.h
+    ws = SimpleNamespace(
+        WS2811_STRIP_RGB=0x00100800,
+        WS2811_STRIP_RBG=0x00100008,
+        WS2811_STRIP_GRB=0x00081000,
+        WS2811_STRIP_GBR=0x00080010,
+        WS2811_STRIP_BRG=0x00001008,
+        WS2811_STRIP_BGR=0x00000810,
+        SK6812_STRIP_RGBW=0x18100800,
+        SK6812_STRIP_GRBW=0x18081000,
+    )
+
+logger = logging.getLogger("SK6812Backend")
+
+
+class VirtualStrip:
+    """
+    Software-Streifen mit der Schnittstelle von Adafruit_NeoPixel.
+
+    Die Pixel liegen in einem uint32-Array. show() übernimmt den aktuellen Stand als Frame,
+    zeichnet auf Wunsch die letzten `record_frames` Frames auf und misst die Dauer der
+    show()-Aufrufe. Mit simulate_timing=True blockiert show() so lange wie die Datenübertragung
+    an echte SK6812/WS281x-LEDs (1,25 µs pro Bit plus Reset), damit Messungen realistisch bleiben.
+    """
+
+    def __init__(self, num, brightness=255, strip_type=None, record_frames=0, simulate_timing=False):
+        import numpy as np  # erst hier, damit der Programmstart mit echtem Streifen ohne numpy auskommt
+        self.pixels = np.zeros(num, dtype=np.uint32)
+        self.brightness = brightness
+        self.strip_type = strip_type
+        self.simulate_timing = simulate_timing
+        self.frames = deque(maxlen=record_frames) if record_frames else None
+        self.show_count = 0
+        self.show_time = 0.0
+        self.last_show_duration = 0.0
+        # Optionaler Callback on_show(strip) nach jedem show(), z. B. für Testläufe
+        self.on_show = None
+
+        bits_per_pixel = 32 if strip_type is not None and strip_type & 0x18000000 else 24
+        self._transfer_time = num * bits_per_pixel * 1.25e-6 + 300e-6
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def setPixelColor(self, n, color):
+        self.pixels[n] = color
+
+    def setPixelColorRGB(self, n, red, green, blue, white=0):
+        self.pixels[n] = Color(red, green, blue, white)
+
+    def getPixelColor(self, n):
+        return int(self.pixels[n])
+
+    def set_pixels(self, pixels, start=0):
+        """Bulk-Schreibzugriff für FrameBuffer.push(): schreibt `pixels` ab Position `start`."""
+        n = min(len(pixels), len(self.pixels) - start)
+        self.pixels[start:start + n] = pixels[:n]
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def getBrightness(self):
+        return self.brightness
+
+    def show(self):
+        start = time.perf_counter()
+        if self.frames is not None:
+            self.frames.append(self.pixels.copy())
+        if self.simulate_timing:
+            time.sleep(self._transfer_time)
+        self.last_show_duration = time.perf_counter() - start
+        self.show_time += self.last_show_duration
+        self.show_count += 1
+        if self.on_show is not None:
+            self.on_show(self)
+
+    @property
+    def last_frame(self):
+        return self.frames[-1] if self.frames else None
+
+
+def _create_ws281x_strip(led_config):
+    if Adafruit_NeoPixel is None:
+        raise RuntimeError("rpi_ws281x is not installed. Set led_config.backend to 'virtual' to run without LED hardware.")
+    return Adafruit_NeoPixel(
+        led_config.count, led_config.pin, led_config.freq_hz, led_config.dma, led_config.invert,
+        led_config.brightness, led_config.channel, led_config.strip_type
+    )
+
+
+def _create_virtual_strip(led_config):
+    return VirtualStrip(led_config.count, led_config.brightness, led_config.strip_type)
+
+
+# Verfügbare Ausgabe-Backends: Name -> Fabrikfunktion(led_config), die ein Objekt mit
+# numPixels, setPixelColor, setPixelColorRGB, getPixelColor, show, setBrightness und begin liefert
+BACKENDS = {
+    "rpi_ws281x": _create_ws281x_strip,
+    "virtual": _create_virtual_strip,
+}
+
+
+def register_backend(name, factory):
+    """Registriert ein zusätzliches Ausgabe-Backend unter `name`."""
+    BACKENDS[name] = factory
+
+
+def create_strip(led_config):
+    """Erstellt und initialisiert den LED-Streifen für das in led_config.backend gewählte Backend."""
+    factory = BACKENDS.get(led_config.backend)
+    if factory is None:
+        raise ValueError(f"Unknown LED backend: {led_config.backend} (available: {', '.join(BACKENDS)})")
+    strip = factory(led_config)
+    strip.begin()
+    logger.info(f"Using '{led_config.backend}' LED backend with {led_config.count} pixels")
+    return strip
@@ -0,0 +1,137 @@
+# registry.py
+import importlib
+from collections.abc import Mapping
+import animations as animation_package
+
+# Menünummer -> Name der Animationsfunktion. Das Modul, das sie definiert, wird erst beim
+# ersten Start der Animation importiert; für das Menü reichen die Namen.
+ANIMATIONS = {
+    "1": "run_rainbow_animation",
+    "2": "run_blink_animation",
+    "3": "run_fade_animation",
+    "4": "run_color_wipe_animation",
+    "5": "run_theater_chase_animation",
+    "6": "run_pulse_animation",
+    "7": "run_twinkle_animation",
+    "8": "run_wave_animation",
+    "9": "run_firework_animation",
+    "10": "run_meteor_animation",
+    "11": "run_larson_scanner_animation",
+    "12": "run_comet_animation",
+    "13": "run_bouncing_balls_animation",
+    "14": "run_soft_white_pulse_animation",
+    "15": "run_warm_white_fade_animation",
+    "16": "run_rainbow_with_white_flash_animation",
+    "17": "run_cool_white_twinkle_animation",
+    "18": "run_white_comet_animation",
+    "19": "run_aurora_borealis_animation",
+    "20": "run_fireplace_animation",
+    "21": "run_comet_rain_animation",
+    "22": "run_lightning_storm_animation",
+    "23": "run_pixel_explosion_animation",
+    "24": "run_strobe_effect",
+    "25": "run_holiday_twinkle_animation",
+    "26": "run_lava_explosion_animation",
+    "29": "run_random_sparkles_animation",
+    "30": "run_random_meteor_shower_animation",
+    "32": "run_random_white_strobes_animation",
+    "33": "run_random_color_shifts_animation",
+    "34": "run_random_walk_animation",
+    "35": "run_random_glitter_animation",
+    # Aufzeichnungen
+    "40": "run_light_show_playback",
+    # Netzwerk (E1.31/sACN, Art-Net)
+    "41": "run_network_input",
+    # Mehrere Ebenen
+    "42": "run_fireplace_glitter_composition",
+    # music sync
+    "50": "run_music_synchronized_wave",
+    "51": "run_frequency_bands_gradient",
+    "52": "run_beat_pulse_animation",
+    "53": "run_wave_ripple_effect",
+}
+
+
+class AnimationEntry:
+    """
+    Eintrag der Registry: Funktionsname, Anzeigename und die bei Bedarf geladene Funktion.
+
+    Die Parameterliste wird beim ersten bind_kwargs() einmal ermittelt und zwischengespeichert.
+    """
+
+    __slots__ = ("key", "function_name", "_function", "_parameters")
+
+    def __init__(self, key, function_name):
+        self.key = key
+        self.function_name = function_name
+        self._function = None
+        self._parameters = None
+
+    @property
+    def display_name(self):
+        return self.function_name.replace("_", " ").title()
+
+    @property
+    def module_name(self):
+        return animation_package.find_module(self.function_name)
+
+    @property
+    def loaded(self):
+        return self._function is not None
+
+    def load(self):
+        """Importiert das Modul der Animation (beim ersten Aufruf) und liefert die Funktion."""
+        if self._function is None:
+            module_name = self.module_name
+            if module_name is None:
+                raise LookupError(f"Animation function {self.function_name} not found in package animations")
+            module = importlib.import_module(f"{animation_package.__name__}.{module_name}")
+            self._function = getattr(module, self.function_name)
+        return self._function
+
+    def bind_kwargs(self, kwargs):
+        """
+        Nur die Einträge aus `kwargs`, die die Animation als Parameter annimmt (alle bei **kwargs).
+        Werte None bedeuten "nicht gesetzt" und werden weggelassen, damit die Vorgabe der
+        Funktion gilt.
+        """
+        kwargs = {name: value for name, value in kwargs.items() if value is not None}
+        if self._parameters is None:
+            import inspect  # nur beim ersten Start einer Animation gebraucht
+            parameters = inspect.signature(self.load()).parameters
+            if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters.values()):
+                self._parameters = True
+            else:
+                self._parameters = frozenset(parameters)
+        if self._parameters is True:
+            return kwargs
+        return {name: value for name, value in kwargs.items() if name in self._parameters}
+
+
+class AnimationRegistry(Mapping):
+    """
+    Menünummer -> Animationsfunktion, wie das frühere dict, aber mit Import erst beim Zugriff.
+
+    Iteration, `in` und entry() kommen ohne Import aus; registry[key] lädt die Funktion.
+    """
+
+    def __init__(self, function_names):
+        self._entries = {key: AnimationEntry(key, name) for key, name in function_names.items()}
+
+    def entry(self, key):
+        return self._entries[key]
+
+    def __getitem__(self, key):
+        return self._entries[key].load()
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+animations = AnimationRegistry(ANIMATIONS)
@@ -2,7 +2,8 @@
 
 from dataclasses import dataclass
 import yaml
-from rpi_ws281x import Color, ws
+from led_backend import Color, ws
+from animations.live_parameters import LiveParameters
 import os
 os.environ['PYTHONWARNINGS'] = 'ignore'
 
@@ -32,6 +33,47 @@ class LEDConfig:
     brightness: int = 255
     channel: int = 0
     strip_type: str = "WS2811_STRIP_GRB"
+    backend: str = "rpi_ws281x"  # "rpi_ws281x" für echte LEDs, "virtual" ohne Hardware
+
+@dataclass
+class DebugConfig:
+    log_level: str = "DEBUG"
+    trace: bool = False  # Ereignis-Tracer (Frames, Audio, Beats) einschalten
+    trace_capacity: int = 65536  # Anzahl Ereignisse im Ringpuffer
+    trace_file: str = "trace.json"  # Chrome-trace_event-Ausgabe beim Beenden
+
+@dataclass
+class RecordingConfig:
+    record: bool = False  # Ausgabe aller Animationen aufzeichnen
+    record_file: str = "recording.skls"
+    fps: float = 50.0  # Bildrate der Aufzeichnung
+    playback_file: str = "recording.skls"  # Datei für die Wiedergabe-Animation
+    loop: bool = True
+
+@dataclass
+class NetworkInputConfig:
+    protocols: tuple = ("e131", "artnet")
+    start_universe: int = 1  # E1.31 zählt ab 1
+    artnet_start_universe: int = 0  # Art-Net zählt ab 0
+    channels_per_pixel: int = 4  # 4 = RGBW, 3 = RGB
+    universe_pixels: int = None  # Standard: so viele Pixel, wie in 512 Kanäle passen
+    multicast: bool = True  # sACN-Multicastgruppen abonnieren
+    max_fps: float = 100
+    loss_timeout: float = 2.5  # Sekunden ohne Pakete bis zum Abschalten, 0 = letzten Stand halten
+
+@dataclass
+class ControlConfig:
+    enabled: bool = False  # Steuer-API (HTTP+JSON und/oder Unix-Socket) starten
+    host: str = "127.0.0.1"
+    port: int = 8080  # None = kein HTTP
+    unix_socket: str = None  # z. B. /tmp/sk6812.sock
+    headless: bool = False  # True: kein Terminal-Menü, nur Steuer-API
+
+@dataclass
+class TransitionConfig:
+    duration_ms: int = 500  # Überblendzeit beim Wechsel der Animation, 0 = sofort umschalten
+    fps: float = 60
+    warmup_timeout: float = 2.0  # Höchstens so lange auf den ersten Frame der neuen Animation warten
 
 def map_strip_type(strip_type_str, default):
     """
@@ -75,23 +117,94 @@ class SettingsManager:
         self.config_path = config_path
         self.led_config = None
         self.animation_settings = AnimationSettings()
+        # Laufende Animationen lesen Änderungen pro Frame aus diesem Snapshot. Er enthält nur die
+        # zur Laufzeit geänderten Werte, sonst gelten die Argumente der jeweiligen Animation.
+        self.live_parameters = LiveParameters()
+        self.debug_config = DebugConfig()
+        self.loop_cache_mb = 64
+        self.recording_config = RecordingConfig()
+        self.network_input_config = NetworkInputConfig()
+        self.control_config = ControlConfig()
+        self.transition_config = TransitionConfig()
         self.selected_audio_device = None
+        self.audio_device_name = None
+        self.selected_audio_device_index = None
 
         # Lade die LED-Konfiguration
         self.load_config()
 
     def load_config(self):
-        # Load configuration from YAML file
-        config_data = self._load_yaml(self.config_path)
+        # Load configuration from YAML file (eine leere Datei ergibt None)
+        config_data = self._load_yaml(self.config_path) or {}
 
         # Map string strip type to corresponding constant value
-        strip_type = map_strip_type(config_data["led_config"]["strip_type"], ws.WS2811_STRIP_GRB)
-        config_data["led_config"]["strip_type"] = strip_type  # Sicherstellen, dass der strip_type korrekt gemappt wird
-        self.led_config = LEDConfig(**config_data["led_config"])
+        led_config = self._section(config_data, "led_config")
+        led_config["strip_type"] = map_strip_type(led_config.get("strip_type"), ws.WS2811_STRIP_GRB)  # Sicherstellen, dass der strip_type korrekt gemappt wird
+        self.led_config = LEDConfig(**led_config)
+
+        # Logging und Tracing
+        self.debug_config = DebugConfig(**self._section(config_data, "debug"))
 
-        # Load default audio device index
+        # Speicherbudget für vorgerenderte Animationsperioden
+        self.loop_cache_mb = config_data.get("loop_cache_mb", 64)
+
+        # Aufzeichnung und Wiedergabe von Lightshows
+        self.recording_config = RecordingConfig(**self._section(config_data, "recording"))
+
+        # Empfang von E1.31/Art-Net
+        self.network_input_config = NetworkInputConfig(**self._section(config_data, "network_input"))
+
+        # Steuer-API
+        self.control_config = ControlConfig(**self._section(config_data, "control"))
+
+        # Überblendung beim Wechsel
+        self.transition_config = TransitionConfig(**self._section(config_data, "transition"))
+
+        # Audio-Eingabegerät: bevorzugt per Name (stabil), sonst per Index
+        self.audio_device_name = config_data.get("audio_device")
         self.selected_audio_device_index = config_data.get("audio_device_index", 0)
 
+    def select_audio_device(self, device):
+        """Übernimmt ein Gerät aus dem Audio-Gerätekatalog und speichert seinen Namen in der Konfiguration."""
+        self.selected_audio_device = device
+        self.audio_device_name = device["name"]
+        self.selected_audio_device_index = device["index"]
+        self._save_value("audio_device", device["name"])
+
+    def update_animation_settings(self, **values):
+        """Ändert Animationseinstellungen und gibt sie sofort an die laufende Animation weiter."""
+        for name, value in values.items():
+            setattr(self.animation_settings, name, value)
+        self.live_parameters.publish(**values)
+
+    def _save_value(self, key, value):
+        """
+        Setzt einen Eintrag auf oberster Ebene der YAML-Datei. Nur die betroffene Zeile wird
+        ersetzt (oder angehängt), damit Kommentare und Reihenfolge erhalten bleiben.
+        """
+        line = yaml.safe_dump({key: value}, allow_unicode=True, default_flow_style=False, width=1000)
+        with open(self.config_path, "r") as f:
+            lines = f.readlines()
+        for i, existing in enumerate(lines):
+            if existing.startswith(f"{key}:"):
+                comment = existing.find("  #")
+                lines[i] = line if comment < 0 else line.rstrip("\n") + existing[comment:]
+                break
+        else:
+            if lines and not lines[-1].endswith("\n"):
+                lines[-1] += "\n"
+            lines.append(line)
+        with open(self.config_path, "w") as f:
+            f.writelines(lines)
+
+    @staticmethod
+    def _section(config_data, name):
+        """
+        Abschnitt `name` der Konfiguration als dict. Ein fehlender oder leerer Abschnitt (z. B.
+        "recording:" ohne Einträge, von YAML als None gelesen) ergibt {}, also die Vorgaben.
+        """
+        return dict(config_data.get(name) or {})
+
     @staticmethod
     def _load_yaml(path):
         with open(path, "r") as f:
@@ -0,0 +1,69 @@
+# test_control_server.py
+#
+# Aus dem Projektverzeichnis: python -m pytest tests
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from control_server import ControlServer
+
+
+class _FailingController:
+    """Controller-Attrappe, deren status() mit einem unerwarteten Fehler abbricht."""
+
+    animations = {"1": "run_rainbow_animation"}
+
+    def list_animations(self):
+        return {"1": "Run Rainbow Animation"}
+
+    def status(self):
+        raise RuntimeError("status failed")
+
+
+class ControlServerErrorTest(unittest.IsolatedAsyncioTestCase):
+    """Unerwartete Fehler werden beantwortet (500 bzw. "ok": false), statt die Verbindung zu schließen."""
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.unix_socket = os.path.join(self.tmpdir.name, "control.sock")
+        self.server = ControlServer(_FailingController(), port=0, unix_socket=self.unix_socket)
+        await self.server.start()
+        self.port = self.server._servers[0].sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        for server in self.server._servers:
+            server.close()
+            await server.wait_closed()
+        self.tmpdir.cleanup()
+
+    async def _http_get(self, path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.decode().partition("\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+
+    async def test_http_internal_error(self):
+        with self.assertLogs("SK6812Control", "ERROR"):
+            status, body = await self._http_get("/status")
+        self.assertEqual(500, status)
+        self.assertIn("error", body)
+        self.assertEqual((200, {"1": "Run Rainbow Animation"}), await self._http_get("/animations"))
+
+    async def test_unix_socket_internal_error(self):
+        reader, writer = await asyncio.open_unix_connection(self.unix_socket)
+        with self.assertLogs("SK6812Control", "ERROR"):
+            writer.write(b'{"command": "status"}\n')
+            failed = json.loads(await reader.readline())
+        writer.write(b'{"command": "animations"}\n')
+        answered = json.loads(await reader.readline())
+        writer.close()
+        self.assertFalse(failed["ok"])
+        self.assertIn("error", failed)
+        self.assertTrue(answered["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# test_controller.py
+#
+# Aus dem Projektverzeichnis: python -m pytest tests
+import logging
+import os
+import tempfile
+import threading
+import unittest
+from dataclasses import replace
+from unittest import mock
+import numpy as np
+from led_backend import VirtualStrip
+from settings import SettingsManager
+from controller import AnimationController
+from registry import animations
+
+try:
+    import pyaudio  # noqa: F401
+    HAVE_PYAUDIO = True
+except ImportError:
+    HAVE_PYAUDIO = False
+
+MUSIC_KEY_START = 50
+
+
+class _ErrorRecords(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class AnimationControllerTest(unittest.TestCase):
+    """Startet jede Animation der Registry über den Controller, wie Menü und Steuer-API."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.settings = SettingsManager.get_instance()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.num_pixels = 60
+
+        # Kurze Aufzeichnung für die Wiedergabe (Eintrag 40)
+        from animations.recording import LightShowRecorder
+        playback_file = os.path.join(cls.tmpdir.name, "test.skls")
+        with LightShowRecorder(playback_file, cls.num_pixels, fps=50.0) as recorder:
+            for i in range(10):
+                recorder.write_frame(np.full(cls.num_pixels, i * 1000, dtype=np.uint32))
+        cls.recording_config = cls.settings.recording_config
+        cls.settings.recording_config = replace(cls.recording_config, playback_file=playback_file)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.recording_config = cls.recording_config
+        cls.tmpdir.cleanup()
+
+    def setUp(self):
+        self.errors = _ErrorRecords()
+        logging.getLogger().addHandler(self.errors)
+        self.controller = AnimationController(VirtualStrip(self.num_pixels), self.settings, animations)
+
+    def tearDown(self):
+        self.controller.shutdown()
+        logging.getLogger().removeHandler(self.errors)
+
+    def _start_and_stop(self, key):
+        self.assertTrue(self.controller.start(key, transition_ms=0))
+        run = self.controller._run
+        # Warten, bis die Animation etwas angezeigt hat (Netzwerkeingang ohne Sender zeigt nichts)
+        run.layer.shown.wait(1.0)
+        threading.Event().wait(0.2)
+        self.controller.stop()
+        self.assertIsNone(run.future.exception())
+
+    def test_start_every_animation(self):
+        for key in sorted(animations, key=int):
+            with self.subTest(key=key, name=animations.entry(key).function_name):
+                if int(key) >= MUSIC_KEY_START:
+                    if not HAVE_PYAUDIO:
+                        self.skipTest("pyaudio not installed")
+                    from animations.audio_capture import install_audio_capture
+                    from benchmarks.synthetic_audio import SyntheticAudioCapture
+                    install_audio_capture(SyntheticAudioCapture())
+                    device = {"index": None, "name": "synthetic"}
+                    with mock.patch("controller.audio_devices.resolve", return_value=device):
+                        self._start_and_stop(key)
+                else:
+                    self._start_and_stop(key)
+                errors = [record.getMessage() for record in self.errors.records]
+                self.errors.records.clear()
+                self.assertEqual([], errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# test_loop_cache.py
+#
+# Aus dem Projektverzeichnis: python -m pytest tests
+import threading
+import unittest
+import numpy as np
+from led_backend import VirtualStrip
+from animations.loop_cache import CachedLoop, LoopCache, run_cached_loop_animation
+
+
+def _loop(num_frames, num_pixels=4):
+    return CachedLoop(np.zeros((num_frames, num_pixels), dtype=np.uint32), np.arange(num_frames, dtype=np.uint16))
+
+
+class LoopCacheTest(unittest.TestCase):
+    """LRU-Verdrängung und Speicherbudget des LoopCache."""
+
+    def test_evicts_least_recently_used(self):
+        size = _loop(2).nbytes
+        cache = LoopCache(budget_bytes=2 * size)
+        self.assertTrue(cache.put("a", _loop(2)))
+        self.assertTrue(cache.put("b", _loop(2)))
+        self.assertIsNotNone(cache.get("a"))  # "a" ist jetzt der zuletzt benutzte Eintrag
+        self.assertTrue(cache.put("c", _loop(2)))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(2 * size, cache.used_bytes)
+
+    def test_replacing_a_key_keeps_the_byte_count(self):
+        cache = LoopCache(budget_bytes=10 * _loop(2).nbytes)
+        cache.put("a", _loop(2))
+        cache.put("a", _loop(3))
+        self.assertEqual(1, len(cache))
+        self.assertEqual(_loop(3).nbytes, cache.used_bytes)
+
+    def test_rejects_entries_larger_than_the_budget(self):
+        cache = LoopCache(budget_bytes=_loop(2).nbytes)
+        cache.put("a", _loop(2))
+        self.assertFalse(cache.put("big", _loop(3)))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(0, cache.evictions)
+
+    def test_resize_evicts_immediately(self):
+        size = _loop(2).nbytes
+        cache = LoopCache(budget_bytes=3 * size)
+        for key in "abc":
+            cache.put(key, _loop(2))
+        cache.resize(size)
+        self.assertEqual(["c"], [key for key in "abc" if cache.get(key) is not None])
+        self.assertEqual(size, cache.used_bytes)
+
+
+class CachedLoopAnimationTest(unittest.TestCase):
+    """run_cached_loop_animation zeigt mit und ohne Cache dieselben Frames."""
+
+    num_pixels = 8
+    frame_count = 5
+
+    def _run(self, cache, shows=12):
+        # Platz auch für das abschließende Löschen beim Beenden
+        strip = VirtualStrip(self.num_pixels, record_frames=shows + 1)
+        stop_event = threading.Event()
+        rendered = []
+
+        def render_frame(index, pixels):
+            rendered.append(index)
+            pixels[:] = np.arange(self.num_pixels) + 100 * index
+
+        def on_show(s):
+            if s.show_count >= shows:
+                stop_event.set()
+
+        strip.on_show = on_show
+        run_cached_loop_animation(strip, stop_event, ("test",), self.frame_count, render_frame,
+                                  update_speed=1, cache=cache)
+        return [frame.copy() for frame in strip.frames][:shows], rendered
+
+    def test_cached_loop_renders_each_frame_once(self):
+        cache = LoopCache()
+        frames, rendered = self._run(cache)
+        self.assertEqual(list(range(self.frame_count)), rendered)
+        self.assertEqual(1, len(cache))
+        for tick, frame in enumerate(frames):
+            np.testing.assert_array_equal(np.arange(self.num_pixels) + 100 * (tick % self.frame_count), frame)
+
+    def test_over_budget_loop_renders_live(self):
+        cached_frames, _ = self._run(LoopCache())
+        cache = LoopCache(budget_bytes=self.num_pixels * 4)  # nur ein Einzelbild passt hinein
+        live_frames, rendered = self._run(cache)
+        self.assertEqual(0, len(cache))
+        self.assertGreater(len(rendered), self.frame_count)
+        np.testing.assert_array_equal(np.array(cached_frames), np.array(live_frames))
+
+
+if __name__ == "__main__":
+    unittest.main()
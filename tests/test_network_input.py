@@ -0,0 +1,118 @@
+# test_network_input.py
+#
+# Aus dem Projektverzeichnis: python -m pytest tests
+import unittest
+import numpy as np
+from animations.animation_utils import FrameBuffer
+from animations.network_input import (DmxReceiver, build_artnet_packet, build_e131_packet,
+                                      E131_OPTION_PREVIEW, E131_OPTION_TERMINATED)
+
+
+def _rgbw(r, g, b, w, pixels):
+    return bytes([r, g, b, w]) * pixels
+
+
+class DmxReceiverTest(unittest.TestCase):
+    """Auswertung von E1.31- und Art-Net-Paketen, ohne Sockets (protocols=())."""
+
+    num_pixels = 200  # zwei Universen à 128 RGBW-Pixel
+
+    def setUp(self):
+        self.receiver = DmxReceiver(self.num_pixels, protocols=())
+        self.frame = FrameBuffer(self.num_pixels)
+
+    def tearDown(self):
+        self.receiver.close()
+
+    def e131(self, universe, data, sequence=1, options=0):
+        packet = build_e131_packet(universe, data, sequence, options=options)
+        return self.receiver._handle_e131(memoryview(packet), self.frame.channels)
+
+    def artnet(self, universe, data, sequence=1):
+        packet = build_artnet_packet(universe, data, sequence)
+        return self.receiver._handle_artnet(memoryview(packet), self.frame.channels)
+
+    def test_e131_universes_start_at_one(self):
+        self.assertTrue(self.e131(1, _rgbw(1, 2, 3, 4, 128)))
+        self.assertTrue(self.e131(2, _rgbw(5, 6, 7, 8, 72)))
+        self.assertEqual(0x04010203, self.frame.pixels[0])
+        self.assertEqual(0x04010203, self.frame.pixels[127])
+        self.assertEqual(0x08050607, self.frame.pixels[128])
+        self.assertEqual(0x08050607, self.frame.pixels[199])
+        self.assertFalse(self.e131(0, _rgbw(9, 9, 9, 9, 1)))
+        self.assertFalse(self.e131(3, _rgbw(9, 9, 9, 9, 1)))
+        self.assertEqual(2, self.receiver.ignored)
+
+    def test_artnet_universes_start_at_zero(self):
+        self.assertTrue(self.artnet(0, _rgbw(1, 2, 3, 4, 128)))
+        self.assertTrue(self.artnet(1, _rgbw(5, 6, 7, 8, 72)))
+        self.assertEqual(0x04010203, self.frame.pixels[0])
+        self.assertEqual(0x08050607, self.frame.pixels[128])
+        self.assertFalse(self.artnet(2, _rgbw(9, 9, 9, 9, 1)))
+
+    def test_artnet_start_universe_is_separate_from_e131(self):
+        receiver = DmxReceiver(self.num_pixels, protocols=(), start_universe=10, artnet_start_universe=4)
+        try:
+            channels = self.frame.channels
+            self.assertTrue(receiver._handle_artnet(memoryview(build_artnet_packet(4, _rgbw(1, 0, 0, 0, 1))), channels))
+            self.assertTrue(receiver._handle_e131(memoryview(build_e131_packet(11, _rgbw(0, 1, 0, 0, 1))), channels))
+            self.assertEqual(0x00010000, self.frame.pixels[0])
+            self.assertEqual(0x00000100, self.frame.pixels[128])
+        finally:
+            receiver.close()
+
+    def test_rgb_channels(self):
+        receiver = DmxReceiver(10, protocols=(), channels_per_pixel=3)
+        try:
+            frame = FrameBuffer(10)
+            packet = build_e131_packet(1, bytes([10, 20, 30]) * 10)
+            self.assertTrue(receiver._handle_e131(memoryview(packet), frame.channels))
+            self.assertEqual(0x000A141E, frame.pixels[9])
+        finally:
+            receiver.close()
+
+    def test_e131_rejects_stale_sequence_numbers(self):
+        self.assertTrue(self.e131(1, _rgbw(1, 1, 1, 1, 1), sequence=10))
+        self.assertFalse(self.e131(1, _rgbw(2, 2, 2, 2, 1), sequence=10))
+        self.assertFalse(self.e131(1, _rgbw(2, 2, 2, 2, 1), sequence=5))
+        self.assertEqual(0x01010101, self.frame.pixels[0])
+        # Sequenznummern pro Universum; 20 und mehr zurück gilt als Neustart der Quelle
+        self.assertTrue(self.e131(2, _rgbw(3, 3, 3, 3, 1), sequence=5))
+        self.assertTrue(self.e131(1, _rgbw(4, 4, 4, 4, 1), sequence=245))
+        self.assertTrue(self.e131(1, _rgbw(5, 5, 5, 5, 1), sequence=3))  # Überlauf 255 -> 0
+        self.assertEqual(0x05050505, self.frame.pixels[0])
+        self.assertEqual(2, self.receiver.out_of_order)
+
+    def test_artnet_sequence_zero_disables_the_check(self):
+        self.assertTrue(self.artnet(0, _rgbw(1, 1, 1, 1, 1), sequence=0))
+        self.assertTrue(self.artnet(0, _rgbw(2, 2, 2, 2, 1), sequence=0))
+        self.assertTrue(self.artnet(0, _rgbw(3, 3, 3, 3, 1), sequence=7))
+        self.assertFalse(self.artnet(0, _rgbw(4, 4, 4, 4, 1), sequence=6))
+        self.assertEqual(0x03030303, self.frame.pixels[0])
+
+    def test_e131_preview_packets_are_ignored(self):
+        self.assertFalse(self.e131(1, _rgbw(1, 1, 1, 1, 1), options=E131_OPTION_PREVIEW))
+        self.assertEqual(0, self.frame.pixels[0])
+
+    def test_e131_stream_terminated_clears_the_universe(self):
+        self.e131(1, _rgbw(1, 1, 1, 1, 128), sequence=1)
+        self.e131(2, _rgbw(2, 2, 2, 2, 72), sequence=1)
+        self.assertTrue(self.e131(1, b"", sequence=2, options=E131_OPTION_TERMINATED))
+        self.assertFalse(self.frame.pixels[:128].any())
+        self.assertTrue((self.frame.pixels[128:] == 0x02020202).all())
+        # Nach dem Beenden beginnt die Sequenz der Quelle neu
+        self.assertTrue(self.e131(1, _rgbw(3, 3, 3, 3, 1), sequence=1))
+
+    def test_malformed_packets_are_counted(self):
+        channels = self.frame.channels
+        packet = build_e131_packet(1, _rgbw(1, 1, 1, 1, 1))
+        packet[4:16] = b"X" * 12
+        self.assertFalse(self.receiver._handle_e131(memoryview(packet), channels))
+        self.assertFalse(self.receiver._handle_e131(memoryview(packet[:20]), channels))
+        self.assertFalse(self.receiver._handle_artnet(memoryview(b"Art-Net\x00\x00\x20"), channels))
+        self.assertEqual(3, self.receiver.ignored)
+        self.assertEqual(0, self.receiver.packets)
+
+
+if __name__ == "__main__":
+    unittest.main()
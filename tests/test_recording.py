@@ -0,0 +1,102 @@
+# test_recording.py
+#
+# Aus dem Projektverzeichnis: python -m pytest tests
+import os
+import tempfile
+import unittest
+import numpy as np
+from animations.recording import LightShow, LightShowRecorder
+
+
+def _frames(num_pixels=64, count=12, seed=0):
+    """Wechsel aus einfarbigen Frames (RLE günstig) und wenigen geänderten Pixeln (Delta günstig)."""
+    rng = np.random.default_rng(seed)
+    pixels = np.zeros(num_pixels, dtype=np.uint32)
+    frames = []
+    for i in range(count):
+        if i % 5 == 3:
+            pixels = np.full(num_pixels, 0x01020304 * (i + 1), dtype=np.uint32)
+        else:
+            pixels = pixels.copy()
+            changed = rng.choice(num_pixels, 3, replace=False)
+            pixels[changed] = rng.integers(0, 1 << 32, len(changed), dtype=np.uint32)
+        frames.append(pixels)
+    return frames
+
+
+class LightShowRoundTripTest(unittest.TestCase):
+    """LightShowRecorder -> LightShow liefert die geschriebenen Frames unverändert zurück."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "show.skls")
+        self.frames = _frames()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _record(self, keyframe_interval=4):
+        with LightShowRecorder(self.path, len(self.frames[0]), fps=25.0, keyframe_interval=keyframe_interval) as recorder:
+            for frame in self.frames:
+                recorder.write_frame(frame)
+
+    def _read_all(self, show):
+        frames = []
+        while (pixels := show.read()) is not None:
+            frames.append(pixels.copy())
+        return frames
+
+    def test_round_trip(self):
+        self._record()
+        with LightShow(self.path) as show:
+            self.assertEqual(len(self.frames), show.frame_count)
+            self.assertEqual(25.0, show.fps)
+            np.testing.assert_array_equal(np.array(self.frames), np.array(self._read_all(show)))
+
+    def test_keyframe_and_delta_records(self):
+        self._record(keyframe_interval=4)
+        with LightShow(self.path) as show:
+            kinds = [show._is_keyframe(i) for i in range(show.frame_count)]
+        # Alle 4 Frames ein Keyframe; dazwischen Deltas, außer wo der einfarbige Frame als RLE kleiner ist
+        for i, keyframe in enumerate(kinds):
+            if i % 4 == 0 or i % 5 == 3:
+                self.assertTrue(keyframe, i)
+            else:
+                self.assertFalse(keyframe, i)
+
+    def test_seek_into_delta_frames(self):
+        self._record()
+        with LightShow(self.path) as show:
+            for frame in (6, 2, 11, 0, 9):
+                show.seek(frame)
+                np.testing.assert_array_equal(self.frames[frame], show.read())
+            show.seek_time(11.0 / show.fps)
+            np.testing.assert_array_equal(self.frames[11], show.read())
+            self.assertIsNone(show.read())
+
+    def test_unclosed_file_rebuilds_index(self):
+        recorder = LightShowRecorder(self.path, len(self.frames[0]), fps=25.0, keyframe_interval=4)
+        for frame in self.frames:
+            recorder.write_frame(frame)
+        # Abbruch ohne close(): kein Index im Header, der letzte Record nur halb geschrieben
+        recorder._file.flush()
+        recorder._file.truncate(recorder._file.tell() - 4)
+        recorder._file.close()
+        with self.assertLogs("SK6812Animations", "WARNING"):
+            show = LightShow(self.path)
+        with show:
+            self.assertEqual(len(self.frames) - 1, show.frame_count)
+            np.testing.assert_array_equal(np.array(self.frames[:-1]), np.array(self._read_all(show)))
+
+    def test_capture_fills_gaps_with_the_previous_frame(self):
+        a, b = self.frames[0], self.frames[1]
+        with LightShowRecorder(self.path, len(a), fps=10.0) as recorder:
+            recorder.capture(a, timestamp=0.0)
+            recorder.capture(b, timestamp=0.3)  # Rasterplätze 1 und 2 fehlen
+            recorder.capture(a, timestamp=0.31)  # derselbe Rasterplatz wie b
+        with LightShow(self.path) as show:
+            np.testing.assert_array_equal(np.array([a, a, a, b]), np.array(self._read_all(show)))
+
+
+if __name__ == "__main__":
+    unittest.main()
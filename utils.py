@@ -1,9 +1,9 @@
 # utils.py
 import logging
 
-def setup_logging(name):
+def setup_logging(name, level=logging.DEBUG):
     """
-    Set up logging with the given logger name.
+    Set up logging with the given logger name and level (e.g. "INFO" or logging.INFO).
     """
-    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.basicConfig(level=level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     return logging.getLogger(name)
\ No newline at end of file